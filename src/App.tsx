@@ -7,6 +7,8 @@ import {
   ScreenShareOff,
   FileText,
   Video,
+  MonitorSmartphone,
+  Cast,
 } from "lucide-react";
 import { NavMenu } from "@/components/nav-menu";
 import { Tabs, TabsContent, TabsList, TabsTrigger } from "@/components/ui/tabs";
@@ -19,6 +21,8 @@ import { Terminal } from "@/components/terminal";
 import { Instruct } from "@/components/instruct";
 import { Logs } from "@/components/logs";
 import { Screenshot } from "@/components/screenshot";
+import { Fleet } from "@/components/fleet";
+import { Mirror } from "@/components/mirror";
 import { useDeviceStore } from "@/store/device-store";
 import { useEffect } from "react";
 
@@ -28,11 +32,21 @@ import Screenrecord from "@/components/screenrecord.tsx";
 function App() {
   const { deviceInfo, fetchDevices } = useDeviceStore();
   const fetchDeviceInfo = useDeviceStore((state) => state.fetchDeviceInfo);
+  const handleDeviceEvent = useDeviceStore((state) => state.handleDeviceEvent);
   usePythonState("ticker");
   useEffect(() => {
     fetchDevices().then((r) => console.log(r));
   }, []);
 
+  useEffect(() => {
+    if (!window.pywebview) return;
+    if (!window.pywebview.state) {
+      window.pywebview.state = {};
+    }
+    // 设备插拔由后端的 track-devices 推送，不再轮询设备列表
+    window.pywebview.state.onDeviceEvent = handleDeviceEvent;
+  }, [handleDeviceEvent]);
+
   const handleDeviceChange = async (serial: string) => {
     await fetchDeviceInfo(serial);
   };
@@ -77,6 +91,13 @@ function App() {
                 <Activity className="w-4 h-4 mr-2" />
                 性能
               </TabsTrigger>
+              <TabsTrigger
+                value="fleet"
+                className="h-12 px-4 rounded-none data-[state=active]:border-b-2 data-[state=active]:border-primary"
+              >
+                <MonitorSmartphone className="w-4 h-4 mr-2" />
+                多设备
+              </TabsTrigger>
               <TabsTrigger
                 value="screenshot"
                 className="h-12 px-4 rounded-none data-[state=active]:border-b-2 data-[state=active]:border-primary"
@@ -91,6 +112,13 @@ function App() {
                 <Video className="w-4 h-4 mr-2" />
                 录屏
               </TabsTrigger>
+              <TabsTrigger
+                value="mirror"
+                className="h-12 px-4 rounded-none data-[state=active]:border-b-2 data-[state=active]:border-primary"
+              >
+                <Cast className="w-4 h-4 mr-2" />
+                投屏
+              </TabsTrigger>
               {/*<TabsTrigger*/}
               {/*  value="terminal"*/}
               {/*  className="h-12 px-4 rounded-none data-[state=active]:border-b-2 data-[state=active]:border-primary"*/}
@@ -139,6 +167,11 @@ function App() {
                 <Performance />
               </div>
             </TabsContent>
+            <TabsContent value="fleet" className="m-0">
+              <div className="bg-white rounded-lg p-6 shadow-sm">
+                <Fleet />
+              </div>
+            </TabsContent>
             <TabsContent value="files" className="m-0">
               <div className="bg-white rounded-lg p-6 shadow-sm">
                 <Files />
@@ -169,6 +202,11 @@ function App() {
                 <Screenrecord />
               </div>
             </TabsContent>
+            <TabsContent value="mirror" className="m-0">
+              <div className="bg-white rounded-lg p-6 shadow-sm">
+                <Mirror />
+              </div>
+            </TabsContent>
           </div>
         </div>
       </Tabs>
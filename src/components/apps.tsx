@@ -1,7 +1,15 @@
-import { useState, useEffect } from "react";
+import { useState, useEffect, type MouseEvent } from "react";
 import { Input } from "@/components/ui/input";
 import { Checkbox } from "@/components/ui/checkbox";
 import { useAppsStore } from "@/store/apps-store";
+import { useDeviceStore } from "@/store/device-store";
+import {
+  Dialog,
+  DialogContent,
+  DialogHeader,
+  DialogTitle,
+} from "@/components/ui/dialog";
+import { Progress } from "@/components/ui/progress";
 import {
   ContextMenu,
   ContextMenuContent,
@@ -26,47 +34,204 @@ import {
   ShieldCheck,
   Eraser,
   ArrowDownToLine,
+  X,
 } from "lucide-react";
 import { Button } from "@/components/ui/button";
+import {
+  Select,
+  SelectContent,
+  SelectItem,
+  SelectTrigger,
+  SelectValue,
+} from "@/components/ui/select";
+import { formatFileSize } from "@/lib/utils";
 
 interface App {
-  id: string;
-  name: string;
-  icon: string;
+  packageName: string;
+  versionCode: number;
+  versionName: string;
+  uid: number | null;
+  enabled: boolean;
   isSystem: boolean;
+  installTime: number;
+  updateTime: number;
+  apkPaths: string[];
+  codeSize: number | null;
+  dataSize: number | null;
+  cacheSize: number | null;
+}
+
+interface BulkResult {
   packageName: string;
+  action: string;
+  success: boolean;
+  output: string;
+  exitCode: number | null;
+  durationMs: number | null;
+}
+
+interface DeviceInstall {
+  serial: string;
+  stage: "pending" | "push" | "install" | "done" | "failed" | "cancelled";
+  totalBytes: number;
+  sentBytes: number;
+  installed: string[];
+  error: string | null;
+  elapsed: number;
 }
 
+interface InstallProgress {
+  id: string;
+  apks: string[];
+  split: boolean;
+  devices: DeviceInstall[];
+  doneDevices: number;
+  failedDevices: number;
+  elapsed: number;
+  cancelled: boolean;
+  finished: boolean;
+}
+
+const INSTALL_STAGES: Record<DeviceInstall["stage"], string> = {
+  pending: "等待",
+  push: "推送",
+  install: "安装",
+  done: "完成",
+  failed: "失败",
+  cancelled: "已取消",
+};
+
+const BULK_ACTIONS: { label: string; actions: string[] }[] = [
+  { label: "重置", actions: ["stop", "clear"] },
+  { label: "停止", actions: ["stop"] },
+  { label: "清理", actions: ["clear"] },
+  { label: "启用", actions: ["enable"] },
+  { label: "禁用", actions: ["disable"] },
+  { label: "卸载", actions: ["uninstall"] },
+];
+
+const SORT_OPTIONS: { value: string; label: string; reverse: boolean }[] = [
+  { value: "packageName", label: "包名", reverse: false },
+  { value: "updateTime", label: "最近更新", reverse: true },
+  { value: "installTime", label: "最近安装", reverse: true },
+  { value: "totalSize", label: "占用空间", reverse: true },
+];
+
 export function Apps() {
   const { selectedPackage, setSelectedPackage } = useAppsStore();
+  const { devices, currentDevice } = useDeviceStore();
   const [filter, setFilter] = useState("");
   const [showSystemApps, setShowSystemApps] = useState(false);
   const [apps, setApps] = useState<App[]>([]);
+  const [total, setTotal] = useState(0);
+  const [sort, setSort] = useState("packageName");
   const [actionLoading, setActionLoading] = useState<{
     type: string;
     packageName: string;
   } | null>(null);
+  // Ctrl/Cmd + 点击多选，用于批量操作
+  const [checked, setChecked] = useState<Set<string>>(new Set());
+  const [bulkSummary, setBulkSummary] = useState<{
+    failed: BulkResult[];
+    count: number;
+    elapsedMs: number;
+  } | null>(null);
 
-  const fetchApps = async (showSystem: boolean) => {
-    const response = await window.pywebview.api.get_packages(showSystem);
-    setApps(response);
-  };
+  const [exportProgress, setExportProgress] = useState<{
+    id: string;
+    totalBytes: number;
+    doneBytes: number;
+    finished: boolean;
+  } | null>(null);
+  const [installOpen, setInstallOpen] = useState(false);
+  const [installSerials, setInstallSerials] = useState<string[]>([]);
+  const [installSplit, setInstallSplit] = useState(false);
+  const [installProgress, setInstallProgress] =
+    useState<InstallProgress | null>(null);
 
   useEffect(() => {
-    fetchApps(showSystemApps);
-  }, [showSystemApps]);
+    if (window.pywebview) {
+      if (!window.pywebview.state) {
+        window.pywebview.state = {};
+      }
+      window.pywebview.state.onInstallProgress = (
+        progress: InstallProgress,
+      ) => {
+        setInstallProgress(progress);
+      };
+      window.pywebview.state.onExportProgress = (progress: {
+        id: string;
+        totalBytes: number;
+        doneBytes: number;
+        finished: boolean;
+      }) => {
+        setExportProgress(progress.finished ? null : progress);
+      };
+    }
+  }, []);
 
-  const filteredApps = apps.filter((app) => {
-    return app.name.toLowerCase().includes(filter.toLowerCase());
-  });
+  // 搜索与排序在后端索引上完成
+  const fetchApps = async (showSystem: boolean, refresh: boolean = false) => {
+    const option = SORT_OPTIONS.find((o) => o.value === sort);
+    const response = await window.pywebview.api.query_packages(
+      filter,
+      showSystem,
+      sort,
+      option?.reverse ?? false,
+      0,
+      0,
+      refresh,
+    );
+    setApps(response.packages || []);
+    setTotal(response.total || 0);
+  };
+
+  useEffect(() => {
+    const timer = setTimeout(() => fetchApps(showSystemApps), 150);
+    return () => clearTimeout(timer);
+  }, [showSystemApps, filter, sort]);
 
   const handleSystemAppsChange = (checked: boolean) => {
     setShowSystemApps(checked);
   };
 
-  const handleAppClick = (packageName: string) => {
+  const handleAppClick = (e: MouseEvent, packageName: string) => {
+    if (e.ctrlKey || e.metaKey) {
+      setChecked((prev) => {
+        const next = new Set(prev);
+        if (next.has(packageName)) {
+          next.delete(packageName);
+        } else {
+          next.add(packageName);
+        }
+        return next;
+      });
+      return;
+    }
     setSelectedPackage(packageName);
   };
+
+  const handleBulkAction = async (label: string, actions: string[]) => {
+    try {
+      setActionLoading({ type: "bulk", packageName: label });
+      const result = await window.pywebview.api.bulk_package_action(
+        Array.from(checked),
+        actions,
+      );
+      if (result && result.results) {
+        setBulkSummary({
+          failed: result.results.filter((r: BulkResult) => !r.success),
+          count: result.results.length,
+          elapsedMs: result.elapsedMs,
+        });
+      }
+      await fetchApps(showSystemApps, true);
+    } catch (error) {
+      console.error(`Failed to bulk ${label}:`, error);
+    } finally {
+      setActionLoading(null);
+    }
+  };
   const handleContextMenuAction = async (
     action: string,
     packageName: string,
@@ -93,7 +258,14 @@ export function Apps() {
           break;
         case "pull":
           console.log("pull apk:", packageName);
-          await window.pywebview.api.pull_apk(packageName);
+          await window.pywebview.api.pull_apk(packageName, false);
+          // 取消或失败时不会收到 finished 进度
+          setExportProgress(null);
+          break;
+        case "pullObb":
+          console.log("pull apk with obb:", packageName);
+          await window.pywebview.api.pull_apk(packageName, true);
+          setExportProgress(null);
           break;
         case "clear":
           console.log("clear app:", packageName);
@@ -107,24 +279,39 @@ export function Apps() {
           break;
       }
 
-      await fetchApps(showSystemApps);
+      await fetchApps(showSystemApps, true);
     } catch (error) {
       console.error(`Failed to ${action}:`, error);
     } finally {
       setActionLoading(null);
     }
   };
-  const handleOpenApk = async () => {
+  const handleOpenApk = () => {
+    setInstallSerials(currentDevice ? [currentDevice] : []);
+    setInstallProgress(null);
+    setInstallOpen(true);
+  };
+
+  const handleInstall = async () => {
     try {
       setActionLoading({ type: "install", packageName: "" });
-      await window.pywebview.api.install_package();
-      await fetchApps(showSystemApps);
+      await window.pywebview.api.install_packages(
+        installSerials,
+        installSplit,
+      );
+      await fetchApps(showSystemApps, true);
     } catch (error) {
       console.error("Failed to install apk:", error);
     } finally {
       setActionLoading(null);
     }
   };
+
+  const toggleInstallSerial = (serial: string, checked: boolean) => {
+    setInstallSerials((prev) =>
+      checked ? [...prev, serial] : prev.filter((s) => s !== serial),
+    );
+  };
   return (
     <div className="space-y-4">
       <div className="flex items-center gap-4">
@@ -149,9 +336,40 @@ export function Apps() {
             系统应用
           </label>
         </div>
+        <Select value={sort} onValueChange={setSort}>
+          <SelectTrigger className="h-8 w-[120px]">
+            <SelectValue />
+          </SelectTrigger>
+          <SelectContent>
+            {SORT_OPTIONS.map((option) => (
+              <SelectItem key={option.value} value={option.value}>
+                {option.label}
+              </SelectItem>
+            ))}
+          </SelectContent>
+        </Select>
         <div className="text-sm text-muted-foreground">
-          共 {filteredApps.length} 个应用
+          共 {total} 个应用
         </div>
+        {exportProgress && exportProgress.totalBytes > 0 && (
+          <div className="flex items-center text-sm text-muted-foreground">
+            导出中{" "}
+            {Math.round(
+              (exportProgress.doneBytes / exportProgress.totalBytes) * 100,
+            )}
+            % · {formatFileSize(exportProgress.totalBytes)}
+            <Button
+              variant="ghost"
+              size="icon"
+              className="h-6 w-6"
+              onClick={() =>
+                window.pywebview.api.cancel_apk_export(exportProgress.id)
+              }
+            >
+              <X className="h-4 w-4" />
+            </Button>
+          </div>
+        )}
         <Button
           onClick={handleOpenApk}
           className="ml-auto h-7"
@@ -165,12 +383,180 @@ export function Apps() {
         </Button>
       </div>
 
+      <Dialog open={installOpen} onOpenChange={setInstallOpen}>
+        <DialogContent className="max-w-2xl">
+          <DialogHeader>
+            <DialogTitle>安装应用</DialogTitle>
+          </DialogHeader>
+          <div className="space-y-2 text-sm">
+            {devices.map((device) => {
+              const state = installProgress?.devices.find(
+                (d) => d.serial === device.serial,
+              );
+              return (
+                <div key={device.serial} className="flex items-center gap-2">
+                  <Checkbox
+                    id={`install-${device.serial}`}
+                    checked={installSerials.includes(device.serial)}
+                    disabled={actionLoading?.type === "install"}
+                    onCheckedChange={(checked) =>
+                      toggleInstallSerial(device.serial, checked as boolean)
+                    }
+                  />
+                  <label
+                    htmlFor={`install-${device.serial}`}
+                    className="w-48 truncate"
+                  >
+                    {device.model} ({device.serial})
+                  </label>
+                  {state && (
+                    <>
+                      <Progress
+                        value={
+                          state.totalBytes
+                            ? (state.sentBytes / state.totalBytes) * 100
+                            : 0
+                        }
+                        className="h-2 flex-1"
+                      />
+                      <TooltipProvider>
+                        <Tooltip>
+                          <TooltipTrigger asChild>
+                            <span
+                              className={cn(
+                                "w-24 text-right",
+                                state.stage === "failed" && "text-red-600",
+                              )}
+                            >
+                              {INSTALL_STAGES[state.stage]} · {state.elapsed}s
+                            </span>
+                          </TooltipTrigger>
+                          {state.error && (
+                            <TooltipContent>
+                              <p>{state.error}</p>
+                            </TooltipContent>
+                          )}
+                        </Tooltip>
+                      </TooltipProvider>
+                    </>
+                  )}
+                </div>
+              );
+            })}
+          </div>
+          <div className="flex items-center gap-2 text-sm">
+            <Checkbox
+              id="install-split"
+              checked={installSplit}
+              onCheckedChange={(checked) => setInstallSplit(checked as boolean)}
+            />
+            <label htmlFor="install-split">
+              拆分包（所选 APK 属于同一应用）
+            </label>
+            <div className="ml-auto flex gap-2">
+              {actionLoading?.type === "install" && installProgress && (
+                <Button
+                  variant="outline"
+                  size="sm"
+                  onClick={() =>
+                    window.pywebview.api.cancel_install(installProgress.id)
+                  }
+                >
+                  取消
+                </Button>
+              )}
+              <Button
+                size="sm"
+                disabled={!!actionLoading || installSerials.length === 0}
+                onClick={handleInstall}
+              >
+                {actionLoading?.type === "install" && (
+                  <Loader2 className="mr-1 h-4 w-4 animate-spin" />
+                )}
+                选择 APK 并安装
+              </Button>
+            </div>
+          </div>
+          {installProgress?.finished && (
+            <div className="text-sm text-muted-foreground">
+              {installProgress.doneDevices}/{installProgress.devices.length}{" "}
+              台设备安装成功 · {installProgress.elapsed}s
+            </div>
+          )}
+        </DialogContent>
+      </Dialog>
+
+      {checked.size > 0 && (
+        <div className="flex items-center gap-2 text-sm">
+          <span className="text-muted-foreground">
+            已选 {checked.size} 个
+          </span>
+          {BULK_ACTIONS.map((bulk) => (
+            <Button
+              key={bulk.label}
+              variant={
+                bulk.actions.includes("uninstall") ? "destructive" : "outline"
+              }
+              size="sm"
+              className="h-7"
+              disabled={!!actionLoading}
+              onClick={() => handleBulkAction(bulk.label, bulk.actions)}
+            >
+              {actionLoading?.type === "bulk" &&
+                actionLoading.packageName === bulk.label && (
+                  <Loader2 className="mr-1 h-4 w-4 animate-spin" />
+                )}
+              {bulk.label}
+            </Button>
+          ))}
+          <Button
+            variant="ghost"
+            size="sm"
+            className="h-7"
+            onClick={() => {
+              setChecked(new Set());
+              setBulkSummary(null);
+            }}
+          >
+            取消选择
+          </Button>
+          {bulkSummary && (
+            <TooltipProvider>
+              <Tooltip>
+                <TooltipTrigger asChild>
+                  <span
+                    className={cn(
+                      "ml-auto",
+                      bulkSummary.failed.length > 0
+                        ? "text-red-600"
+                        : "text-muted-foreground",
+                    )}
+                  >
+                    {bulkSummary.count - bulkSummary.failed.length}/
+                    {bulkSummary.count} 成功 · {bulkSummary.elapsedMs}ms
+                  </span>
+                </TooltipTrigger>
+                {bulkSummary.failed.length > 0 && (
+                  <TooltipContent>
+                    {bulkSummary.failed.map((r) => (
+                      <p key={`${r.packageName}-${r.action}`}>
+                        {r.packageName} {r.action}: {r.output}
+                      </p>
+                    ))}
+                  </TooltipContent>
+                )}
+              </Tooltip>
+            </TooltipProvider>
+          )}
+        </div>
+      )}
+
       <div
         className="grid grid-cols-2 sm:grid-cols-4 md:grid-cols-6 lg:grid-cols-8 gap-4 overflow-auto"
         style={{ maxHeight: "calc(100vh - 13rem)" }}
       >
-        {filteredApps.map((app) => (
-          <ContextMenu key={app.id}>
+        {apps.map((app) => (
+          <ContextMenu key={app.packageName}>
             <ContextMenuTrigger>
               <div
                 className={cn(
@@ -181,13 +567,15 @@ export function Apps() {
                   selectedPackage === app.packageName
                     ? "border-primary bg-primary/5"
                     : "border-gray-200 hover:bg-gray-50",
+                  checked.has(app.packageName) && "ring-2 ring-primary",
+                  !app.enabled && "opacity-50",
                 )}
-                onClick={() => handleAppClick(app.packageName)}
+                onClick={(e) => handleAppClick(e, app.packageName)}
               >
                 <div className="w-16 h-16 mb-3 rounded-lg bg-gray-100 flex items-center justify-center">
                   <img
                     src={"/vite.svg"}
-                    alt={app.name}
+                    alt={app.packageName}
                     className="w-12 h-12 object-contain"
                     onError={(e) => {
                       e.currentTarget.src = "/vite.svg";
@@ -198,14 +586,28 @@ export function Apps() {
                   <Tooltip>
                     <TooltipTrigger asChild>
                       <span className="block text-sm text-center truncate w-full">
-                        {app.name}
+                        {app.packageName}
                       </span>
                     </TooltipTrigger>
                     <TooltipContent>
                       <p>{app.packageName}</p>
+                      <p>
+                        {app.versionName} ({app.versionCode})
+                        {app.uid !== null && ` · uid ${app.uid}`}
+                      </p>
+                      {app.codeSize !== null && (
+                        <p>
+                          应用 {formatFileSize(app.codeSize)} · 数据{" "}
+                          {formatFileSize(app.dataSize ?? 0)} · 缓存{" "}
+                          {formatFileSize(app.cacheSize ?? 0)}
+                        </p>
+                      )}
                     </TooltipContent>
                   </Tooltip>
                 </TooltipProvider>
+                <span className="block text-xs text-muted-foreground truncate w-full text-center">
+                  {app.versionName}
+                </span>
               </div>
             </ContextMenuTrigger>
             <ContextMenuContent>
@@ -253,6 +655,20 @@ export function Apps() {
                 )}
                 <span>导出</span>
               </ContextMenuItem>
+              <ContextMenuItem
+                onClick={() =>
+                  handleContextMenuAction("pullObb", app.packageName)
+                }
+                disabled={!!actionLoading}
+              >
+                {actionLoading?.type === "pullObb" &&
+                actionLoading.packageName === app.packageName ? (
+                  <Loader2 className="mr-2 h-4 w-4 animate-spin" />
+                ) : (
+                  <ArrowDownToLine className="mr-2 h-4 w-4" />
+                )}
+                <span>导出（含 OBB）</span>
+              </ContextMenuItem>
               <ContextMenuItem
                 onClick={() =>
                   handleContextMenuAction("clear", app.packageName)
@@ -0,0 +1,199 @@
+import { useState, useEffect, useRef } from "react";
+import {
+  Dialog,
+  DialogContent,
+  DialogHeader,
+  DialogTitle,
+} from "@/components/ui/dialog";
+import { Button } from "@/components/ui/button";
+import { formatFileSize } from "@/lib/utils";
+
+interface FileWindow {
+  path: string;
+  offset: number;
+  length: number;
+  size: number;
+  eof: boolean;
+  encoding: "text" | "base64";
+  data: string;
+  elapsedMs: number;
+}
+
+interface TailData {
+  id: string;
+  data: string;
+  received: number;
+  dropped: number;
+  done: boolean;
+}
+
+const WINDOW_SIZE = 64 * 1024;
+// 跟随模式下最多保留的字符数
+const MAX_TAIL_CHARS = 512 * 1024;
+
+const toHex = (base64: string) => {
+  const bytes = atob(base64);
+  const lines: string[] = [];
+  for (let i = 0; i < bytes.length; i += 16) {
+    const row = Array.from(bytes.slice(i, i + 16))
+      .map((c) => c.charCodeAt(0).toString(16).padStart(2, "0"))
+      .join(" ");
+    lines.push(`${i.toString(16).padStart(8, "0")}  ${row}`);
+  }
+  return lines.join("\n");
+};
+
+export function FilePreview({
+  path,
+  onClose,
+}: {
+  path: string | null;
+  onClose: () => void;
+}) {
+  const [fileWindow, setFileWindow] = useState<FileWindow | null>(null);
+  const [tailText, setTailText] = useState("");
+  const [tailDropped, setTailDropped] = useState(0);
+  const [following, setFollowing] = useState(false);
+  const tailId = useRef<string | null>(null);
+  const contentRef = useRef<HTMLPreElement>(null);
+
+  const loadWindow = async (offset: number) => {
+    if (!path) return;
+    const result = await window.pywebview.api.read_file_range(
+      path,
+      offset,
+      WINDOW_SIZE,
+    );
+    if (result && result.path) {
+      setFileWindow(result);
+    }
+  };
+
+  const stopFollow = () => {
+    if (tailId.current) {
+      window.pywebview.api.stop_tail(tailId.current);
+      tailId.current = null;
+    }
+    setFollowing(false);
+  };
+
+  const startFollow = async () => {
+    if (!path) return;
+    setTailText("");
+    setTailDropped(0);
+    const result = await window.pywebview.api.start_tail(path);
+    if (result && result.id) {
+      tailId.current = result.id;
+      setFollowing(true);
+    }
+  };
+
+  useEffect(() => {
+    if (window.pywebview) {
+      if (!window.pywebview.state) {
+        window.pywebview.state = {};
+      }
+      window.pywebview.state.onTailData = (tail: TailData) => {
+        if (tail.id !== tailId.current) return;
+        setTailText((prev) => (prev + tail.data).slice(-MAX_TAIL_CHARS));
+        setTailDropped(tail.dropped);
+        if (tail.done) {
+          tailId.current = null;
+          setFollowing(false);
+        }
+      };
+    }
+  }, []);
+
+  useEffect(() => {
+    setFileWindow(null);
+    if (path) {
+      loadWindow(0);
+    }
+    return stopFollow;
+  }, [path]);
+
+  useEffect(() => {
+    if (following && contentRef.current) {
+      contentRef.current.scrollTop = contentRef.current.scrollHeight;
+    }
+  }, [tailText, following]);
+
+  const content = following
+    ? tailText
+    : fileWindow
+      ? fileWindow.encoding === "base64"
+        ? toHex(fileWindow.data)
+        : fileWindow.data
+      : "";
+
+  return (
+    <Dialog open={path !== null} onOpenChange={(open) => !open && onClose()}>
+      <DialogContent className="max-w-5xl">
+        <DialogHeader>
+          <DialogTitle className="truncate">{path}</DialogTitle>
+        </DialogHeader>
+        <div className="flex items-center gap-2 text-sm">
+          <Button
+            variant="outline"
+            size="sm"
+            disabled={following || !fileWindow || fileWindow.offset === 0}
+            onClick={() => loadWindow(0)}
+          >
+            开头
+          </Button>
+          <Button
+            variant="outline"
+            size="sm"
+            disabled={following || !fileWindow || fileWindow.offset === 0}
+            onClick={() =>
+              fileWindow &&
+              loadWindow(Math.max(fileWindow.offset - WINDOW_SIZE, 0))
+            }
+          >
+            上一页
+          </Button>
+          <Button
+            variant="outline"
+            size="sm"
+            disabled={following || !fileWindow || fileWindow.eof}
+            onClick={() =>
+              fileWindow && loadWindow(fileWindow.offset + fileWindow.length)
+            }
+          >
+            下一页
+          </Button>
+          <Button
+            variant="outline"
+            size="sm"
+            disabled={following || !fileWindow || fileWindow.eof}
+            onClick={() => loadWindow(-WINDOW_SIZE)}
+          >
+            末尾
+          </Button>
+          <Button
+            variant={following ? "default" : "outline"}
+            size="sm"
+            onClick={following ? stopFollow : startFollow}
+          >
+            {following ? "停止跟随" : "跟随 (tail -f)"}
+          </Button>
+          <div className="flex-1 text-right text-muted-foreground">
+            {following
+              ? tailDropped > 0 && `已丢弃 ${formatFileSize(tailDropped)}`
+              : fileWindow &&
+                `${formatFileSize(fileWindow.offset)} - ${formatFileSize(
+                  fileWindow.offset + fileWindow.length,
+                )} / ${formatFileSize(fileWindow.size)} · ${fileWindow.elapsedMs}ms`}
+          </div>
+        </div>
+        <pre
+          ref={contentRef}
+          className="h-[60vh] overflow-auto rounded bg-muted p-2 text-xs font-mono whitespace-pre-wrap break-all"
+        >
+          {content}
+        </pre>
+      </DialogContent>
+    </Dialog>
+  );
+}
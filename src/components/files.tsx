@@ -1,4 +1,4 @@
-import { useState, useEffect } from "react";
+import { useState, useEffect, useRef, type UIEvent } from "react";
 import {
   Table,
   TableBody,
@@ -18,6 +18,11 @@ import {
   ArrowLeft,
   FileIcon,
   FolderIcon,
+  FolderUp,
+  ArrowLeftRight,
+  Search,
+  Eye,
+  X,
 } from "lucide-react";
 import {
   Dialog,
@@ -26,7 +31,17 @@ import {
   DialogTitle,
   DialogTrigger,
 } from "@/components/ui/dialog";
+import { Progress } from "@/components/ui/progress";
+import { Checkbox } from "@/components/ui/checkbox";
+import {
+  Select,
+  SelectContent,
+  SelectItem,
+  SelectTrigger,
+  SelectValue,
+} from "@/components/ui/select";
 import { formatFileSize } from "@/lib/utils";
+import { FilePreview } from "@/components/file-preview";
 
 interface FileEntry {
   name: string;
@@ -39,25 +54,183 @@ interface FileEntry {
   modified: string;
 }
 
+interface TransferProgress {
+  id: string;
+  direction: "download" | "upload";
+  totalFiles: number;
+  doneFiles: number;
+  skippedFiles: number;
+  failedFiles: number;
+  totalBytes: number;
+  doneBytes: number;
+  speed: number;
+  eta: number | null;
+  current: string | null;
+  cancelled: boolean;
+  finished: boolean;
+}
+
+interface SyncPlan {
+  direction: "upload" | "download";
+  local: string;
+  remote: string;
+  added: string[];
+  updated: string[];
+  deleted: string[];
+  addedCount: number;
+  updatedCount: number;
+  deletedCount: number;
+  unchangedCount: number;
+  checksummedCount: number;
+  transferBytes: number;
+}
+
+interface FilePage {
+  path: string;
+  entries: FileEntry[];
+  cursor: number | null;
+  total: number;
+}
+
+const PAGE_SIZE = 500;
+
+interface SearchBatch {
+  id: string;
+  results: FileEntry[];
+  total: number;
+  done: boolean;
+}
+
+const formatEta = (seconds: number | null) => {
+  if (seconds === null) return "--:--";
+  const mins = Math.floor(seconds / 60);
+  const secs = Math.floor(seconds % 60);
+  return `${mins.toString().padStart(2, "0")}:${secs.toString().padStart(2, "0")}`;
+};
+
 export function Files() {
   const [currentPath, setCurrentPath] = useState("/");
   const [files, setFiles] = useState<FileEntry[]>([]);
   const [newFolderName, setNewFolderName] = useState("");
+  const [transfer, setTransfer] = useState<TransferProgress | null>(null);
+  const [syncDirection, setSyncDirection] = useState<"upload" | "download">(
+    "upload",
+  );
+  const [syncDelete, setSyncDelete] = useState(false);
+  const [syncChecksum, setSyncChecksum] = useState(false);
+  const [syncPlan, setSyncPlan] = useState<SyncPlan | null>(null);
   const { toast } = useToast();
 
+  const [cursor, setCursor] = useState<number | null>(null);
+  const [total, setTotal] = useState(0);
+  const loadingMore = useRef(false);
+  const [searchPattern, setSearchPattern] = useState("");
+  const [searchUseIndex, setSearchUseIndex] = useState(false);
+  const [searchResults, setSearchResults] = useState<FileEntry[] | null>(
+    null,
+  );
+  const [searchStatus, setSearchStatus] = useState("");
+  const searchId = useRef<string | null>(null);
+  const [previewPath, setPreviewPath] = useState<string | null>(null);
+
   const loadFiles = async (path: string) => {
-    const result = await window.pywebview.api.list_files(path);
-    setFiles(result);
+    const result: FilePage = await window.pywebview.api.list_files_page(
+      path,
+      0,
+      PAGE_SIZE,
+    );
+    setFiles(result.entries || []);
+    setCursor(result.cursor ?? null);
+    setTotal(result.total || 0);
     setCurrentPath(path);
   };
 
+  // 滚动到底部附近时加载下一页
+  const handleScroll = async (e: UIEvent<HTMLDivElement>) => {
+    const target = e.currentTarget;
+    if (
+      cursor === null ||
+      searchResults !== null ||
+      loadingMore.current ||
+      target.scrollTop + target.clientHeight < target.scrollHeight - 200
+    ) {
+      return;
+    }
+    loadingMore.current = true;
+    try {
+      const result: FilePage = await window.pywebview.api.list_files_page(
+        currentPath,
+        cursor,
+        PAGE_SIZE,
+      );
+      if (result.path === currentPath) {
+        setFiles((prev) => [...prev, ...(result.entries || [])]);
+        setCursor(result.cursor ?? null);
+      }
+    } finally {
+      loadingMore.current = false;
+    }
+  };
+
   useEffect(() => {
     loadFiles(currentPath).then((r) => console.log(r));
+    if (window.pywebview) {
+      if (!window.pywebview.state) {
+        window.pywebview.state = {};
+      }
+      window.pywebview.state.onTransferProgress = (
+        progress: TransferProgress,
+      ) => {
+        setTransfer(progress.finished ? null : progress);
+      };
+      window.pywebview.state.onSearchResults = (batch: SearchBatch) => {
+        if (batch.id !== searchId.current) return;
+        setSearchResults((prev) => [...(prev || []), ...batch.results]);
+        setSearchStatus(
+          batch.done ? `${batch.total} 个结果` : `搜索中... ${batch.total}`,
+        );
+      };
+    }
   }, []);
 
+  const handleSearch = async () => {
+    if (!searchPattern) return;
+    if (searchId.current) {
+      window.pywebview.api.cancel_search(searchId.current);
+    }
+    setSearchResults([]);
+    setSearchStatus("搜索中...");
+    const result = await window.pywebview.api.search_files(
+      currentPath,
+      searchPattern,
+      searchUseIndex,
+    );
+    searchId.current = result.id ?? null;
+    if (result.done) {
+      setSearchResults(result.results);
+      setSearchStatus(`${result.total} 个结果 · ${result.elapsedMs}ms`);
+    } else if (!result.id) {
+      setSearchStatus("搜索失败");
+    }
+  };
+
+  const handleClearSearch = () => {
+    if (searchId.current) {
+      window.pywebview.api.cancel_search(searchId.current);
+      searchId.current = null;
+    }
+    setSearchResults(null);
+    setSearchStatus("");
+  };
+
   const handleNavigate = async (entry: FileEntry) => {
     if (entry.is_dir) {
+      handleClearSearch();
       await loadFiles(entry.path);
+    } else if (searchResults) {
+      // 搜索结果中的文件跳转到所在目录
+      handleClearSearch();
+      await loadFiles(entry.path.split("/").slice(0, -1).join("/") || "/");
     }
   };
 
@@ -96,8 +269,10 @@ export function Files() {
     }
   };
 
-  const handleDownload = async (path: string) => {
-    const result = await window.pywebview.api.download_file(path);
+  const handleDownload = async (entry: FileEntry) => {
+    const result = entry.is_dir
+      ? await window.pywebview.api.download_directory(entry.path)
+      : await window.pywebview.api.download_file(entry.path);
     if (result) {
       toast({ description: "下载成功" });
     } else {
@@ -121,6 +296,49 @@ export function Files() {
     }
   };
 
+  const handleUploadDirectory = async () => {
+    const result = await window.pywebview.api.upload_directory(currentPath);
+    if (result && result.status === "cancelled") return;
+    if (result) {
+      toast({ description: "上传成功" });
+      await loadFiles(currentPath);
+    } else {
+      toast({
+        variant: "destructive",
+        description: "上传失败",
+      });
+    }
+  };
+
+  // 先预览同步计划，确认后再执行
+  const handleSync = async (dryRun: boolean) => {
+    const result = await window.pywebview.api.sync_directory(
+      syncPlan?.local ?? null,
+      currentPath,
+      syncDirection,
+      dryRun,
+      syncDelete,
+      syncChecksum,
+    );
+    if (!result || !result.direction) {
+      if (!dryRun) {
+        toast({ variant: "destructive", description: "同步失败" });
+      }
+      return;
+    }
+    if (dryRun) {
+      setSyncPlan(result);
+      return;
+    }
+    setSyncPlan(null);
+    if (result.failedFiles || result.cancelled) {
+      toast({ variant: "destructive", description: "同步未完成" });
+    } else {
+      toast({ description: `同步完成，传输 ${result.doneFiles} 个文件` });
+    }
+    await loadFiles(currentPath);
+  };
+
   return (
     <div className="flex flex-col h-full">
       <div className="flex items-center gap-2 p-2 border-b">
@@ -135,7 +353,42 @@ export function Files() {
         </Button>
         <div className="flex-1 text-sm text-muted-foreground overflow-hidden">
           {currentPath}
+          {searchResults
+            ? ` · ${searchStatus}`
+            : total > files.length && ` (${files.length}/${total})`}
         </div>
+        <Input
+          value={searchPattern}
+          onChange={(e) => setSearchPattern(e.target.value)}
+          onKeyDown={(e) => e.key === "Enter" && handleSearch()}
+          placeholder="搜索文件名，如 *.jpg"
+          className="h-8 w-[200px]"
+        />
+        <label className="flex items-center gap-1 text-sm text-muted-foreground">
+          <Checkbox
+            checked={searchUseIndex}
+            onCheckedChange={(checked) => setSearchUseIndex(!!checked)}
+          />
+          索引
+        </label>
+        <Button
+          variant="outline"
+          size="icon"
+          className="h-8 w-8"
+          onClick={handleSearch}
+        >
+          <Search className="h-4 w-4" />
+        </Button>
+        {searchResults && (
+          <Button
+            variant="ghost"
+            size="icon"
+            className="h-8 w-8"
+            onClick={handleClearSearch}
+          >
+            <X className="h-4 w-4" />
+          </Button>
+        )}
         <Dialog>
           <DialogTrigger asChild>
             <Button variant="outline" size="icon" className="h-8 w-8">
@@ -164,11 +417,134 @@ export function Files() {
         >
           <Upload className="h-4 w-4" />
         </Button>
+        <Button
+          variant="outline"
+          size="icon"
+          className="h-8 w-8"
+          onClick={handleUploadDirectory}
+          disabled={transfer !== null}
+        >
+          <FolderUp className="h-4 w-4" />
+        </Button>
+        <Dialog onOpenChange={(open) => !open && setSyncPlan(null)}>
+          <DialogTrigger asChild>
+            <Button
+              variant="outline"
+              size="icon"
+              className="h-8 w-8"
+              disabled={transfer !== null}
+            >
+              <ArrowLeftRight className="h-4 w-4" />
+            </Button>
+          </DialogTrigger>
+          <DialogContent>
+            <DialogHeader>
+              <DialogTitle>同步目录 {currentPath}</DialogTitle>
+            </DialogHeader>
+            <div className="flex items-center gap-4 text-sm">
+              <Select
+                value={syncDirection}
+                onValueChange={(value: "upload" | "download") => {
+                  setSyncDirection(value);
+                  setSyncPlan(null);
+                }}
+              >
+                <SelectTrigger className="h-8 w-[140px]">
+                  <SelectValue />
+                </SelectTrigger>
+                <SelectContent>
+                  <SelectItem value="upload">本地 → 设备</SelectItem>
+                  <SelectItem value="download">设备 → 本地</SelectItem>
+                </SelectContent>
+              </Select>
+              <label className="flex items-center gap-2">
+                <Checkbox
+                  checked={syncDelete}
+                  onCheckedChange={(checked) => setSyncDelete(!!checked)}
+                />
+                删除多余文件
+              </label>
+              <label className="flex items-center gap-2">
+                <Checkbox
+                  checked={syncChecksum}
+                  onCheckedChange={(checked) => setSyncChecksum(!!checked)}
+                />
+                校验 MD5
+              </label>
+            </div>
+            {syncPlan && (
+              <div className="text-sm space-y-1">
+                <div className="text-muted-foreground">{syncPlan.local}</div>
+                <div>
+                  新增 {syncPlan.addedCount} · 更新 {syncPlan.updatedCount} ·
+                  删除 {syncPlan.deletedCount} · 未变化{" "}
+                  {syncPlan.unchangedCount} · 传输{" "}
+                  {formatFileSize(syncPlan.transferBytes)}
+                </div>
+                <div className="max-h-48 overflow-auto font-mono text-xs">
+                  {syncPlan.added.map((path) => (
+                    <div key={`+${path}`}>+ {path}</div>
+                  ))}
+                  {syncPlan.updated.map((path) => (
+                    <div key={`~${path}`}>~ {path}</div>
+                  ))}
+                  {syncPlan.deleted.map((path) => (
+                    <div key={`-${path}`} className="text-red-500">
+                      - {path}
+                    </div>
+                  ))}
+                </div>
+              </div>
+            )}
+            <div className="flex justify-end gap-2">
+              <Button variant="outline" onClick={() => handleSync(true)}>
+                预览
+              </Button>
+              <Button
+                onClick={() => handleSync(false)}
+                disabled={!syncPlan || transfer !== null}
+              >
+                同步
+              </Button>
+            </div>
+          </DialogContent>
+        </Dialog>
       </div>
+      {transfer && (
+        <div className="flex items-center gap-4 p-2 border-b text-sm">
+          <div className="w-16 text-muted-foreground">
+            {transfer.direction === "download" ? "下载中" : "上传中"}
+          </div>
+          <Progress
+            value={
+              transfer.totalBytes
+                ? (transfer.doneBytes / transfer.totalBytes) * 100
+                : 0
+            }
+            className="h-2 flex-1"
+          />
+          <div className="text-muted-foreground whitespace-nowrap">
+            {transfer.doneFiles}/{transfer.totalFiles} 个文件 ·{" "}
+            {formatFileSize(transfer.doneBytes)}/
+            {formatFileSize(transfer.totalBytes)} ·{" "}
+            {formatFileSize(transfer.speed)}/s · 剩余 {formatEta(transfer.eta)}
+            {transfer.skippedFiles > 0 && ` · 跳过 ${transfer.skippedFiles}`}
+          </div>
+          <Button
+            variant="ghost"
+            size="icon"
+            className="h-8 w-8"
+            onClick={() => window.pywebview.api.cancel_transfer(transfer.id)}
+          >
+            <X className="h-4 w-4" />
+          </Button>
+        </div>
+      )}
 
       <div
         className="overflow-auto"
         style={{ maxHeight: "calc(100vh - 13rem)" }}
+        onScroll={handleScroll}
       >
         <Table>
           <TableHeader>
@@ -181,7 +557,7 @@ export function Files() {
             </TableRow>
           </TableHeader>
           <TableBody>
-            {files.map((file) => (
+            {(searchResults ?? files).map((file) => (
               <TableRow key={file.path}>
                 <TableCell>
                   <div
@@ -208,11 +584,20 @@ export function Files() {
                         variant="ghost"
                         size="icon"
                         className="h-8 w-8"
-                        onClick={() => handleDownload(file.path)}
+                        onClick={() => setPreviewPath(file.path)}
                       >
-                        <Download className="h-4 w-4" />
+                        <Eye className="h-4 w-4" />
                       </Button>
                     )}
+                    <Button
+                      variant="ghost"
+                      size="icon"
+                      className="h-8 w-8"
+                      onClick={() => handleDownload(file)}
+                      disabled={file.is_dir && transfer !== null}
+                    >
+                      <Download className="h-4 w-4" />
+                    </Button>
                     <Button
                       variant="ghost"
                       size="icon"
@@ -228,6 +613,7 @@ export function Files() {
           </TableBody>
         </Table>
       </div>
+      <FilePreview path={previewPath} onClose={() => setPreviewPath(null)} />
     </div>
   );
 }
@@ -0,0 +1,200 @@
+import { useState, useEffect } from "react";
+import {
+  Table,
+  TableBody,
+  TableCell,
+  TableHead,
+  TableHeader,
+  TableRow,
+} from "@/components/ui/table";
+import { Input } from "@/components/ui/input";
+import { Checkbox } from "@/components/ui/checkbox";
+import { Button } from "@/components/ui/button";
+import { useDeviceStore } from "@/store/device-store";
+import { useAppsStore } from "@/store/apps-store";
+
+interface FleetSample {
+  timestamp: number;
+  error?: string;
+  pid?: number;
+  cpu?: { total: number | null; process: number | null };
+  memory?: {
+    usage?: number | null;
+    processes?: { [name: string]: { "TOTAL PSS": number } };
+  };
+  fps?: { fps: number | null; jank: number; p90: number | null };
+}
+
+interface FleetStats {
+  samples: number;
+  skipped: number;
+  errors: number;
+  lastMs: number | null;
+}
+
+const METRICS = [
+  { value: "cpu", label: "CPU" },
+  { value: "memory", label: "内存" },
+  { value: "fps", label: "FPS" },
+  { value: "logcat", label: "错误日志" },
+];
+
+const formatValue = (value: number | null | undefined, unit: string) =>
+  value === null || value === undefined ? "-" : `${value}${unit}`;
+
+export function Fleet() {
+  const { devices } = useDeviceStore();
+  const { selectedPackage } = useAppsStore();
+  const [packageName, setPackageName] = useState(selectedPackage ?? "");
+  const [metrics, setMetrics] = useState<string[]>(["cpu", "memory"]);
+  const [running, setRunning] = useState(false);
+  const [latest, setLatest] = useState<{ [serial: string]: FleetSample }>({});
+  const [stats, setStats] = useState<{ [serial: string]: FleetStats }>({});
+  const [errorLogs, setErrorLogs] = useState<{ [serial: string]: number }>({});
+
+  useEffect(() => {
+    if (!window.pywebview) return;
+    if (!window.pywebview.state) {
+      window.pywebview.state = {};
+    }
+    // 采样结果按序列号分组，只保留每台设备最新的一次
+    window.pywebview.state.addFleetSamples = (
+      batch: { [serial: string]: FleetSample[] },
+      batchStats: { [serial: string]: FleetStats },
+    ) => {
+      setLatest((prev) => {
+        const next = { ...prev };
+        for (const [serial, samples] of Object.entries(batch)) {
+          next[serial] = samples[samples.length - 1];
+        }
+        return next;
+      });
+      setStats(batchStats);
+    };
+    window.pywebview.state.addFleetLogEntries = (
+      serial: string,
+      entries: unknown[],
+    ) => {
+      setErrorLogs((prev) => ({
+        ...prev,
+        [serial]: (prev[serial] ?? 0) + entries.length,
+      }));
+    };
+    return () => {
+      window.pywebview.api.stop_fleet_monitoring();
+    };
+  }, []);
+
+  const toggleMonitoring = async () => {
+    if (running) {
+      await window.pywebview.api.stop_fleet_monitoring();
+      setRunning(false);
+      return;
+    }
+    setLatest({});
+    setStats({});
+    setErrorLogs({});
+    const started = await window.pywebview.api.start_fleet_monitoring(
+      devices.map((device) => device.serial),
+      metrics,
+      packageName || null,
+      1000,
+    );
+    setRunning(started);
+  };
+
+  const memoryOf = (sample: FleetSample | undefined) => {
+    if (!sample?.memory) return "-";
+    if (sample.memory.processes) {
+      const total = Object.values(sample.memory.processes).reduce(
+        (sum, process) => sum + (process["TOTAL PSS"] ?? 0),
+        0,
+      );
+      return `${total.toFixed(1)}MB`;
+    }
+    return formatValue(sample.memory.usage, "%");
+  };
+
+  return (
+    <div className="space-y-4">
+      <div className="flex items-center gap-4">
+        <Input
+          placeholder="包名（为空时监控整机）"
+          value={packageName}
+          disabled={running}
+          onChange={(e) => setPackageName(e.target.value)}
+          className="max-w-xs"
+        />
+        {METRICS.map((metric) => (
+          <div key={metric.value} className="flex items-center space-x-2">
+            <Checkbox
+              id={`fleet-${metric.value}`}
+              checked={metrics.includes(metric.value)}
+              disabled={running}
+              onCheckedChange={(checked) =>
+                setMetrics((prev) =>
+                  checked
+                    ? [...prev, metric.value]
+                    : prev.filter((m) => m !== metric.value),
+                )
+              }
+            />
+            <label htmlFor={`fleet-${metric.value}`} className="text-sm">
+              {metric.label}
+            </label>
+          </div>
+        ))}
+        <Button
+          variant="outline"
+          className="ml-auto"
+          disabled={devices.length === 0}
+          onClick={toggleMonitoring}
+        >
+          {running ? "停止" : `监控 ${devices.length} 台设备`}
+        </Button>
+      </div>
+      <Table>
+        <TableHeader>
+          <TableRow>
+            <TableHead>设备</TableHead>
+            <TableHead>CPU</TableHead>
+            <TableHead>应用 CPU</TableHead>
+            <TableHead>内存</TableHead>
+            <TableHead>FPS</TableHead>
+            <TableHead>卡顿</TableHead>
+            <TableHead>错误日志</TableHead>
+            <TableHead>采样</TableHead>
+          </TableRow>
+        </TableHeader>
+        <TableBody>
+          {devices.map((device) => {
+            const sample = latest[device.serial];
+            const stat = stats[device.serial];
+            return (
+              <TableRow key={device.serial}>
+                <TableCell className="font-medium">
+                  {device.model} ({device.serial})
+                </TableCell>
+                <TableCell>{formatValue(sample?.cpu?.total, "%")}</TableCell>
+                <TableCell>{formatValue(sample?.cpu?.process, "%")}</TableCell>
+                <TableCell>{memoryOf(sample)}</TableCell>
+                <TableCell>{formatValue(sample?.fps?.fps, "")}</TableCell>
+                <TableCell>{formatValue(sample?.fps?.jank, "")}</TableCell>
+                <TableCell>{errorLogs[device.serial] ?? 0}</TableCell>
+                <TableCell
+                  className={sample?.error ? "text-red-600" : undefined}
+                  title={sample?.error}
+                >
+                  {stat
+                    ? `${stat.samples} 次 · 跳过 ${stat.skipped} · 失败 ${stat.errors}` +
+                      (stat.lastMs !== null ? ` · ${stat.lastMs}ms` : "")
+                    : "-"}
+                </TableCell>
+              </TableRow>
+            );
+          })}
+        </TableBody>
+      </Table>
+    </div>
+  );
+}
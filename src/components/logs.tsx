@@ -35,6 +35,24 @@ interface LogEntry {
   message: string;
 }
 
+interface LogPage {
+  total: number;
+  // 带文本或包名过滤时 total 可能是估算值
+  exact: boolean;
+  more: boolean;
+  offset: number;
+  rows: LogEntry[];
+}
+
+interface LogcatStats {
+  received: number;
+  delivered: number;
+  dropped: number;
+  buffered: number;
+}
+
+const PAGE_SIZE = 200;
+
 const views = [
   "Standard View",
   "VERBOSE",
@@ -50,15 +68,66 @@ export function Logs() {
   const [packageFilter, setPackageFilter] = useState("");
   const [tagFilter, setTagFilter] = useState("");
   const [messageWidth, setMessageWidth] = useState(0);
+  const [stats, setStats] = useState<LogcatStats | null>(null);
+  const [total, setTotal] = useState(0);
+  const [exact, setExact] = useState(true);
+  const [more, setMore] = useState(false);
+  // 距最新日志的偏移，0 表示跟随最新日志
+  const [offset, setOffset] = useState(0);
   const messageColumnRef = useRef<HTMLTableCellElement>(null);
+  const refreshTimer = useRef<NodeJS.Timeout | null>(null);
+  const queryRef = useRef<() => void>(() => {});
   const { toast } = useToast();
 
+  const queryLogs = async () => {
+    const filter: Record<string, unknown> = { reverse: true };
+    if (selectedView !== "Standard View") {
+      filter.level = selectedView[0];
+    }
+    if (tagFilter) {
+      filter.tag = tagFilter;
+    }
+    if (packageFilter) {
+      filter.package = packageFilter;
+    }
+    const page: LogPage = await window.pywebview.api.query_logs(
+      filter,
+      offset,
+      PAGE_SIZE,
+    );
+    setLogs([...page.rows].reverse());
+    setTotal(page.total);
+    setExact(page.exact);
+    setMore(page.more);
+  };
+  // 翻看历史页时不随新日志刷新，避免页面内容漂移
+  queryRef.current = offset === 0 ? queryLogs : () => {};
+
+  useEffect(() => {
+    if (window.pywebview?.api) {
+      queryLogs();
+    }
+  }, [selectedView, tagFilter, packageFilter, offset]);
+
   useEffect(() => {
-    if (window.pywebview && window.pywebview.state) {
-      window.pywebview.state.addLogEntry = (logEntry: LogEntry) => {
-        console.log(logEntry);
-        setLogs((prevLogs) => [...prevLogs, logEntry].slice(-1000));
+    if (window.pywebview) {
+      if (!window.pywebview.state) {
+        window.pywebview.state = {};
+      }
+      window.pywebview.state.addLogEntries = (
+        _entries: LogEntry[],
+        logcatStats: LogcatStats,
+      ) => {
+        setStats(logcatStats);
+        // 日志保存在后端日志库中，这里只合并刷新当前页
+        if (!refreshTimer.current) {
+          refreshTimer.current = setTimeout(() => {
+            refreshTimer.current = null;
+            queryRef.current();
+          }, 300);
+        }
       };
+      window.pywebview.api.update_logcat();
     }
     const observer = new ResizeObserver((entries) => {
       for (const entry of entries) {
@@ -90,6 +159,17 @@ export function Logs() {
     }
   };
 
+  // 清空设备的日志缓冲区，只在用户点击时执行
+  const handleClear = async () => {
+    const cleared = await window.pywebview.api.clear_logcat();
+    if (!cleared) {
+      toast({ description: "清空日志失败", variant: "destructive" });
+      return;
+    }
+    setOffset(0);
+    queryLogs();
+  };
+
   const getLevelColor = (level: LogLevel) => {
     switch (level) {
       case "I":
@@ -105,28 +185,6 @@ export function Logs() {
     }
   };
 
-  const filteredLogs = logs.filter((log) => {
-    if (
-      packageFilter &&
-      !log.package.toLowerCase().includes(packageFilter.toLowerCase())
-    ) {
-      return false;
-    }
-    if (
-      tagFilter &&
-      !log.component.toLowerCase().includes(tagFilter.toLowerCase())
-    ) {
-      return false;
-    }
-    if (selectedView !== "Standard View") {
-      const level = selectedView[0] as LogLevel;
-      if (log.level !== level) {
-        return false;
-      }
-    }
-    return true;
-  });
-
   const truncateMessage = (message: string) => {
     if (message.length <= messageWidth) return message;
     return message.slice(0, messageWidth) + "...";
@@ -159,6 +217,39 @@ export function Logs() {
           onChange={(e) => setTagFilter(e.target.value)}
           className="max-w-[200px]"
         />
+        <Button variant="outline" size="sm" onClick={handleClear}>
+          清空日志
+        </Button>
+        <div className="ml-auto flex items-center gap-2 text-xs font-mono whitespace-nowrap">
+          <Button
+            variant="outline"
+            size="sm"
+            disabled={!more}
+            onClick={() => setOffset(offset + PAGE_SIZE)}
+          >
+            更早
+          </Button>
+          <Button
+            variant="outline"
+            size="sm"
+            disabled={offset === 0}
+            onClick={() => setOffset(Math.max(0, offset - PAGE_SIZE))}
+          >
+            更新
+          </Button>
+          <span>
+            {Math.max(0, total - offset - logs.length)}-{total - offset} / {exact ? "" : "~"}
+            {total}
+          </span>
+        </div>
+        {stats && (
+          <div className="text-xs font-mono whitespace-nowrap">
+            接收 {stats.received} / 丢弃{" "}
+            <span className={stats.dropped > 0 ? "text-red-500" : ""}>
+              {stats.dropped}
+            </span>
+          </div>
+        )}
       </div>
 
       <div
@@ -178,7 +269,7 @@ export function Logs() {
             </TableRow>
           </TableHeader>
           <TableBody>
-            {filteredLogs.map((log, index) => (
+            {logs.map((log, index) => (
               <TableRow key={index} className="font-mono">
                 <TableCell className="whitespace-nowrap">
                   {log.timestamp}
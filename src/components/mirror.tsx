@@ -0,0 +1,96 @@
+import { useState, useEffect } from "react";
+import { Cast, Square, Loader2 } from "lucide-react";
+import { Button } from "@/components/ui/button";
+import { useDeviceStore } from "@/store/device-store";
+
+interface MirrorStats {
+  running: boolean;
+  fps: number;
+  latencyMs: number;
+  dropped: number;
+  restarts: number;
+}
+
+export function Mirror() {
+  const { currentDevice } = useDeviceStore();
+  const [viewUrl, setViewUrl] = useState<string | null>(null);
+  const [stats, setStats] = useState<MirrorStats | null>(null);
+  const [isLoading, setIsLoading] = useState(false);
+
+  useEffect(() => {
+    // 切换设备或离开页面时停止投屏
+    setViewUrl(null);
+    setStats(null);
+    return () => {
+      window.pywebview?.api.stop_mirror();
+    };
+  }, [currentDevice]);
+
+  useEffect(() => {
+    if (!viewUrl) return;
+    const interval = setInterval(async () => {
+      const res = await window.pywebview.api.get_mirror_stats();
+      setStats(res.running === undefined ? null : res);
+    }, 1000);
+    return () => clearInterval(interval);
+  }, [viewUrl]);
+
+  const handleStart = async () => {
+    setIsLoading(true);
+    try {
+      const res = await window.pywebview.api.start_mirror(4000000);
+      setViewUrl(res.viewUrl ?? null);
+    } catch (error) {
+      console.error("开始投屏时出错:", error);
+    } finally {
+      setIsLoading(false);
+    }
+  };
+
+  const handleStop = async () => {
+    await window.pywebview.api.stop_mirror();
+    setViewUrl(null);
+    setStats(null);
+  };
+
+  return (
+    <div className="flex flex-col gap-4">
+      <div className="flex items-center gap-2">
+        {viewUrl ? (
+          <Button variant="outline" onClick={handleStop}>
+            <Square className="w-4 h-4 mr-2" />
+            停止投屏
+          </Button>
+        ) : (
+          <Button
+            variant="outline"
+            onClick={handleStart}
+            disabled={!currentDevice || isLoading}
+          >
+            {isLoading ? (
+              <Loader2 className="w-4 h-4 mr-2 animate-spin" />
+            ) : (
+              <Cast className="w-4 h-4 mr-2" />
+            )}
+            开始投屏
+          </Button>
+        )}
+        {stats && (
+          <div className="ml-auto text-sm text-muted-foreground">
+            {stats.fps} fps · 延迟 {stats.latencyMs} ms · 丢帧 {stats.dropped}
+            {stats.restarts > 0 && ` · 重启 ${stats.restarts} 次`}
+            {!stats.running && " · 已停止"}
+          </div>
+        )}
+      </div>
+      {viewUrl && (
+        <iframe
+          src={viewUrl}
+          title="mirror"
+          className="w-full rounded-md bg-black"
+          style={{ height: "calc(100vh - 13.8rem)" }}
+        />
+      )}
+    </div>
+  );
+}
@@ -1,4 +1,11 @@
-import { LineChart, Line, XAxis, YAxis, CartesianGrid } from "recharts";
+import {
+  LineChart,
+  Line,
+  XAxis,
+  YAxis,
+  CartesianGrid,
+  ReferenceLine,
+} from "recharts";
 import {
   Card,
   CardContent,
@@ -141,6 +148,9 @@ export function Performance() {
     //   chartData.reduce((sum, point) => sum + point[processName], 0) /
     //   chartData.length;
     const formatYAxis = (value: number) => `${value} MB`;
+    const restartMarks = timePoints.filter((point) =>
+      point.events?.some((event) => event.process === processName),
+    );
 
     return (
       <Card key={processName}>
@@ -205,6 +215,15 @@ export function Performance() {
                 content={<ChartTooltipContent className="w-[150px]" />}
               />
               {/* <ChartLegend content={<ChartLegendContent />} /> */}
+              {restartMarks.map((point) => (
+                <ReferenceLine
+                  key={point.time}
+                  x={point.time}
+                  stroke="hsl(var(--destructive))"
+                  strokeDasharray="3 3"
+                  label={{ value: "重启", position: "top", fontSize: 10 }}
+                />
+              ))}
 
               <Line
                 dataKey="Java Heap"
@@ -9,41 +9,77 @@ import {
 } from "@/components/ui/table";
 import { Input } from "@/components/ui/input";
 import { Checkbox } from "@/components/ui/checkbox";
+import { formatFileSize } from "@/lib/utils";
+
+interface ProcessRow {
+  pid: number;
+  ppid: number;
+  name: string;
+  uid: number;
+  user: string;
+  state: string;
+  cpu: number;
+  time: string;
+  rss: number;
+  threads: number;
+  startTime: number;
+}
+
+interface ProcessDelta {
+  reset: boolean;
+  added: ProcessRow[];
+  changed: ProcessRow[];
+  removed: number[];
+  total: number;
+  elapsedMs: number;
+}
+
+// 进程表采样间隔（秒）
+const SAMPLE_INTERVAL = 0.5;
 
 export function Process() {
   const [filter, setFilter] = useState("");
   const [showSystemOnly, setShowSystemOnly] = useState(false);
-  const [processes, setProcesses] = useState<any[]>([]);
-
-  let destroyed = false;
+  const [processes, setProcesses] = useState<Map<number, ProcessRow>>(
+    new Map(),
+  );
+  const [elapsedMs, setElapsedMs] = useState(0);
 
   useEffect(() => {
-    const fetchProcesses = async () => {
-      const res = await window.pywebview.api.get_processes();
-      setProcesses(res);
-
-      if (!destroyed) {
-        setTimeout(fetchProcesses, 5000);
-      }
+    if (!window.pywebview) return;
+    if (!window.pywebview.state) {
+      window.pywebview.state = {};
+    }
+    // 后端只推送新增、删除和变化的行
+    window.pywebview.state.onProcessDelta = (delta: ProcessDelta) => {
+      setProcesses((prev) => {
+        const next = delta.reset ? new Map() : new Map(prev);
+        for (const pid of delta.removed) next.delete(pid);
+        for (const row of delta.added) next.set(row.pid, row);
+        for (const row of delta.changed) next.set(row.pid, row);
+        return next;
+      });
+      setElapsedMs(delta.elapsedMs);
     };
-
-    fetchProcesses().then((r) => console.log(r));
+    window.pywebview.api.start_process_monitor(SAMPLE_INTERVAL);
 
     return () => {
-      destroyed = true;
+      window.pywebview.api.stop_process_monitor();
     };
   }, []);
 
   const filteredProcesses = useMemo(() => {
-    return processes.filter((process) => {
-      const matchesFilter = process?.name
-        .toLowerCase()
-        .includes(filter.toLowerCase());
-      if (showSystemOnly) {
-        return matchesFilter && process?.user === "system";
-      }
-      return matchesFilter;
-    });
+    const keyword = filter.toLowerCase();
+    return Array.from(processes.values())
+      .filter((process) => {
+        const matchesFilter = process.name.toLowerCase().includes(keyword);
+        if (showSystemOnly) {
+          // 应用进程的 uid 在 10000 之后
+          return matchesFilter && process.uid % 100000 >= 10000;
+        }
+        return matchesFilter;
+      })
+      .sort((a, b) => b.cpu - a.cpu || a.pid - b.pid);
   }, [processes, filter, showSystemOnly]);
 
   return (
@@ -69,7 +105,7 @@ export function Process() {
           </label>
         </div>
         <div className="text-sm text-muted-foreground">
-          共 {filteredProcesses.length} 个进程
+          共 {filteredProcesses.length} 个进程 · 采样 {elapsedMs}ms
         </div>
       </div>
       <div
@@ -91,9 +127,9 @@ export function Process() {
             {filteredProcesses.map((process) => (
               <TableRow key={process.pid} className={"hover:bg-primary/70"}>
                 <TableCell className="font-medium">{process.name}</TableCell>
-                <TableCell>{process["%cpu"]}</TableCell>
-                <TableCell>{process["time+"]}</TableCell>
-                <TableCell>{process.res}</TableCell>
+                <TableCell>{process.cpu.toFixed(1)}</TableCell>
+                <TableCell>{process.time}</TableCell>
+                <TableCell>{formatFileSize(process.rss)}</TableCell>
                 <TableCell>{process.pid}</TableCell>
                 <TableCell>{process.user}</TableCell>
               </TableRow>
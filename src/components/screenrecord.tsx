@@ -5,6 +5,14 @@ import { Button } from "@/components/ui/button";
 import { Progress } from "@/components/ui/progress";
 import { useToast } from "@/hooks/use-toast";
 
+// 每段录制时长（秒），screenrecord 单次最长 180 秒
+const SEGMENT_SECONDS = 170;
+
+interface RecordingSegmentInfo {
+  segments: number;
+  bytes: number;
+}
+
 export default function Screenrecord() {
   const [isRecording, setIsRecording] = useState(false);
   const [recordingTime, setRecordingTime] = useState(0);
@@ -12,6 +20,10 @@ export default function Screenrecord() {
   const [recordedVideoData, setRecordedVideoData] = useState<string | null>(
     null,
   );
+  const [segmentUrls, setSegmentUrls] = useState<string[]>([]);
+  const [pulledInfo, setPulledInfo] = useState<RecordingSegmentInfo | null>(
+    null,
+  );
   const [isLoading, setIsLoading] = useState(false);
   const videoRef = useRef<HTMLVideoElement>(null);
   const { toast } = useToast();
@@ -20,21 +32,43 @@ export default function Screenrecord() {
     if (isRecording) {
       interval = setInterval(() => {
         setRecordingTime((prev) => prev + 1);
-        setRecordingProgress((prev) => Math.min(prev + 0.5, 100));
       }, 1000);
     }
     return () => clearInterval(interval);
   }, [isRecording]);
 
+  useEffect(() => {
+    // 进度条显示当前分段的录制进度
+    setRecordingProgress(
+      ((recordingTime % SEGMENT_SECONDS) / SEGMENT_SECONDS) * 100,
+    );
+  }, [recordingTime]);
+
+  useEffect(() => {
+    if (window.pywebview) {
+      if (!window.pywebview.state) {
+        window.pywebview.state = {};
+      }
+      window.pywebview.state.onRecordingSegment = (
+        info: RecordingSegmentInfo,
+      ) => {
+        setPulledInfo(info);
+      };
+    }
+  }, []);
+
   const handleStartRecording = async () => {
     setIsLoading(true);
     try {
-      const result = await window.pywebview.api.start_recording();
+      const result =
+        await window.pywebview.api.start_recording(SEGMENT_SECONDS);
       if (result) {
         setIsRecording(true);
         setRecordingTime(0);
         setRecordingProgress(0);
         setRecordedVideoData(null);
+        setSegmentUrls([]);
+        setPulledInfo(null);
         toast({
           title: "记录开始",
         });
@@ -54,11 +88,14 @@ export default function Screenrecord() {
     try {
       setIsRecording(false);
       const result = await window.pywebview.api.stop_recording();
-      if (result && result.videoData) {
-        setRecordedVideoData(result.videoData);
+      if (result && result.videoUrl) {
+        setRecordedVideoData(result.videoUrl);
+        setSegmentUrls(result.segments || []);
         toast({
           title: "记录停止",
-          description: "录制成功完成",
+          description: result.missing?.length
+            ? `${result.missing.length} 个分段未能从设备拉取`
+            : "录制成功完成",
         });
       } else {
         toast({
@@ -82,8 +119,7 @@ export default function Screenrecord() {
     if (recordedVideoData) {
       setIsLoading(true);
       try {
-        const success =
-          await window.pywebview.api.save_recording(recordedVideoData);
+        const success = await window.pywebview.api.save_recording();
         if (success) {
           toast({
             title: "导出成功",
@@ -111,9 +147,17 @@ export default function Screenrecord() {
       <div className="flex flex-col items-center justify-center flex-grow">
         <div className="mb-8 text-center">
           {isRecording ? (
-            <div className="text-2xl text-red-500 animate-pulse">
-              录制: {formatTime(recordingTime)}
-            </div>
+            <>
+              <div className="text-2xl text-red-500 animate-pulse">
+                录制: {formatTime(recordingTime)}
+              </div>
+              {pulledInfo && (
+                <div className="text-sm text-muted-foreground mt-2">
+                  已拉取 {pulledInfo.segments} 段 (
+                  {(pulledInfo.bytes / 1024 / 1024).toFixed(1)} MB)
+                </div>
+              )}
+            </>
           ) : (
             <div className="text-2xl text-muted-foreground">准备录制</div>
           )}
@@ -166,6 +210,20 @@ export default function Screenrecord() {
             </>
           )}
         </div>
+        {segmentUrls.length > 1 && (
+          <div className="flex flex-wrap gap-2 mb-4">
+            {segmentUrls.map((url, index) => (
+              <Button
+                key={url}
+                size="sm"
+                variant={url === recordedVideoData ? "default" : "outline"}
+                onClick={() => setRecordedVideoData(url)}
+              >
+                分段 {index + 1}
+              </Button>
+            ))}
+          </div>
+        )}
         {recordedVideoData && (
           <div className="w-[calc(100vh-7.9rem)]">
             <div className="relative w-full pt-[55%]">
@@ -9,6 +9,13 @@ import {
 } from "lucide-react";
 import { Button } from "@/components/ui/button";
 import { Separator } from "@/components/ui/separator";
+import {
+  Select,
+  SelectContent,
+  SelectItem,
+  SelectTrigger,
+  SelectValue,
+} from "@/components/ui/select";
 import { TransformWrapper, TransformComponent } from "react-zoom-pan-pinch";
 import { cn } from "@/lib/utils";
 import { useToast } from "@/hooks/use-toast";
@@ -18,18 +25,24 @@ interface ScreenshotInfo {
   height: number;
   size: string;
   image: string;
+  format: string;
+  mime: string;
+  latencyMs: number;
 }
 
+const imageFormats = ["png", "jpeg", "webp"] as const;
+
 export function Screenshot() {
   const [screenshot, setScreenshot] = useState<ScreenshotInfo>();
   const [isLoading, setIsLoading] = useState(false);
+  const [imageFormat, setImageFormat] = useState<string>("png");
   const transformComponentRef = useRef(null);
   const { toast } = useToast();
 
   const fetchScreenshot = async () => {
     setIsLoading(true);
     try {
-      const res = await window.pywebview.api.get_screenshot();
+      const res = await window.pywebview.api.get_screenshot(imageFormat, 80);
       setScreenshot(res);
     } catch (error) {
       console.error("刷新屏幕截图时出错:", error);
@@ -39,13 +52,16 @@ export function Screenshot() {
   };
   useEffect(() => {
     fetchScreenshot().then((r) => console.log(r));
-  }, []);
+  }, [imageFormat]);
   const handleSave = async () => {
     if (!screenshot) {
       console.error("没有屏幕截图可供下载");
       return;
     }
-    const res = await window.pywebview.api.save_screenshot(screenshot.image);
+    const res = await window.pywebview.api.save_screenshot(
+      screenshot.image,
+      screenshot.format,
+    );
     if (res) {
       toast({
         description: "屏幕截图已保存",
@@ -122,9 +138,22 @@ export function Screenshot() {
           <Download className="h-4 w-4" />
         </Button>
         <Separator orientation="vertical" className="h-4" />
+        <Select value={imageFormat} onValueChange={setImageFormat}>
+          <SelectTrigger className="h-8 w-[100px]">
+            <SelectValue />
+          </SelectTrigger>
+          <SelectContent>
+            {imageFormats.map((format) => (
+              <SelectItem key={format} value={format}>
+                {format.toUpperCase()}
+              </SelectItem>
+            ))}
+          </SelectContent>
+        </Select>
 
         <div className="ml-auto text-sm text-muted-foreground">
-          {screenshot?.width}x{screenshot?.height} {screenshot?.size} MB
+          {screenshot?.width}x{screenshot?.height} {screenshot?.size} MB{" "}
+          {screenshot?.latencyMs ?? 0} ms
         </div>
       </div>
       <Separator orientation="horizontal" />
@@ -172,7 +201,7 @@ export function Screenshot() {
                 {screenshot && (
                   <img
                     id="image"
-                    src={`data:image/png;base64,${screenshot.image}`}
+                    src={`data:${screenshot.mime ?? "image/png"};base64,${screenshot.image}`}
                     alt=""
                     className={cn(
                       "max-h-full w-auto transition-opacity duration-200",
@@ -9,6 +9,7 @@ import {
   AreaChart,
 } from "recharts";
 import { Button } from "@/components/ui/button";
+import { useAppsStore } from "@/store/apps-store";
 
 interface CPUData {
   time: string;
@@ -20,21 +21,45 @@ interface CPUCoreInfo {
   usage: number;
 }
 
+interface CPUThread {
+  tid: number;
+  name: string;
+  usage: number;
+}
+
+interface FPSSample {
+  time: string;
+  source: "gfxinfo" | "surfaceflinger";
+  fps: number;
+  frames: number;
+  jank: number;
+  p90: number | null;
+  p99: number | null;
+  maxFrameTime: number | null;
+  refreshRate: number;
+  truncated: boolean;
+}
+
+interface CPUSample {
+  time: string;
+  pid: number;
+  total: number;
+  cores: { core: number; usage: number | null; frequency: number | null }[];
+  process: number | null;
+  threads: CPUThread[];
+  threadCount: number;
+}
+
 export function Terminal() {
   const [isRunning, setIsRunning] = useState(true);
   const [cpuData, setCpuData] = useState<CPUData[]>([]);
   const [memoryData, setMemoryData] = useState<CPUData[]>([]);
   const [fpsData, setFpsData] = useState<CPUData[]>([]);
-  const [cpuCores, setCpuCores] = useState<CPUCoreInfo[]>([
-    { frequency: "1804MHz", usage: 15 },
-    { frequency: "1804MHz", usage: 23 },
-    { frequency: "1612MHz", usage: 50 },
-    { frequency: "1804MHz", usage: 31 },
-    { frequency: "710MHz", usage: 4 },
-    { frequency: "710MHz", usage: 4 },
-    { frequency: "710MHz", usage: 0 },
-    { frequency: "844MHz", usage: 0 },
-  ]);
+  const [cpuCores, setCpuCores] = useState<CPUCoreInfo[]>([]);
+  const [processCpu, setProcessCpu] = useState<number | null>(null);
+  const [hotThreads, setHotThreads] = useState<CPUThread[]>([]);
+  const [fpsStats, setFpsStats] = useState<FPSSample | null>(null);
+  const { selectedPackage } = useAppsStore();
 
   const generateTimeString = useCallback(() => {
     const now = new Date();
@@ -43,32 +68,82 @@ export function Terminal() {
 
   const updateData = useCallback(() => {
     const newTime = generateTimeString();
-    const newCpuValue = Math.floor(Math.random() * 30);
     const newMemValue = 35 + Math.random() * 5;
-    const newFpsValue = Math.floor(Math.random() * 60);
-
-    setCpuData((prev) => {
-      const newData = [...prev, { time: newTime, value: newCpuValue }];
-      return newData.slice(-30);
-    });
 
     setMemoryData((prev) => {
       const newData = [...prev, { time: newTime, value: newMemValue }];
       return newData.slice(-30);
     });
+  }, [generateTimeString]);
 
-    setFpsData((prev) => {
-      const newData = [...prev, { time: newTime, value: newFpsValue }];
-      return newData.slice(-30);
-    });
+  // CPU 数据由后端按 /proc 差值采样后批量推送
+  useEffect(() => {
+    if (!isRunning || !window.pywebview) return;
+    if (!window.pywebview.state) {
+      window.pywebview.state = {};
+    }
+    window.pywebview.state.addCpuSamples = (batch: {
+      packageName: string | null;
+      samples: CPUSample[];
+    }) => {
+      if (batch.packageName !== selectedPackage || !batch.samples.length) {
+        return;
+      }
+      const latest = batch.samples[batch.samples.length - 1];
+      setCpuData((prev) =>
+        [
+          ...prev,
+          ...batch.samples.map((sample) => ({
+            time: sample.time,
+            value: sample.total,
+          })),
+        ].slice(-30),
+      );
+      setCpuCores(
+        latest.cores.map((core) => ({
+          frequency:
+            core.frequency !== null ? `${core.frequency}MHz` : "离线",
+          usage: core.usage ?? 0,
+        })),
+      );
+      setProcessCpu(latest.process);
+      setHotThreads(latest.threads);
+    };
+    window.pywebview.api.start_cpu_sampling(selectedPackage, 1000);
+    return () => {
+      window.pywebview.api.stop_cpu_sampling(selectedPackage);
+    };
+  }, [isRunning, selectedPackage]);
 
-    setCpuCores((prev) =>
-      prev.map((core) => ({
-        ...core,
-        usage: Math.floor(Math.random() * 100),
-      })),
-    );
-  }, [generateTimeString]);
+  // 帧率只针对选中的应用采样
+  useEffect(() => {
+    if (!isRunning || !selectedPackage || !window.pywebview) return;
+    if (!window.pywebview.state) {
+      window.pywebview.state = {};
+    }
+    window.pywebview.state.addFpsSamples = (batch: {
+      packageName: string;
+      samples: FPSSample[];
+    }) => {
+      if (batch.packageName !== selectedPackage || !batch.samples.length) {
+        return;
+      }
+      setFpsData((prev) =>
+        [
+          ...prev,
+          ...batch.samples.map((sample) => ({
+            time: sample.time,
+            value: sample.fps,
+          })),
+        ].slice(-30),
+      );
+      setFpsStats(batch.samples[batch.samples.length - 1]);
+    };
+    window.pywebview.api.start_fps_sampling(selectedPackage, 1000);
+    return () => {
+      window.pywebview.api.stop_fps_sampling(selectedPackage);
+    };
+  }, [isRunning, selectedPackage]);
 
   useEffect(() => {
     let interval: NodeJS.Timeout;
@@ -147,8 +222,20 @@ export function Terminal() {
           <div className="text-sm font-medium">CPU</div>
           <div className="text-sm text-green-500">
             {cpuData[cpuData.length - 1]?.value ?? 0}%
+            {selectedPackage &&
+              processCpu !== null &&
+              ` · ${selectedPackage} ${processCpu}%`}
           </div>
         </div>
+        {hotThreads.length > 0 && (
+          <div className="flex flex-wrap gap-x-4 text-xs text-muted-foreground mb-2">
+            {hotThreads.map((thread) => (
+              <span key={thread.tid}>
+                {thread.name}({thread.tid}) {thread.usage}%
+              </span>
+            ))}
+          </div>
+        )}
         <ResponsiveContainer width="100%" height={200}>
           <AreaChart data={cpuData}>
             <defs>
@@ -241,7 +328,15 @@ export function Terminal() {
       {/* FPS */}
       <div className="border rounded-lg p-4 bg-white dark:bg-gray-800">
         <div className="flex justify-between items-center mb-2">
-          <div className="text-sm font-medium dark:text-gray-200">FPS</div>
+          <div className="text-sm font-medium dark:text-gray-200">
+            FPS
+            {fpsStats && (
+              <span className="ml-2 text-xs text-muted-foreground">
+                {fpsStats.source} · 卡顿 {fpsStats.jank} · P90{" "}
+                {fpsStats.p90 ?? "-"}ms · P99 {fpsStats.p99 ?? "-"}ms
+              </span>
+            )}
+          </div>
           <div className="text-sm text-orange-500">
             {fpsData[fpsData.length - 1]?.value ?? 0}
           </div>
@@ -267,7 +362,7 @@ export function Terminal() {
               tick={{ fill: "#94a3b8" }}
             />
             <YAxis
-              domain={[0, 60]}
+              domain={[0, fpsStats?.refreshRate ?? 60]}
               stroke="#94a3b8"
               tick={{ fill: "#94a3b8" }}
             />
@@ -3,12 +3,15 @@ API基类
 """
 import base64
 
-import io
 import os
+import posixpath
 import re
+import shlex
+import shutil
+import sys
 import threading
 from enum import Enum
-from typing import Union
+from typing import Dict, List, Optional, Union
 
 import webview
 import json
@@ -18,7 +21,29 @@ import time
 from adbutils import adb, AdbDevice
 from loguru import logger
 
+from src.core.apkexport import ApkExport, export_entries
+from src.core.bridge import push_state
+from src.core.cpu import CpuMonitor
+from src.core.fps import FpsMonitor
+from src.core.installer import MultiInstaller
+from src.core.listing import ListingCache
+from src.core.logcat import LogcatFilter, LogcatManager
+from src.core.logarchive import LogArchive
+from src.core.logstore import LogStore
 from src.core.memory import MemoryMonitor
+from src.core.mirror import ScreenMirror
+from src.core.packages import PackageIndex, run_bulk
+from src.core.pid import PidCache
+from src.core.preview import TailFollower
+from src.core.process import ProcessMonitor, ProcessSampler
+from src.core.props import PropertySnapshot
+from src.core.recorder import RECORDING_DIR, SEGMENT_SECONDS, ScreenRecorder
+from src.core.search import FileSearch, PathIndex
+from src.core.session import DeviceSession, FleetMonitor, SessionManager
+from src.core.server import LocalServer, serve_file
+from src.core.tracker import DeviceTracker
+from src.core.transfer import DirectoryTransfer
+from src.core import dirsync, preview, screenshot
 
 logger.add(
     "logs/log.log",
@@ -87,11 +112,56 @@ class Api:
 
     def __init__(self):
         self.device: AdbDevice = None
-        self.recording_thread: threading.Thread = None
+        self.recorder: ScreenRecorder = None
         self.is_recording: bool = False
-        self.recording_file: str = None
+        self.recording_files: List[str] = []
+        # 每台设备的连接、缓存与监控
+        self.sessions = SessionManager()
+        self.fleet: FleetMonitor = None
+        self.logcat = LogcatManager()
+        self.server = LocalServer()
+        self.transfers: Dict[str, DirectoryTransfer] = {}
+        self.searches: Dict[str, FileSearch] = {}
+        self.tails: Dict[str, TailFollower] = {}
+        self.installs: Dict[str, MultiInstaller] = {}
+        self.exports: Dict[str, ApkExport] = {}
+        # 设备表由 track-devices 推送维护
+        self.tracker = DeviceTracker(on_event=lambda event: push_state('onDeviceEvent', event),
+                                     on_disconnect=self._on_device_disconnect)
+        self.tracker.start()
         logger.info("API initialized")
 
+    def _session(self) -> DeviceSession:
+        """
+        获取当前设备的会话；当前设备已断开时不重新创建会话
+        """
+        serial = self.device.serial
+        session = self.sessions.find(serial)
+        if session is None:
+            if not self.tracker.is_online(serial):
+                raise RuntimeError(f"设备 {serial} 未连接")
+            session = self.sessions.get(serial)
+        return session
+
+    def _current_session(self) -> Optional[DeviceSession]:
+        """
+        获取当前设备已有的会话，不创建会话；用于停止、统计等在设备断开后也应正常返回的调用
+        """
+        device = self.device
+        return self.sessions.find(device.serial) if device is not None else None
+
+    def _pid_cache(self) -> PidCache:
+        """
+        获取当前设备的 PID 缓存
+        """
+        return self._session().pid_cache
+
+    def _snapshot(self) -> PropertySnapshot:
+        """
+        获取当前设备的属性快照
+        """
+        return self._session().snapshot
+
     def get_pid(self, package_name: str) -> int:
         """
         通过包名获取进程PID
@@ -99,60 +169,53 @@ class Api:
         :return: 进程PID，如果未找到返回0
         """
         try:
-            commands = f'ps -A| grep {package_name}'
-            result = self.device.shell(commands)
-            str_ret = result.split('\n')
-
-            for line in str_ret:
-                if not line:
-                    continue
-
-                parts = [p for p in line.split(' ') if p]
-                if len(parts) >= 9 and parts[8] == package_name:
-                    pid = int(parts[1])
-                    logger.debug(f"Found PID {pid} for package {package_name}")
-                    return pid
-
-            logger.warning(f"No PID found for package {package_name}")
-            return 0
+            pid = self._pid_cache().get_pid(package_name)
+            if pid:
+                logger.debug(f"Found PID {pid} for package {package_name}")
+            else:
+                logger.warning(f"No PID found for package {package_name}")
+            return pid
 
         except Exception as e:
             logger.error(f"Error getting PID for {package_name}: {e}")
             return 0
 
+    def get_package_processes(self, package_name: str) -> list:
+        """
+        获取应用的全部进程（主进程及 :xxx 子进程）
+        :param package_name: 应用包名
+        :return: 进程列表，每项包含 pid、name、startTime
+        """
+        try:
+            return self._pid_cache().get_processes(package_name)
+        except Exception as e:
+            logger.error(f"Error getting processes for {package_name}: {e}")
+            return []
+
     def get_sdk_version(self) -> int:
         """
         获取设备SDK版本
         :return: SDK版本号
         """
         try:
-            sdk_version = self.device.shell("getprop ro.build.version.sdk").strip()
-            version = int(sdk_version)
+            version = self._snapshot().sdk_version
             logger.debug(f"Device SDK version: {version}")
             return version
         except Exception as e:
             logger.error(f"Error getting SDK version: {e}")
             return 0
 
-    @classmethod
-    def get_device_list(cls) -> list:
+    def get_device_list(self) -> list:
         """
-        获取已连接设备列表
+        获取已连接设备列表，读取设备跟踪维护的设备表
         :return:
             设备信息列表，每个设备包含serial、model和name
         """
-        os.system(f"adb root")
         try:
-            device_list = []
-            for d in adb.device_list():
-                device_info = {
-                    'serial': d.serial,
-                    'model': d.prop.model,
-                    'name': d.prop.name
-                }
-                device_list.append(device_info)
-
-            logger.info(f"Found {len(device_list)} connected devices")
+            # 启动后首次调用时等待 track-devices 的首批推送
+            self.tracker.wait_ready()
+            device_list = [{'serial': device['serial'], 'model': device['model'], 'name': device['name']}
+                           for device in self.tracker.list()]
             logger.debug(f"Device list: {device_list}")
             return device_list
 
@@ -160,6 +223,33 @@ class Api:
             logger.error(f"Error getting device list: {e}")
             return []
 
+    def _on_device_disconnect(self, serial: str):
+        """
+        设备断开（或变为 offline、unauthorized）时关闭其会话，停止该设备上的采样与后台任务；
+        在设备跟踪线程中调用，不修改 self.device，当前设备由前端收到断开事件后重新选择
+        """
+        if self.fleet is not None:
+            self.fleet.remove(serial)
+        self.logcat.stop(serial)
+        self.server.unroute(f"/mirror/{serial}")
+        self.sessions.close(serial)
+        if self.is_recording and self.recorder is not None and self.recorder.device.serial == serial:
+            # 不再向设备发送命令，已拉取的分段在 stop_recording 时返回
+            self.recorder.abort()
+        for key, follower in list(self.tails.items()):
+            if follower.device.serial == serial:
+                follower.stop()
+                self.tails.pop(key, None)
+        for transfer in list(self.transfers.values()):
+            if transfer.device.serial == serial:
+                transfer.cancel()
+        for search in list(self.searches.values()):
+            if search.device.serial == serial:
+                search.cancel()
+        for export in list(self.exports.values()):
+            if export.device.serial == serial:
+                export.cancel()
+
     def device_info(self, serial: str) -> dict:
         """
         获取设备详细信息
@@ -172,49 +262,9 @@ class Api:
             return {}
 
         try:
-            self.device = adb.device(serial)
-            device_info = {}
-
-            # Basic info
-            device_info.update({
-                'kernelVersion': self.device.shell('uname -r').strip(),
-                'fontScale': self.device.shell('settings get system font_scale').strip(),
-                'name': self.device.prop.name,
-                'model': self.device.prop.model,
-                'brand': self.device.shell('getprop ro.product.brand').strip(),
-                'serialNum': self.device.shell('getprop ro.serialno').strip(),
-                'androidVersion': self.device.shell('getprop ro.build.version.release').strip(),
-                'processor': self.device.shell('getprop ro.product.board').strip(),
-                'abi': self.device.shell('getprop ro.product.cpu.abi').strip()
-            })
-
-            # Network info
-            output = self.device.shell('ip addr show wlan0')
-            mac_match = re.search(r'link/ether ([0-9a-fA-F:]+) brd', output)
-            ip_match = re.search(r'inet (\d+\.\d+\.\d+\.\d+)/\d+', output)
-
-            device_info.update({
-                'ipAddress': ip_match.group(1) if ip_match else None,
-                'macAddress': mac_match.group(1) if mac_match else None
-            })
-
-            # Memory info
-            meminfo = self.device.shell('cat /proc/meminfo')
-            mem_total = re.search(r'MemTotal:\s+(.+)', meminfo)
-            mem_available = re.search(r'MemAvailable:\s+(.+)', meminfo)
-
-            device_info.update({
-                'memTotal': mem_total.group(1) if mem_total else None,
-                'memFree': mem_available.group(1) if mem_available else None
-            })
-
-            # Screen info
-            size = self.device.shell('wm size').split(': ')[1].strip()
-            density = self.device.shell('wm density').split(': ')[1].strip()
-            device_info.update({
-                'physicalResolution': f"{size} ({density}dpi)",
-                'resolution': size
-            })
+            # 选择当前设备，连接与缓存复用该设备的会话
+            self.device = self.sessions.get(serial).device
+            device_info = self._snapshot().device_info()
 
             logger.info(f"Got device info for {serial}")
             logger.debug(f"Device info: {device_info}")
@@ -224,6 +274,12 @@ class Api:
             logger.error(f"Error getting device info: {e}")
             return {}
 
+    def _package_index(self) -> PackageIndex:
+        """
+        获取当前设备的应用索引
+        """
+        return self._session().package_index
+
     def get_packages(self, system: bool = True) -> list:
         """
         获取设备上安装的应用包列表
@@ -232,86 +288,96 @@ class Api:
             包含应用信息的列表，每个应用包含name、packageName和id
         """
         try:
-            command = 'pm list packages' if system else 'pm list packages -3'
-            packages = self.device.shell(command)
-            trimmed_result = packages.strip()
-
-            if not trimmed_result:
+            index = self._package_index()
+            index.refresh()
+            packages = index.query(system=system)['packages']
+            if not packages:
                 logger.warning("No packages found")
                 return []
 
-            lines = trimmed_result.split('\n')
             processed_lines = [
                 {
-                    'name': line[8:],
-                    'packageName': line[8:],
+                    **package,
+                    'name': package['packageName'],
                     'id': i
                 }
-                for i, line in enumerate(lines)
+                for i, package in enumerate(packages)
             ]
 
             logger.info(f"Found {len(processed_lines)} packages")
-            logger.debug(f"Package list: {processed_lines}")
             return processed_lines
 
         except Exception as e:
             logger.error(f"Error getting package list: {e}")
             return []
 
-    def get_processes(self):
+    def query_packages(self, search: str = "", system: bool = True, sort: str = "packageName",
+                       reverse: bool = False, offset: int = 0, limit: int = 0, refresh: bool = False) -> dict:
         """
-        获取进程
-        :return:
+        查询应用索引，支持搜索、排序与分页
+        :param search: 包名或版本号子串
+        :param system: 是否包含系统应用
+        :param sort: 排序字段 packageName / versionName / installTime / updateTime / codeSize / dataSize / totalSize
+        :param reverse: 是否倒序
+        :param offset: 起始位置
+        :param limit: 条数，0 表示全部
+        :param refresh: 是否立即增量刷新
+        :return: 包含 total 与 packages 的字典，失败时为空字典
         """
-        columns = ['pid', '%cpu', 'time+', 'res', 'user', 'name', 'args']
-        command = ''.join(f" -o {column}" for column in columns)
-        logger.debug("top -b -n 1 " + command)
-        result = self.device.shell("top -b -n 1 " + command)
-        lines = result.split('\n')
-        start = -1
-        for i in range(len(lines)):
-            if lines[i].strip().startswith('PID'):
-                start = i + 1
-                break
-
-        if start < 0:
-            result = self.device.shell('top -b -n 1')
-            lines = result.split('\n')
-            for i, line in enumerate(lines):
-                line = line.strip()
-                if line.startswith('PID'):
-                    columns = re.split(r'\s+', line)
-                    columns = [col.lower() for col in columns]
-                    columns = [
-                        '%cpu' if col == 'cpu%' else
-                        'user' if col == 'uid' else
-                        'res' if col == 'rss' else
-                        col for col in columns
-                    ]
-                    start = i + 1
-                    break
-        lines = lines[start:]
-        processes = []
-
-        for line in lines:
-            line = line.strip()
-            if not line:
-                continue
-            parts = line.split()
-            process = {}
-
-            for index, column in enumerate(columns):
-                if column == 'args':
-                    process[column] = ' '.join(parts[index:])
-                else:
-                    process[column] = parts[index] if index < len(parts) else ''
-
-            if command and process.get('args') == command:
-                continue
-
-            processes.append(process)
-        logger.debug(processes)
-        return processes
+        try:
+            index = self._package_index()
+            index.refresh(force=refresh)
+            return index.query(search, system, sort, reverse, offset, limit)
+        except Exception as e:
+            logger.error(f"查询应用失败: {e}")
+            return {}
+
+    def _process_sampler(self) -> ProcessSampler:
+        """
+        获取当前设备的进程表采样器
+        """
+        return self._session().process_sampler
+
+    def get_processes(self) -> list:
+        """
+        获取进程表，CPU% 为与上次采样之间的平均值，首次调用为 0；进程监控运行时直接返回其最新一次的进程表
+        :return: 进程列表
+        """
+        try:
+            session = self._session()
+            if session.process_monitor is not None and session.process_monitor.is_alive():
+                # 监控线程依赖采样器的增量基线，这里再采样会吞掉下一次推送的变化
+                return session.process_sampler.table()
+            sampler = session.process_snapshot
+            sampler.sample()
+            return sampler.table()
+        except Exception as e:
+            logger.error(f"获取进程失败: {e}")
+            return []
+
+    def start_process_monitor(self, interval: float = 1.0) -> bool:
+        """
+        开始按间隔采样进程表，通过 onProcessDelta 推送新增、删除与变化的进程，首次推送为完整进程表
+        :param interval: 采样间隔（秒）
+        """
+        try:
+            self.stop_process_monitor()
+            monitor = ProcessMonitor(self._process_sampler(),
+                                     lambda delta: push_state('onProcessDelta', delta), interval)
+            monitor.start()
+            self._session().process_monitor = monitor
+            return True
+        except Exception as e:
+            logger.error(f"启动进程监控失败: {e}")
+            return False
+
+    def stop_process_monitor(self) -> bool:
+        # 进程视图同一时间只显示一台设备，切换设备后旧设备的监控也需要停止
+        for session in list(self.sessions.sessions.values()):
+            if session.process_monitor is not None:
+                session.process_monitor.stop()
+                session.process_monitor = None
+        return True
 
     def install_package(self):
         """
@@ -324,6 +390,45 @@ class Api:
         if not filename:
             return False
         self.device.install(filename[0], nolaunch=True)
+        self._package_index().invalidate()
+        return True
+
+    def install_packages(self, serials: List[str] = None, split: bool = False, workers: int = 8) -> dict:
+        """
+        在多台设备上并行安装 apk，进度通过 onInstallProgress 推送
+        :param serials: 目标设备序列号，为空时为当前设备
+        :param split: 所选 apk 是否为同一应用的拆分包
+        :param workers: 同时安装的设备数
+        :return: 各设备的安装结果，取消选择或失败时为空字典
+        """
+        try:
+            filenames = webview.windows[0].create_file_dialog(webview.OPEN_DIALOG, allow_multiple=True,
+                                                              file_types=('APK Files(*.apk)',))
+            if not filenames:
+                logger.info("Install cancelled by user")
+                return {}
+            serials = serials or [self.device.serial]
+            installer = MultiInstaller([self.sessions.get(serial).device for serial in serials], list(filenames), split=split,
+                                       workers=workers,
+                                       on_progress=lambda progress: push_state('onInstallProgress', progress))
+            self.installs[installer.id] = installer
+            try:
+                return installer.install()
+            finally:
+                self.installs.pop(installer.id, None)
+                for serial in serials:
+                    self.sessions.get(serial).package_index.invalidate()
+        except Exception as e:
+            logger.error(f"批量安装失败: {e}")
+            return {}
+
+    def cancel_install(self, install_id: str = None) -> bool:
+        """
+        取消批量安装，未指定 id 时取消全部
+        """
+        for key, installer in list(self.installs.items()):
+            if install_id is None or key == install_id:
+                installer.cancel()
         return True
 
     def uninstall_package(self, package_name):
@@ -333,24 +438,49 @@ class Api:
         :return:
         """
         self.device.uninstall(package_name)
+        self._package_index().invalidate()
         return True
 
-    def pull_apk(self, package_name):
+    def pull_apk(self, package_name: str, include_obb: bool = False) -> Union[bool, dict]:
         """
-        导出apk包
-        :param package_name:
-        :return:
+        导出应用，拆分包的全部 APK（及可选的 OBB）并行读取并直接写入 .apks 压缩包，进度通过 onExportProgress 推送，
+        可通过 cancel_apk_export 取消
+        :param package_name: 包名
+        :param include_obb: 是否包含 /sdcard/Android/obb 下的数据
+        :return: 成功时返回导出结果，失败或取消时返回False
         """
-        apk_path = self.device.shell(f'pm path {package_name}').strip().split(':')[-1]
-        if not apk_path:
-            logger.error(f"未找到包名为 {package_name} 的 APK")
-            return False
-        filename = webview.windows[0].create_file_dialog(webview.SAVE_DIALOG, save_filename=f"{package_name}.apk",
-                                                         file_types=('APK Files(*.apk)',))
-        logger.debug(f"apk_path: {apk_path}  filename: {filename}")
-        if not filename:
+        try:
+            entries = export_entries(self.device, package_name, include_obb)
+            if not entries:
+                logger.error(f"未找到包名为 {package_name} 的 APK")
+                return False
+            export = ApkExport(self.device, entries,
+                               on_progress=lambda progress: push_state('onExportProgress', progress))
+            if export.is_archive:
+                save_filename, file_types = f"{package_name}.apks", ('APKS Files(*.apks;*.zip)',)
+            else:
+                save_filename, file_types = f"{package_name}.apk", ('APK Files(*.apk)',)
+            filename = webview.windows[0].create_file_dialog(webview.SAVE_DIALOG, save_filename=save_filename,
+                                                             file_types=file_types)
+            logger.debug(f"apk entries: {entries}  filename: {filename}")
+            if not filename:
+                return False
+            self.exports[export.id] = export
+            try:
+                return export.save(filename)
+            finally:
+                self.exports.pop(export.id, None)
+        except Exception as e:
+            logger.error(f"导出 {package_name} 失败: {e}")
             return False
-        self.device.sync.pull_file(apk_path, filename)
+
+    def cancel_apk_export(self, export_id: str = None) -> bool:
+        """
+        取消应用导出，未指定 id 时取消全部
+        """
+        for key, export in list(self.exports.items()):
+            if export_id is None or key == export_id:
+                export.cancel()
         return True
 
     def clear_package(self, package_name):
@@ -367,33 +497,50 @@ class Api:
 
     def disable_package(self, package_name):
         self.device.shell(f'pm disable-user {package_name}')
+        self._package_index().invalidate()
         return True
 
     def enable_package(self, package_name):
         self.device.shell(f'pm enable {package_name}')
+        self._package_index().invalidate()
         return True
 
-    def get_screenshot(self) -> dict:
+    def bulk_package_action(self, packages: List[str], actions: List[str], channels: int = 1) -> dict:
+        """
+        批量执行应用操作，所有操作合并为一次 shell 调用
+        :param packages: 包名列表
+        :param actions: 依次对每个包执行的操作：start / stop / clear / disable / enable / uninstall
+        :param channels: 并行的 shell 通道数
+        :return: 包含每个包每个操作的结果与耗时的字典，失败时为空字典
+        """
+        try:
+            result = run_bulk(self.device, packages, actions, channels)
+            if any(action in ('disable', 'enable', 'uninstall') for action in actions):
+                self._package_index().invalidate()
+            return result
+        except Exception as e:
+            logger.error(f"批量操作应用失败: {e}")
+            return {}
+
+    def get_screenshot(self, image_format: str = 'png', quality: int = 80) -> dict:
         """
         截取屏幕
-        :return: image 包含图片base64数据、宽度、高度和大小的字典
-        """
-        try:
-            pil_image = self.device.screenshot()
-            with io.BytesIO() as buffered:
-                pil_image.save(buffered, format="PNG")
-                img_byte = buffered.getvalue()
-                img_str = base64.b64encode(img_byte).decode('utf-8')
-                width, height = pil_image.size
-                file_size = round(len(img_byte) / 1024 / 1024, 2)
-                data = {
-                    'image': img_str,
-                    'width': width,
-                    'height': height,
-                    'size': file_size
-                }
-                logger.info(f"Screenshot captured: {width}x{height}, {file_size}MB")
-                return data
+        :param image_format: 输出格式 png / jpeg / webp
+        :param quality: JPEG / WebP 质量
+        :return: image 包含图片base64数据、宽度、高度、大小、格式与耗时的字典
+        """
+        try:
+            shot = screenshot.capture(self.device, image_format, quality)
+            img_byte = shot.pop('data')
+            file_size = round(len(img_byte) / 1024 / 1024, 2)
+            data = {
+                'image': base64.b64encode(img_byte).decode('utf-8'),
+                'size': file_size,
+                **shot
+            }
+            logger.info(f"Screenshot captured: {shot['width']}x{shot['height']}, {file_size}MB, "
+                        f"{shot['format']}, {shot['latencyMs']}ms")
+            return data
 
         except Exception as e:
             logger.error(f"Error taking screenshot: {e}")
@@ -405,15 +552,18 @@ class Api:
             }
 
     @classmethod
-    def save_screenshot(cls, base64_data):
+    def save_screenshot(cls, base64_data, image_format: str = 'png'):
         """
         保存截图
         :param base64_data: base64编码的图片数据
+        :param image_format: 图片格式 png / jpeg / webp
         :return: bool
         """
         try:
-            filename = webview.windows[0].create_file_dialog(webview.SAVE_DIALOG, save_filename=f"screenshot.png",
-                                                             file_types=('PNG Files(*.png)',))
+            extension = 'jpg' if image_format == 'jpeg' else image_format
+            filename = webview.windows[0].create_file_dialog(
+                webview.SAVE_DIALOG, save_filename=f"screenshot.{extension}",
+                file_types=(f'{extension.upper()} Files(*.{extension})',))
             if not filename:
                 return False
 
@@ -472,43 +622,393 @@ class Api:
         :param package_name:
         :return:
         """
-        return MemoryMonitor(self.device).get_mem_info(self.get_pid(package_name), 24, package_name)
+        monitor = MemoryMonitor(self.device, self._snapshot())
+        return monitor.get_mem_info(self.get_pid(package_name), package_name=package_name)
 
-    @set_interval(0.5)
-    def update_logcat(self):
+    def start_memory_sampling(self, package_name: str, interval: int = 1000) -> bool:
+        """
+        启动后台内存采样，采样结果通过 addMemorySamples 批量推送到前端
+        :param package_name: 应用包名
+        :param interval: 采样间隔，单位毫秒
+        :return: 是否启动成功
+        """
         try:
             if self.device is None:
+                logger.error("No device selected")
                 return False
-            self.device.shell("logcat --clear")
 
-            if len(webview.windows) > 0:
-                stream = self.device.shell("logcat", stream=True)
-                with stream:
-                    f = stream.conn.makefile()
-                    while True:
-                        line = f.readline().strip()
-                        if not line:
-                            continue
-                        try:
-                            parts = line.split(None, 5)
-                            if len(parts) >= 6:
-                                date, time, pid, tid, level, message = parts
-                                log_entry = {
-                                    'timestamp': f"{date} {time}",
-                                    'processId': f"{pid}-{tid}",
-                                    'level': level[0],  # level (I/D/W/E/V)
-                                    'message': message,
-                                    'component': message.split(':', 1)[0] if ':' in message else 'unknown',
-                                    'package': 'system'
-                                }
-                                logger.debug(f"log_entry: {log_entry}")
-                                js_code = f'window.pywebview.state && window.pywebview.state.addLogEntry({json.dumps(log_entry)})'
-                                webview.windows[0].evaluate_js(js_code)
-                        except Exception as e:
-                            logger.error(f"解析 logcat 行时出错: {e}")
-                            continue
+            monitor = MemoryMonitor(self.device, self._snapshot())
+            pid_cache = self._pid_cache()
+            events = []
+            with_millis = interval < 1000
+
+            def on_process_event(event):
+                if event['package'] == package_name:
+                    events.append(event)
+
+            def sample():
+                # PID 由缓存解析，只在进程退出或重启时重新查找
+                pid = pid_cache.get_pid(package_name)
+                processes = monitor.get_mem_info(pid, package_name=package_name)
+                restarts = [events.pop(0) for _ in range(len(events))]
+                if not processes and not restarts:
+                    return None
+                now = time.time()
+                time_string = time.strftime("%H:%M:%S", time.localtime(now))
+                if with_millis:
+                    time_string += f".{int(now * 1000) % 1000:03d}"
+                return {'time': time_string, 'pid': pid, 'processes': processes or {}, 'events': restarts}
+
+            def on_batch(name, samples, stats):
+                push_state('addMemorySamples', {'packageName': name, 'samples': samples, 'stats': stats})
+
+            pid_cache.add_listener(on_process_event)
+            task = self._session().sampler.start(package_name, sample, on_batch, interval / 1000)
+            task.on_stop = lambda: pid_cache.remove_listener(on_process_event)
+            return True
+        except Exception as e:
+            logger.error(f"启动内存采样失败: {e}")
+            return False
+
+    def start_cpu_sampling(self, package_name: str = None, interval: int = 1000) -> bool:
+        """
+        启动后台 CPU 采样，整机、各核心（含频率）、进程及占用最高的线程的使用率通过 addCpuSamples 批量推送到前端
+        :param package_name: 应用包名，为空时只采样整机与各核心
+        :param interval: 采样间隔，单位毫秒
+        :return: 是否启动成功
+        """
+        try:
+            if self.device is None:
+                logger.error("No device selected")
+                return False
+
+            monitor = CpuMonitor(self.device, self._snapshot())
+            pid_cache = self._pid_cache()
+            with_millis = interval < 1000
+            name = f"cpu:{package_name or ''}"
+
+            def sample():
+                pid = pid_cache.get_pid(package_name) if package_name else 0
+                data = monitor.sample(pid)
+                if data['total'] is None:
+                    # 首次采样只作为基准
+                    return None
+                now = time.time()
+                time_string = time.strftime("%H:%M:%S", time.localtime(now))
+                if with_millis:
+                    time_string += f".{int(now * 1000) % 1000:03d}"
+                data.update({'time': time_string, 'pid': pid})
+                return data
+
+            def on_batch(_, samples, stats):
+                push_state('addCpuSamples', {'packageName': package_name, 'samples': samples, 'stats': stats})
+
+            self._session().sampler.start(name, sample, on_batch, interval / 1000)
+            return True
+        except Exception as e:
+            logger.error(f"启动 CPU 采样失败: {e}")
+            return False
+
+    def stop_cpu_sampling(self, package_name: str = None) -> bool:
+        """
+        停止后台 CPU 采样
+        :param package_name: 启动时的包名
+        :return: 是否有采样被停止
+        """
+        session = self._current_session()
+        if session is None:
+            return False
+        return session.sampler.stop(f"cpu:{package_name or ''}")
+
+    def start_fps_sampling(self, package_name: str, interval: int = 1000, mode: str = "auto") -> bool:
+        """
+        启动后台帧率采样，每个窗口的 FPS、卡顿帧数与 P90/P99 帧耗时通过 addFpsSamples 批量推送到前端
+        :param package_name: 应用包名
+        :param interval: 采样间隔，单位毫秒
+        :param mode: gfxinfo / surfaceflinger / auto
+        :return: 是否启动成功
+        """
+        try:
+            if self.device is None or not package_name:
+                logger.error("No device or package selected")
+                return False
+
+            monitor = FpsMonitor(self.device, package_name, mode, self._snapshot())
+            with_millis = interval < 1000
+
+            def sample():
+                data = monitor.sample()
+                if data['fps'] is None:
+                    # 首次采样只作为基准
+                    return None
+                now = time.time()
+                time_string = time.strftime("%H:%M:%S", time.localtime(now))
+                if with_millis:
+                    time_string += f".{int(now * 1000) % 1000:03d}"
+                data['time'] = time_string
+                return data
+
+            def on_batch(_, samples, stats):
+                push_state('addFpsSamples', {'packageName': package_name, 'samples': samples, 'stats': stats})
+
+            self._session().sampler.start(f"fps:{package_name}", sample, on_batch, interval / 1000)
+            return True
+        except Exception as e:
+            logger.error(f"启动帧率采样失败: {e}")
+            return False
+
+    def stop_fps_sampling(self, package_name: str) -> bool:
+        """
+        停止后台帧率采样
+        :param package_name: 应用包名
+        :return: 是否有采样被停止
+        """
+        session = self._current_session()
+        if session is None:
+            return False
+        return session.sampler.stop(f"fps:{package_name}")
+
+    def stop_memory_sampling(self, package_name: str = None) -> bool:
+        """
+        停止后台内存采样
+        :param package_name: 应用包名，为空时停止所有设备的全部采样
+        :return: 是否有采样被停止
+        """
+        if package_name is None:
+            stopped = [session.sampler.stop() for session in list(self.sessions.sessions.values())]
+            return any(stopped)
+        session = self._current_session()
+        if session is None:
+            return False
+        return session.sampler.stop(package_name)
+
+    def set_sampling_interval(self, package_name: str, interval: int) -> bool:
+        """
+        修改采样间隔
+        :param package_name: 应用包名
+        :param interval: 采样间隔，单位毫秒
+        :return: 是否修改成功
+        """
+        session = self._current_session()
+        if session is None:
+            return False
+        return session.sampler.set_interval(package_name, interval / 1000)
+
+    def get_devices_info(self, serials: List[str]) -> dict:
+        """
+        并行获取多台设备的信息，不改变当前设备
+        :param serials: 序列号列表
+        :return: {序列号: {'result': 设备信息} 或 {'error': 错误}}
+        """
+        return self.sessions.run(serials, lambda session: session.snapshot.device_info())
+
+    def start_fleet_monitoring(self, serials: List[str], metrics: List[str] = None, package_name: str = None,
+                               interval: int = 1000) -> bool:
+        """
+        同时监控多台设备，采样结果按序列号通过 addFleetSamples 推送，错误日志通过 addFleetLogEntries 推送；
+        单台设备缓慢或掉线时只跳过该设备的采样
+        :param serials: 序列号列表
+        :param metrics: cpu / memory / fps / logcat，默认 cpu 与 memory
+        :param package_name: 应用包名，为空时采样整机指标
+        :param interval: 采样间隔，单位毫秒
+        :return: 是否启动成功
+        """
+        try:
+            self.stop_fleet_monitoring()
+            self.fleet = FleetMonitor(
+                self.sessions, serials, metrics or ['cpu', 'memory'], package_name,
+                on_batch=lambda batch, stats: push_state('addFleetSamples', batch, stats),
+                on_logs=lambda serial, entries, stats: push_state('addFleetLogEntries', serial, entries, stats),
+                interval=interval / 1000)
+            self.fleet.start()
+            logger.info(f"Fleet monitoring started: {serials}, {metrics}, {package_name}")
+            return True
+        except Exception as e:
+            logger.error(f"启动多设备监控失败: {e}")
+            return False
+
+    def stop_fleet_monitoring(self) -> bool:
+        """
+        停止多设备监控
+        """
+        if self.fleet is None:
+            return False
+        self.fleet.stop()
+        self.fleet = None
+        return True
+
+    def update_logcat(self, filters: dict = None, binary: bool = False, persist: bool = False) -> bool:
+        """
+        启动当前设备的 logcat 读取，日志通过 addLogEntries 批量推送到前端；
+        每台设备只会有一个读取线程，过滤条件不变时重复调用直接返回
+        :param filters: 过滤条件，包含 level、tags、package、pid、uid、regex，会下推到设备端 logcat 命令
+        :param binary: 是否使用 logcat -B 二进制格式读取
+        :param persist: 是否同时写入磁盘归档
+        :return: 是否启动成功
+        """
+        try:
+            if self.device is None:
+                return False
+
+            filters = dict(filters or {})
+            package_name = filters.get('package')
+            pid_cache = None
+            if package_name and not filters.get('pid'):
+                filters['pid'] = self.get_pid(package_name) or None
+                if filters['pid'] is None and filters.get('uid') is None:
+                    filters['uid'] = self.get_package_uid(package_name)
+                elif filters['pid'] is not None:
+                    # 由包名解析的 pid 在应用重启后失效，由读取管道跟随进程重启事件更新
+                    pid_cache = self._pid_cache()
+
+            def on_batch(entries, stats):
+                push_state('addLogEntries', entries, stats)
+
+            store = self._log_store()
+            archive = self._log_archive() if persist else None
+
+            def sink(entry):
+                store.append(entry)
+                if archive is not None:
+                    archive.write(entry)
+
+            self.logcat.start(self.device, on_batch, LogcatFilter.from_dict(filters), binary, sink=sink,
+                              pid_cache=pid_cache)
+            return True
         except Exception as e:
             logger.error(f"获取 logcat 日志失败: {e}")
+            return False
+
+    def get_package_uid(self, package_name: str) -> Union[int, None]:
+        """
+        获取应用的 uid
+        :param package_name: 应用包名
+        :return: uid，未找到时返回 None
+        """
+        output = self.device.shell(f'pm list packages -U {shlex.quote(package_name)}')
+        for line in output.splitlines():
+            match = re.match(r'package:(\S+) uid:(\d+)', line.strip())
+            if match and match.group(1) == package_name:
+                return int(match.group(2))
+        return None
+
+    def clear_logcat(self) -> bool:
+        """
+        清空设备的 logcat 缓冲区和本地日志库，只在用户明确操作时调用；正在运行的读取管道不受影响
+        """
+        try:
+            if self.device is None:
+                return False
+            self.device.shell("logcat --clear")
+            self._log_store().clear()
+            return True
+        except Exception as e:
+            logger.error(f"清空 logcat 日志失败: {e}")
+            return False
+
+    def stop_logcat(self) -> bool:
+        """
+        停止当前设备的 logcat 读取
+        """
+        session = self._current_session()
+        if session is None:
+            return False
+        stopped = self.logcat.stop(session.serial)
+        session.flush_log_archive()
+        return stopped
+
+    def _log_archive(self) -> LogArchive:
+        """
+        获取当前设备的日志归档
+        """
+        return self._session().log_archive
+
+    def get_logs_around(self, timestamp, window: float = 30) -> list:
+        """
+        从磁盘归档读取某一时刻前后的日志
+        :param timestamp: 时间戳或 "HH:MM:SS" / "YYYY-MM-DD HH:MM:SS"
+        :param window: 前后秒数
+        :return: 日志列表
+        """
+        try:
+            if self.device is None:
+                return []
+            return self._log_archive().read_around(timestamp, window)
+        except Exception as e:
+            logger.error(f"读取归档日志失败: {e}")
+            return []
+
+    def export_logs(self, start, end) -> bool:
+        """
+        导出时间范围内的归档日志
+        :param start: 开始时间
+        :param end: 结束时间
+        :return: 是否导出成功
+        """
+        try:
+            if self.device is None:
+                return False
+            save_path = webview.windows[0].create_file_dialog(
+                webview.SAVE_DIALOG,
+                save_filename=f"logcat_{time.strftime('%Y%m%d_%H%M%S')}.txt",
+                file_types=('Text Files (*.txt)',)
+            )
+            if not save_path:
+                logger.info("Export cancelled by user")
+                return False
+            self._log_archive().export(start, end, save_path)
+            return True
+        except Exception as e:
+            logger.error(f"导出日志失败: {e}")
+            return False
+
+    def _log_store(self) -> LogStore:
+        """
+        获取当前设备的日志库
+        """
+        return self._session().log_store
+
+    def query_logs(self, log_filter: dict = None, offset: int = 0, limit: int = 100) -> dict:
+        """
+        分页查询当前设备已采集的日志
+        :param log_filter: 过滤条件：level、minLevel、tag、pid、package、text、start、end、reverse
+        :param offset: 偏移
+        :param limit: 每页条数
+        :return: {'total': 命中总数, 'exact': total 是否精确, 'more': 之后是否还有日志, 'offset': offset, 'rows': 当前页日志}
+        """
+        try:
+            if self.device is None:
+                return {'total': 0, 'offset': offset, 'rows': []}
+            return self._log_store().query(log_filter, offset, limit)
+        except Exception as e:
+            logger.error(f"查询日志失败: {e}")
+            return {'total': 0, 'offset': offset, 'rows': []}
+
+    def clear_logs(self) -> bool:
+        """
+        清空当前设备已采集的日志
+        """
+        if self.device is None:
+            return False
+        self._log_store().clear()
+        return True
+
+    def get_logcat_stats(self) -> dict:
+        """
+        获取 logcat 管道的接收、推送与丢弃计数
+        """
+        session = self._current_session()
+        if session is None:
+            return {}
+        stats = self.logcat.stats(session.serial)
+        stats['store'] = session.log_store.stats()
+        return stats
+
+    def _listing_cache(self) -> ListingCache:
+        """
+        获取当前设备的目录列表缓存
+        """
+        return self._session().listing_cache
 
     def list_files(self, path="/"):
         """
@@ -517,31 +1017,121 @@ class Api:
         :return:
         """
         try:
-            files_and_dir = self.device.sync.list(path)
-            if not files_and_dir:
-                return []
-            logger.debug(f"获取文件列表: {files_and_dir}")
-            entries = []
-            for file_or_dir in files_and_dir:
-                if file_or_dir.path in ('.', '..'):
-                    continue
-                full_path = os.path.join(path, file_or_dir.path).replace(os.sep, '/')
-                entry = {
-                    'name': file_or_dir.path,
-                    'path': full_path,
-                    'size': file_or_dir.size,
-                    'is_dir': file_or_dir.mode == 16889 or file_or_dir.mode == 16888 or file_or_dir.mode == 41380 or file_or_dir.mode == 16877,
-                    'permissions': "未知",
-                    'owner': "未知",
-                    'group': "未知",
-                    'modified': file_or_dir.mtime.strftime("%Y-%m-%d %H:%M:%S")
-                }
-                entries.append(entry)
-            return sorted(entries, key=lambda x: (not x['is_dir'], x['name'].lower()))
+            return self._listing_cache().page(path, limit=sys.maxsize)['entries']
         except Exception as e:
             logger.error(f"获取文件列表失败: {e}")
             return []
 
+    def list_files_page(self, path: str = "/", cursor: int = 0, limit: int = 500, refresh: bool = False) -> dict:
+        """
+        分页获取文件列表，目录未变化时使用缓存
+        :param path: 目录
+        :param cursor: 上一页返回的游标，首页为 0
+        :param limit: 每页条数
+        :param refresh: 是否忽略缓存
+        :return: 包含 entries、cursor、total 的字典，失败时为空字典
+        """
+        try:
+            return self._listing_cache().page(path, cursor, limit, refresh)
+        except Exception as e:
+            logger.error(f"获取文件列表失败: {e}")
+            return {}
+
+    def search_files(self, root: str = "/sdcard", pattern: str = "", use_index: bool = False,
+                     limit: int = 5000) -> dict:
+        """
+        按文件名搜索设备文件
+        使用索引时在本地索引中搜索并直接返回结果；否则在设备上运行 find，结果通过 onSearchResults 分批推送
+        :param root: 搜索的根目录
+        :param pattern: 文件名模式，支持 * ? 通配符，不含通配符时按子串匹配
+        :param use_index: 是否使用本地路径索引
+        :param limit: 最多返回的结果数
+        :return: 包含搜索 id 的字典，使用索引时附带结果，失败时为空字典
+        """
+        try:
+            if not pattern:
+                return {}
+            if use_index:
+                started = time.perf_counter()
+                index = self._session().path_index(root)
+                index.ensure_fresh()
+                results = index.search(pattern, limit)
+                return {
+                    'id': None,
+                    'results': results,
+                    'total': len(results),
+                    'done': True,
+                    'index': index.stats(),
+                    'elapsedMs': round((time.perf_counter() - started) * 1000, 1),
+                }
+
+            def on_results(batch: dict):
+                push_state('onSearchResults', batch)
+                if batch['done']:
+                    self.searches.pop(batch['id'], None)
+
+            search = FileSearch(self.device, root, pattern, on_results, limit=limit)
+            self.searches[search.id] = search
+            search.start()
+            return {'id': search.id}
+
+        except Exception as e:
+            logger.error(f"搜索文件失败: {e}")
+            return {}
+
+    def cancel_search(self, search_id: str = None) -> bool:
+        """
+        取消设备端搜索，未指定 id 时取消全部
+        """
+        for key, search in list(self.searches.items()):
+            if search_id is None or key == search_id:
+                search.cancel()
+        return True
+
+    def read_file_range(self, path: str, offset: int = 0, length: int = 64 * 1024) -> dict:
+        """
+        读取设备文件的一段内容用于预览
+        :param path: 文件路径
+        :param offset: 起始偏移，负数表示距文件末尾的字节数
+        :param length: 读取的字节数，最大 1MB
+        :return: 包含 data、encoding、offset、size 的字典，失败时为空字典
+        """
+        try:
+            return preview.read_range(self.device, path, int(offset), min(int(length), 1024 * 1024))
+        except Exception as e:
+            logger.error(f"读取文件 {path} 失败: {e}")
+            return {}
+
+    def start_tail(self, path: str, backlog: int = 16 * 1024) -> dict:
+        """
+        跟随文件追加的内容，数据通过 onTailData 推送
+        :param path: 文件路径
+        :param backlog: 先输出的末尾字节数
+        :return: 包含跟随 id 的字典，失败时为空字典
+        """
+        try:
+            def on_data(data: dict):
+                push_state('onTailData', data)
+                if data['done']:
+                    self.tails.pop(data['id'], None)
+
+            follower = TailFollower(self.device, path, on_data, backlog=backlog)
+            self.tails[follower.id] = follower
+            follower.start()
+            return {'id': follower.id}
+        except Exception as e:
+            logger.error(f"跟随文件 {path} 失败: {e}")
+            return {}
+
+    def stop_tail(self, tail_id: str = None) -> bool:
+        """
+        停止跟随文件，未指定 id 时停止全部
+        """
+        for key, follower in list(self.tails.items()):
+            if tail_id is None or key == tail_id:
+                follower.stop()
+        return True
+
     def list_files_in_dir(self, path="/sdcard"):
 
         try:
@@ -583,6 +1173,7 @@ class Api:
         """
         try:
             self.device.shell(f'mkdir -p "{path}"')
+            self._listing_cache().invalidate(posixpath.dirname(path.rstrip('/')))
             return True
         except Exception as e:
             logger.error(f"创建文件夹失败: {e}")
@@ -596,6 +1187,8 @@ class Api:
         """
         try:
             self.device.shell(f'rm -rf "{path}"')
+            self._listing_cache().invalidate(posixpath.dirname(path.rstrip('/')))
+            self._listing_cache().invalidate(path)
             return True
         except Exception as e:
             logger.error(f"删除失败: {e}")
@@ -650,6 +1243,7 @@ class Api:
 
             logger.info(f"Uploading file from {source_path} to {target_path}")
             self.device.sync.push(source_path, target_path)
+            self._listing_cache().invalidate(path)
             logger.info("File uploaded successfully")
             return True
 
@@ -657,9 +1251,160 @@ class Api:
             logger.error(f"Error uploading file: {e}")
             return False
 
-    def start_recording(self) -> bool:
+    def _run_transfer(self, transfer: DirectoryTransfer, run) -> Union[bool, dict]:
+        self.transfers[transfer.id] = transfer
+        try:
+            result = run()
+            return result if not result['failedFiles'] and not result['cancelled'] else False
+        finally:
+            self.transfers.pop(transfer.id, None)
+
+    def download_directory(self, path: str, workers: int = 4) -> Union[bool, dict]:
+        """
+        并发下载设备上的目录，已下载且大小与修改时间一致的文件会跳过，进度通过 onTransferProgress 推送
+        :param path: 设备上的目录
+        :param workers: 并发传输的文件数
+        :return:
+            成功时返回传输结果，失败或取消时返回False
+        """
+        try:
+            folder = webview.windows[0].create_file_dialog(webview.FOLDER_DIALOG)
+            if not folder:
+                logger.info("Download cancelled by user")
+                return False
+            transfer = DirectoryTransfer(self.device, workers=workers,
+                                         on_progress=lambda progress: push_state('onTransferProgress', progress))
+            return self._run_transfer(transfer, lambda: transfer.download(path, folder[0]))
+
+        except Exception as e:
+            logger.error(f"下载目录失败: {e}")
+            return False
+
+    def upload_directory(self, path: str, workers: int = 4) -> Union[bool, dict]:
+        """
+        并发上传本地目录到设备，进度通过 onTransferProgress 推送
+        :param path: 设备上的目标目录
+        :param workers: 并发传输的文件数
+        :return:
+            成功时返回传输结果，失败或取消时返回False
+        """
+        try:
+            folder = webview.windows[0].create_file_dialog(webview.FOLDER_DIALOG)
+            if not folder:
+                logger.info("Upload cancelled by user")
+                return {"status": "cancelled", "message": "操作已取消"}
+            transfer = DirectoryTransfer(self.device, workers=workers,
+                                         on_progress=lambda progress: push_state('onTransferProgress', progress))
+            try:
+                return self._run_transfer(transfer, lambda: transfer.upload(folder[0], path))
+            finally:
+                # 上传可能修改多级目录，传输结束（包括失败、取消）后清空整个缓存
+                self._listing_cache().invalidate()
+
+        except Exception as e:
+            logger.error(f"上传目录失败: {e}")
+            return False
+
+    def sync_directory(self, local: str = None, remote: str = "/sdcard", direction: str = "upload",
+                       dry_run: bool = True, delete: bool = False, checksum: bool = False) -> dict:
+        """
+        增量同步本地目录与设备目录，只传输新增或变化的文件
+        :param local: 本地目录，为空时弹出选择框
+        :param remote: 设备上的目录
+        :param direction: upload 为本地 -> 设备，download 为设备 -> 本地
+        :param dry_run: 只返回同步计划，不执行
+        :param delete: 是否删除目标中多余的文件
+        :param checksum: 大小相同、修改时间不同的文件是否比较 md5
+        :return:
+            同步计划，执行时附带传输结果，失败时返回空字典
+        """
+        try:
+            if not local:
+                folder = webview.windows[0].create_file_dialog(webview.FOLDER_DIALOG)
+                if not folder:
+                    logger.info("Sync cancelled by user")
+                    return {}
+                local = folder[0]
+            plan = dirsync.plan_sync(self.device, local, remote, direction, delete=delete, checksum=checksum)
+            if dry_run:
+                return plan.to_dict()
+            transfer = DirectoryTransfer(self.device,
+                                         on_progress=lambda progress: push_state('onTransferProgress', progress))
+            self.transfers[transfer.id] = transfer
+            try:
+                return dirsync.apply_plan(self.device, plan, transfer)
+            finally:
+                self.transfers.pop(transfer.id, None)
+                self._listing_cache().invalidate()
+
+        except Exception as e:
+            logger.error(f"同步目录失败: {e}")
+            return {}
+
+    def cancel_transfer(self, transfer_id: str = None) -> bool:
+        """
+        取消目录传输，未指定 id 时取消全部
+        """
+        for key, transfer in list(self.transfers.items()):
+            if transfer_id is None or key == transfer_id:
+                transfer.cancel()
+        return True
+
+    def start_mirror(self, bit_rate: int = 8000000, size: str = None) -> dict:
+        """
+        开始实时投屏，前端通过返回的本地地址拉取 H.264 字节流或嵌入播放页
+        :param bit_rate: 码率
+        :param size: 分辨率，如 "720x1280"，为空时使用屏幕分辨率
+        :return: 包含 url（H.264 字节流）、viewUrl（播放页）和 statsUrl 的字典，失败时为空字典
+        """
+        try:
+            if self.device is None:
+                return {}
+            serial = self.device.serial
+            session = self._session()
+            mirror = session.mirror
+            if mirror is None or not mirror.is_alive():
+                mirror = ScreenMirror(self.device, bit_rate, size)
+                mirror.start()
+                session.mirror = mirror
+                self.server.route(f"/mirror/{serial}", mirror.serve)
+            logger.info(f"Screen mirror started for {serial}")
+            return {
+                'url': self.server.url(f"/mirror/{serial}"),
+                'viewUrl': self.server.url(f"/mirror/{serial}/view"),
+                'statsUrl': self.server.url(f"/mirror/{serial}/stats"),
+            }
+        except Exception as e:
+            logger.error(f"Failed to start mirror: {e}")
+            return {}
+
+    def stop_mirror(self) -> bool:
+        """
+        停止实时投屏
+        """
+        session = self._current_session()
+        if session is None:
+            return False
+        mirror, session.mirror = session.mirror, None
+        if mirror is None:
+            return False
+        self.server.unroute(f"/mirror/{session.serial}")
+        mirror.stop()
+        return True
+
+    def get_mirror_stats(self) -> dict:
+        """
+        获取投屏的帧率、延迟与丢帧统计
         """
-        开始录制屏幕
+        session = self._current_session()
+        if session is None or session.mirror is None:
+            return {}
+        return session.mirror.stats()
+
+    def start_recording(self, segment_seconds: int = SEGMENT_SECONDS) -> bool:
+        """
+        开始分段录制屏幕，已完成的分段在后台拉取到本地
+        :param segment_seconds: 每段时长（秒）
         :return:
             是否成功开始录制
         """
@@ -668,20 +1413,9 @@ class Api:
                 logger.warning("Recording already in progress")
                 return False
 
-            timestamp = time.strftime("%Y%m%d_%H%M%S")
-            self.recording_file = f"/sdcard/screenrecord_{timestamp}.mp4"
-            logger.info(f"Starting screen recording to {self.recording_file}")
-
-            def record_screen():
-                try:
-                    self.device.shell(f"screenrecord {self.recording_file}")
-                except Exception as e:
-                    logger.error(f"Recording error: {e}")
-                    self.is_recording = False
-
-            self.recording_thread = threading.Thread(target=record_screen)
-            self.recording_thread.daemon = True
-            self.recording_thread.start()
+            self.recorder = ScreenRecorder(self.device, segment_seconds=segment_seconds,
+                                           on_segment=lambda info: push_state('onRecordingSegment', info))
+            self.recorder.start()
             self.is_recording = True
 
             logger.info("Screen recording started successfully")
@@ -694,54 +1428,55 @@ class Api:
 
     def stop_recording(self) -> Union[dict, bool]:
         """
-        停止屏幕录制并保存录制文件
+        停止屏幕录制，前端通过本地地址播放已拉取到主机的录制文件
         :return:
-            成功时返回包含视频base64数据的字典，失败时返回False
+            成功时返回包含视频地址、分段地址、大小和未能拉取的设备端分段（missing）的字典，失败时返回False
         """
         try:
             if not self.is_recording:
                 logger.warning("No recording in progress")
                 return False
 
-            logger.info("Stopping screen recording")
-            self.device.shell("pkill -l SIGINT screenrecord")
             self.is_recording = False
-
-            # Wait a moment for the file to be written
-            time.sleep(1)
-
-            # Read the video file data
-            try:
-                video_data = self.device.sync.read_bytes(self.recording_file)
-                # Convert to base64
-                video_base64 = base64.b64encode(video_data).decode('utf-8')
-                # Clean up the file on device
-                self.device.shell(f"rm {self.recording_file}")
-
-                return {
-                    "videoData": f"data:video/mp4;base64,{video_base64}"
-                }
-
-            except Exception as e:
-                logger.error(f"Error reading video file: {e}")
+            recording_files = self.recorder.stop()
+            if not recording_files:
+                logger.error(f"录屏失败: {self.recorder.error}")
                 return False
+            for path in self.recording_files:
+                if path not in recording_files and os.path.exists(path):
+                    os.remove(path)
+            self.recording_files = recording_files
+
+            self.server.route("/recordings/", self._serve_recording)
+            urls = [self.server.url(f"/recordings/{os.path.basename(path)}") for path in recording_files]
+            return {
+                "videoUrl": urls[0],
+                "segments": urls,
+                "size": sum(os.path.getsize(path) for path in recording_files),
+                "missing": list(self.recorder.missing),
+            }
 
         except Exception as e:
             logger.error(f"Error stopping recording: {e}")
             self.is_recording = False
             return False
 
-    @classmethod
-    def save_recording(cls, video_base64: str) -> bool:
+    @staticmethod
+    def _serve_recording(handler, name: str):
+        # 只允许访问录屏目录下的文件
+        serve_file(handler, os.path.join(RECORDING_DIR, os.path.basename(name)))
+
+    def save_recording(self) -> bool:
         """
-        保存录屏文件到本地
+        保存录屏文件到本地，未能拼接时按分段序号依次保存
 
-        :param video_base64: base64编码的视频数据
         :return:
             是否保存成功
         """
         try:
-            video_data = video_base64.split(',')[1]
+            if not self.recording_files or not all(os.path.exists(path) for path in self.recording_files):
+                logger.warning("No recording to save")
+                return False
             save_path = webview.windows[0].create_file_dialog(
                 webview.SAVE_DIALOG,
                 save_filename=f"screen_recording_{int(time.time())}.mp4",
@@ -751,9 +1486,12 @@ class Api:
             if not save_path:
                 logger.info("Save cancelled by user")
                 return False
-            video_bytes = base64.b64decode(video_data)
-            with open(save_path, 'wb') as f:
-                f.write(video_bytes)
+            if len(self.recording_files) == 1:
+                shutil.copyfile(self.recording_files[0], save_path)
+            else:
+                root, ext = os.path.splitext(save_path)
+                for index, path in enumerate(self.recording_files):
+                    shutil.copyfile(path, f"{root}_{index:03d}{ext or '.mp4'}")
 
             logger.info(f"Recording saved to {save_path}")
             return True
@@ -0,0 +1,207 @@
+# !/usr/bin/env python
+# -*- coding:utf-8 -*-
+"""
+@Version  : Python 3.12
+@Software : PyCharm
+"""
+import os
+import posixpath
+import queue
+import re
+import shlex
+import threading
+import time
+import uuid
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, List
+
+from adbutils import AdbDevice
+from loguru import logger
+
+from src.core.transfer import PART_SUFFIX, walk_remote
+
+RE_PM_PATH = re.compile(r'^package:(.+?)\s*$', re.M)
+OBB_DIR = "/sdcard/Android/obb"
+# 超过该大小的条目需要 zip64
+ZIP64_THRESHOLD = 1 << 31
+
+_DONE = object()
+
+
+def package_paths(device: AdbDevice, package: str) -> List[str]:
+    """
+    pm path 输出的全部 APK 路径，拆分包会返回多行
+    """
+    return RE_PM_PATH.findall(device.shell(f"pm path {shlex.quote(package)}"))
+
+
+def export_entries(device: AdbDevice, package: str, include_obb: bool = False) -> List[tuple]:
+    """
+    导出的文件列表
+    :return: [(压缩包内名称, 设备路径, 大小)]
+    """
+    entries = []
+    for path in package_paths(device, package):
+        entries.append((posixpath.basename(path), path, device.sync.stat(path).size))
+    if include_obb:
+        obb = posixpath.join(OBB_DIR, package)
+        try:
+            for path, rel, size, _ in walk_remote(device, obb):
+                entries.append((f"Android/obb/{package}/{rel}", path, size))
+        except Exception as e:
+            logger.debug(f"{package} 没有 OBB 目录: {e}")
+    return entries
+
+
+class ApkExport:
+    """
+    导出应用的全部 APK（及 OBB）
+
+    每个文件由线程池中的一条 sync 连接读取，数据块经有界队列交给写入线程直接写入压缩包，
+    不在主机上保存临时副本；写入线程按顺序写条目时，后续文件已在并行读取。
+    只有一个 APK 且不含 OBB 时直接保存为 .apk。
+    """
+
+    def __init__(self, device: AdbDevice, entries: List[tuple], workers: int = 4, queue_chunks: int = 16,
+                 on_progress: Callable[[dict], None] = None, progress_interval: float = 0.5):
+        """
+        :param device: 设备
+        :param entries: export_entries 返回的文件列表
+        :param workers: 并行读取的文件数
+        :param queue_chunks: 每个文件最多缓冲的数据块数
+        :param on_progress: 进度回调
+        :param progress_interval: 进度回调的最小间隔（秒）
+        """
+        self.device = device
+        self.entries = entries
+        self.workers = max(1, workers)
+        self.queue_chunks = queue_chunks
+        self.on_progress = on_progress
+        self.progress_interval = progress_interval
+        self.id = uuid.uuid4().hex[:8]
+        self.total_bytes = sum(size for _, _, size in entries)
+        self.done_bytes = 0
+        self.current = None
+        self._started = 0.0
+        self._emitted = 0.0
+        self._stopped = threading.Event()
+        self._cancelled = False
+
+    @property
+    def is_archive(self) -> bool:
+        return len(self.entries) != 1
+
+    def cancel(self):
+        """
+        取消导出，save 删除 .part 文件后抛出 InterruptedError
+        """
+        self._cancelled = True
+        self._stopped.set()
+
+    def save(self, output: str) -> dict:
+        """
+        保存到本地文件，先写入 .part 文件，完成后改名
+        :param output: 本地路径
+        :return: 导出结果
+        """
+        self._started = time.monotonic()
+        queues = [queue.Queue(maxsize=self.queue_chunks) for _ in self.entries]
+        part = output + PART_SUFFIX
+        try:
+            with ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="apk-export") as pool:
+                # 按写入顺序提交，正在写入的条目总是已在读取
+                for entry, q in zip(self.entries, queues):
+                    pool.submit(self._read, entry[1], q)
+                try:
+                    with open(part, 'wb') as f:
+                        if self.is_archive:
+                            self._write_archive(f, queues)
+                        else:
+                            self._write_stream(f, queues[0])
+                finally:
+                    self._stopped.set()
+            os.replace(part, output)
+        except Exception:
+            if os.path.exists(part):
+                os.remove(part)
+            raise
+        result = self.progress()
+        result['path'] = output
+        result['finished'] = True
+        logger.info(f"Exported {len(self.entries)} files ({self.total_bytes} bytes) to {output}, "
+                    f"{result['elapsed']}s")
+        if self.on_progress:
+            self.on_progress(result)
+        return result
+
+    def _read(self, path: str, q: queue.Queue):
+        try:
+            for chunk in self.device.sync.iter_content(path):
+                if not self._put(q, chunk):
+                    return
+            self._put(q, _DONE)
+        except Exception as e:
+            self._put(q, e)
+
+    def _put(self, q: queue.Queue, item) -> bool:
+        while not self._stopped.is_set():
+            try:
+                q.put(item, timeout=0.2)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def _chunks(self, q: queue.Queue):
+        while True:
+            if self._cancelled:
+                raise InterruptedError("cancelled")
+            try:
+                item = q.get(timeout=0.2)
+            except queue.Empty:
+                # 取消后读取线程不再放入数据，不能一直等待
+                continue
+            if item is _DONE:
+                return
+            if isinstance(item, Exception):
+                raise item
+            yield item
+
+    def _write_stream(self, f, q: queue.Queue):
+        self.current = self.entries[0][0]
+        for chunk in self._chunks(q):
+            f.write(chunk)
+            self._add_bytes(len(chunk))
+
+    def _write_archive(self, f, queues: List[queue.Queue]):
+        # APK 本身已压缩，直接存储
+        with zipfile.ZipFile(f, 'w', compression=zipfile.ZIP_STORED) as archive:
+            for (name, _, size), q in zip(self.entries, queues):
+                self.current = name
+                info = zipfile.ZipInfo(name, date_time=time.localtime()[:6])
+                with archive.open(info, 'w', force_zip64=size >= ZIP64_THRESHOLD) as entry:
+                    for chunk in self._chunks(q):
+                        entry.write(chunk)
+                        self._add_bytes(len(chunk))
+
+    def _add_bytes(self, count: int):
+        self.done_bytes += count
+        if self.on_progress is None:
+            return
+        now = time.monotonic()
+        if now - self._emitted >= self.progress_interval:
+            self._emitted = now
+            self.on_progress(self.progress())
+
+    def progress(self) -> dict:
+        return {
+            'id': self.id,
+            'files': len(self.entries),
+            'totalBytes': self.total_bytes,
+            'doneBytes': self.done_bytes,
+            'current': self.current,
+            'archive': self.is_archive,
+            'elapsed': round(time.monotonic() - self._started, 2) if self._started else 0,
+            'finished': False,
+        }
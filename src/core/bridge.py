@@ -0,0 +1,30 @@
+# !/usr/bin/env python
+# -*- coding:utf-8 -*-
+"""
+@Version  : Python 3.12
+@Software : PyCharm
+"""
+import json
+
+import webview
+from loguru import logger
+
+
+def push_state(handler: str, *args) -> bool:
+    """
+    调用前端注册在 window.pywebview.state 上的回调
+    :param handler: 回调名称
+    :param args: 回调参数，需可被 json 序列化
+    :return: 是否成功推送
+    """
+    if len(webview.windows) == 0:
+        return False
+    params = ', '.join(json.dumps(arg) for arg in args)
+    js_code = (f'window.pywebview.state && window.pywebview.state.{handler} '
+               f'&& window.pywebview.state.{handler}({params})')
+    try:
+        webview.windows[0].evaluate_js(js_code)
+        return True
+    except Exception as e:
+        logger.error(f"推送 {handler} 失败: {e}")
+        return False
@@ -6,31 +6,167 @@
 @Author   : wiesZheng
 @Software : PyCharm
 """
-import os
-from adbutils import AdbDevice, adb
+import re
+import threading
+import time
+from typing import Dict, Optional
+
+from adbutils import AdbDevice
 from loguru import logger
 
+from src.core.pid import parse_proc_stat, stat_start_time
+from src.core.props import ADB_SHELL_TIMEOUT, PropertySnapshot
+
+RE_CPU_FREQ = re.compile(r'/cpu(\d+)/cpufreq/scaling_cur_freq:(\d+)')
+
+
+def parse_cpu_times(output: str) -> Dict[str, tuple]:
+    """
+    解析 /proc/stat 的 cpu 行
+    :return: {'cpu': (总 jiffies, 空闲 jiffies), 'cpu0': ...}
+    """
+    times = {}
+    for line in output.splitlines():
+        if not line.startswith('cpu'):
+            continue
+        parts = line.split()
+        # user nice system idle iowait irq softirq steal
+        values = [int(value) for value in parts[1:9]]
+        times[parts[0]] = (sum(values), values[3] + (values[4] if len(values) > 4 else 0))
+    return times
+
+
+def usage_percent(current: tuple, previous: Optional[tuple]) -> Optional[float]:
+    if previous is None or current[0] <= previous[0]:
+        return None
+    total = current[0] - previous[0]
+    idle = current[1] - previous[1]
+    return round(max(total - idle, 0) * 100 / total, 1)
+
 
 class CpuMonitor:
-    def __init__(self, device: AdbDevice):
+    """
+    基于 /proc 的 CPU 采样
+
+    每次采样用一次 shell 读取 /proc/stat、进程与其全部线程的 stat 以及各核心的 scaling_cur_freq，
+    在主机上与上次采样做差，得到整机、各核心、进程以及占用最高的线程的 CPU 使用率。
+    进程与线程的使用率与 top 一致，100% 表示占满一个核心。
+    """
+
+    def __init__(self, device: AdbDevice, snapshot: PropertySnapshot = None, top_threads: int = 5,
+                 min_interval: float = 0.2, timeout: float = ADB_SHELL_TIMEOUT):
+        """
+        :param device: 设备
+        :param snapshot: 设备属性快照
+        :param top_threads: 返回的线程数
+        :param min_interval: get_cpu_info 两次采样的最小间隔（秒），间隔太短时 jiffies 差值不准确
+        :param timeout: shell 调用超时（秒）
+        """
         self.adb_device = device
+        self.snapshot = snapshot or PropertySnapshot(device)
+        self.top_threads = top_threads
+        self.min_interval = min_interval
+        self.timeout = timeout
+        self._cpu_times: Dict[str, tuple] = {}
+        # pid -> (starttime, jiffies)
+        self._process: Optional[tuple] = None
+        # (tid, starttime) -> jiffies
+        self._threads: Dict[tuple, int] = {}
+        self._pid = 0
+        self._sampled = 0.0
+        self._lock = threading.Lock()
+
+    def _read(self, pid: int) -> str:
+        files = "/proc/stat"
+        if pid:
+            files += f" /proc/{pid}/stat /proc/{pid}/task/*/stat"
+        return self.adb_device.shell(
+            f"cat {files} 2>/dev/null; "
+            f"grep '' /sys/devices/system/cpu/cpu[0-9]*/cpufreq/scaling_cur_freq 2>/dev/null", timeout=self.timeout)
+
+    def sample(self, pid: int = 0) -> dict:
+        """
+        采样一次，首次采样（或切换进程后）没有差值，使用率为 None
+        :param pid: 进程 PID，为 0 时只采样整机与各核心
+        :return: 包含 total、cores、process、threads 的字典
+        """
+        output = self._read(pid)
+        times = parse_cpu_times(output)
+        freqs = {int(cpu): int(khz) // 1000 for cpu, khz in RE_CPU_FREQ.findall(output)}
+
+        process = None
+        threads = []
+        for line in output.splitlines():
+            if line.startswith('cpu') or ' (' not in line:
+                continue
+            parsed = parse_proc_stat(line.strip())
+            if parsed is None or len(parsed[2]) < 20:
+                continue
+            tid, name, fields = parsed
+            entry = (tid, name, stat_start_time(fields), int(fields[11]) + int(fields[12]))
+            # 第一行是进程自身的 stat，其余为 task 下的线程
+            if process is None and tid == pid:
+                process = entry
+            else:
+                threads.append(entry)
+
+        with self._lock:
+            if pid != self._pid:
+                self._pid = pid
+                self._process = None
+                self._threads = {}
+            previous = self._cpu_times
+            total_delta = times['cpu'][0] - previous['cpu'][0] if 'cpu' in times and 'cpu' in previous else 0
+            cores = sorted(int(name[3:]) for name in times if name != 'cpu')
+            # 按一个核心的 jiffies 计算，与 top 的口径一致
+            core_delta = total_delta / max(len(cores), 1)
+
+            result = {
+                'total': usage_percent(times['cpu'], previous.get('cpu')) if 'cpu' in times else None,
+                'cores': [{
+                    'core': core,
+                    'usage': usage_percent(times[f'cpu{core}'], previous.get(f'cpu{core}')),
+                    'frequency': freqs.get(core),
+                } for core in cores],
+                'process': None,
+                'threads': [],
+            }
+
+            if process is not None:
+                _, name, start_time, jiffies = process
+                if core_delta > 0 and self._process and self._process[0] == start_time:
+                    result['process'] = round((jiffies - self._process[1]) * 100 / core_delta, 1)
+                self._process = (start_time, jiffies)
+            elif pid:
+                # 进程已退出
+                self._process = None
+
+            current = {}
+            usages = []
+            for tid, name, start_time, jiffies in threads:
+                key = (tid, start_time)
+                current[key] = jiffies
+                last = self._threads.get(key)
+                if core_delta > 0 and last is not None:
+                    usages.append({'tid': tid, 'name': name, 'usage': round((jiffies - last) * 100 / core_delta, 1)})
+            usages.sort(key=lambda thread: thread['usage'], reverse=True)
+            result['threads'] = usages[:self.top_threads]
+            result['threadCount'] = len(threads)
+            self._threads = current
+            self._cpu_times = times
+            self._sampled = time.monotonic()
+        return result
 
-    def get_cpu_info(self, pid: int, sdk_version: int, package_name: str = None):
-
-        if sdk_version >= 25:
-            cpu_info = self.adb_device.shell(
-                "top -n 1 -p {} -o %CPU -b -q".format(pid))
-            cpu_info = cpu_info.strip()
-            logger.info("获取到的cpu信息是：{}".format(cpu_info))
-            return cpu_info
-        else:
-            if package_name is None:
-                raise ValueError("package_name is None")
-            cpu_info = self.adb_device.shell("top -n 1".format(pid))
-            logger.info("top获取到的原始信息是{}".format(cpu_info))
-            for pidinfo in cpu_info.split(os.linesep):
-                if package_name in pidinfo:
-                    pidinfo = pidinfo.split()
-                    if pidinfo[-1] == package_name:
-                        return pidinfo[4].replace("%", '')
-            return ''
+    def get_cpu_info(self, pid: int, sdk_version: int = None, package_name: str = None):
+        """
+        获取进程的 CPU 使用率，与上次采样间隔不足 min_interval 时先等待，首次调用先采样一次作为基准
+        :return: 使用率字符串，进程不存在时为空字符串
+        """
+        with self._lock:
+            primed = self._pid == pid and self._process is not None
+        if not primed:
+            self.sample(pid)
+        time.sleep(max(self.min_interval - (time.monotonic() - self._sampled), 0))
+        usage = self.sample(pid)['process']
+        logger.debug(f"获取到的cpu信息是：{usage}")
+        return '' if usage is None else str(usage)
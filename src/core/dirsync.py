@@ -0,0 +1,217 @@
+# !/usr/bin/env python
+# -*- coding:utf-8 -*-
+"""
+@Version  : Python 3.12
+@Software : PyCharm
+"""
+import hashlib
+import os
+import posixpath
+import shlex
+from typing import Dict, Iterator, List
+
+from adbutils import AdbDevice
+from loguru import logger
+
+from src.core.transfer import DirectoryTransfer, TransferItem, make_dirs, remote_files, walk_local
+
+# FAT / exFAT 的修改时间精度为 2 秒
+MTIME_TOLERANCE = 2
+# 单条 shell 命令的最大长度
+COMMAND_BYTES = 64 * 1024
+
+
+def batch_commands(prefix: str, args: List[str], max_bytes: int = COMMAND_BYTES) -> Iterator[str]:
+    """
+    把参数拆分为多条不超过长度限制的命令
+    """
+    command = prefix
+    for arg in args:
+        quoted = shlex.quote(arg)
+        if command != prefix and len(command) + len(quoted) + 1 > max_bytes:
+            yield command
+            command = prefix
+        command += ' ' + quoted
+    if command != prefix:
+        yield command
+
+
+def remote_md5(device: AdbDevice, paths: List[str]) -> Dict[str, str]:
+    """
+    批量计算设备上文件的 md5
+    :return: {路径: md5}
+    """
+    checksums = {}
+    for command in batch_commands('md5sum', paths):
+        for line in device.shell(command).splitlines():
+            # 输出格式: <md5>  <路径>
+            if len(line) > 34:
+                checksums[line[34:]] = line[:32]
+    return checksums
+
+
+def local_md5(path: str, chunk_size: int = 1024 * 1024) -> str:
+    md5 = hashlib.md5()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            md5.update(chunk)
+    return md5.hexdigest()
+
+
+class SyncPlan:
+    """
+    目录同步计划：新增、更新、删除的文件与无需传输的文件数
+    """
+
+    def __init__(self, direction: str, local: str, remote: str):
+        self.direction = direction
+        self.local = local
+        self.remote = remote
+        self.added: List[TransferItem] = []
+        self.updated: List[TransferItem] = []
+        self.deleted: List[str] = []
+        self.unchanged = 0
+        self.unchanged_bytes = 0
+        self.checksummed = 0
+        # 内容一致但修改时间不同的文件 (目标路径, 源修改时间)，同步时只对齐修改时间
+        self.retimed: List[tuple] = []
+
+    @property
+    def items(self) -> List[TransferItem]:
+        return self.added + self.updated
+
+    def to_dict(self, limit: int = 200) -> dict:
+        def relative(path: str) -> str:
+            if self.direction == 'upload':
+                return posixpath.relpath(path, self.remote)
+            return os.path.relpath(path, self.local).replace(os.sep, '/')
+
+        return {
+            'direction': self.direction,
+            'local': self.local,
+            'remote': self.remote,
+            'added': [relative(item.target) for item in self.added[:limit]],
+            'updated': [relative(item.target) for item in self.updated[:limit]],
+            'deleted': [relative(path) for path in self.deleted[:limit]],
+            'addedCount': len(self.added),
+            'updatedCount': len(self.updated),
+            'deletedCount': len(self.deleted),
+            'unchangedCount': self.unchanged,
+            'retimedCount': len(self.retimed),
+            'checksummedCount': self.checksummed,
+            'transferBytes': sum(item.size for item in self.items),
+            'unchangedBytes': self.unchanged_bytes,
+        }
+
+
+def plan_sync(device: AdbDevice, local: str, remote: str, direction: str = 'upload',
+              delete: bool = False, checksum: bool = False) -> SyncPlan:
+    """
+    比较本地与设备目录，生成同步计划
+
+    大小不同即需要传输；大小相同且修改时间一致视为未变化；
+    大小相同但修改时间不同时，开启 checksum 则批量比较 md5，否则直接传输。
+    :param device: 设备
+    :param local: 本地目录
+    :param remote: 设备上的目录
+    :param direction: upload 为本地 -> 设备，download 为设备 -> 本地
+    :param delete: 是否删除目标中多余的文件
+    :param checksum: 是否对大小相同、修改时间不同的文件比较 md5
+    """
+    if direction not in ('upload', 'download'):
+        raise ValueError(f"Unsupported sync direction: {direction}")
+    remote = remote.rstrip('/') or '/'
+    plan = SyncPlan(direction, local, remote)
+    local_files = {rel: (path, size, mtime) for path, rel, size, mtime in walk_local(local)} \
+        if os.path.isdir(local) else {}
+    device_files = remote_files(device, remote)
+    if direction == 'upload':
+        sources, targets = local_files, device_files
+    else:
+        sources, targets = device_files, local_files
+
+    ambiguous = []
+    for rel, (path, size, mtime) in sources.items():
+        target = targets.get(rel)
+        target_path = posixpath.join(remote, rel) if direction == 'upload' else os.path.join(local, *rel.split('/'))
+        item = TransferItem(path, target_path, size, mtime)
+        if target is None:
+            plan.added.append(item)
+        elif target[1] != size:
+            plan.updated.append(item)
+        elif abs(target[2] - mtime) <= MTIME_TOLERANCE:
+            plan.unchanged += 1
+            plan.unchanged_bytes += size
+        elif checksum:
+            ambiguous.append(item)
+        else:
+            plan.updated.append(item)
+
+    if ambiguous:
+        plan.checksummed = len(ambiguous)
+        if direction == 'upload':
+            device_sums = remote_md5(device, [item.target for item in ambiguous])
+            pairs = [(item, device_sums.get(item.target), local_md5(item.source)) for item in ambiguous]
+        else:
+            device_sums = remote_md5(device, [item.source for item in ambiguous])
+            pairs = [(item, device_sums.get(item.source), local_md5(item.target)) for item in ambiguous]
+        for item, device_sum, local_sum in pairs:
+            if device_sum is not None and device_sum == local_sum:
+                plan.unchanged += 1
+                plan.unchanged_bytes += item.size
+                plan.retimed.append((item.target, item.mtime))
+            else:
+                plan.updated.append(item)
+
+    if delete:
+        plan.deleted = [path for rel, (path, _, _) in targets.items() if rel not in sources]
+    logger.info(f"Sync plan {direction} {local} <-> {remote}: {len(plan.added)} added, {len(plan.updated)} updated, "
+                f"{len(plan.deleted)} deleted, {plan.unchanged} unchanged, {plan.checksummed} checksummed")
+    return plan
+
+
+def _retime_remote(device: AdbDevice, files: List[tuple]):
+    """
+    把设备上文件的修改时间设为源文件的修改时间，下次同步时按修改时间即可判定未变化
+    """
+    commands = [f"touch -m -d @{int(mtime)} {shlex.quote(path)}" for path, mtime in files]
+    batch, length = [], 0
+    for command in commands:
+        if batch and length + len(command) + 1 > COMMAND_BYTES:
+            device.shell('; '.join(batch))
+            batch, length = [], 0
+        batch.append(command)
+        length += len(command) + 2
+    if batch:
+        device.shell('; '.join(batch))
+
+
+def apply_plan(device: AdbDevice, plan: SyncPlan, transfer: DirectoryTransfer) -> dict:
+    """
+    执行同步计划
+    :return: 传输结果
+    """
+    items = plan.items
+    if plan.direction == 'upload':
+        make_dirs(device, [posixpath.dirname(item.target) for item in items])
+    result = transfer.run(plan.direction, items)
+
+    retimed = list(plan.retimed)
+    if plan.direction == 'upload':
+        # sync.push 以上传时刻作为修改时间，需要对齐为本地文件的修改时间
+        retimed += [(item.target, item.mtime) for item in transfer.completed]
+        _retime_remote(device, retimed)
+    else:
+        for path, mtime in retimed:
+            os.utime(path, (mtime, mtime))
+
+    if plan.deleted and len(transfer.completed) == len(items):
+        if plan.direction == 'upload':
+            for command in batch_commands('rm -f', plan.deleted):
+                device.shell(command)
+        else:
+            for path in plan.deleted:
+                os.remove(path)
+        logger.info(f"Deleted {len(plan.deleted)} extra files")
+    result['plan'] = plan.to_dict()
+    return result
@@ -0,0 +1,230 @@
+# !/usr/bin/env python
+# -*- coding:utf-8 -*-
+"""
+@Version  : Python 3.12
+@Software : PyCharm
+"""
+import math
+import shlex
+import threading
+import time
+from typing import List, Optional
+
+from adbutils import AdbDevice
+from loguru import logger
+
+from src.core.props import ADB_SHELL_TIMEOUT, PropertySnapshot
+
+PROFILE_DATA = '---PROFILEDATA---'
+# SurfaceFlinger --latency 中尚未显示的帧
+PENDING_FENCE = (1 << 63) - 1
+DEFAULT_REFRESH_PERIOD = 16_666_667
+# 相邻两帧的显示间隔超过 1.5 个刷新周期，说明至少错过了一次 vsync
+LATENCY_JANK_FACTOR = 1.5
+# gfxinfo 只保留最近 120 帧，SurfaceFlinger 保留 128 帧
+GFXINFO_FRAMES = 120
+
+
+def percentile(values: List[float], p: float) -> Optional[float]:
+    """
+    最近秩法百分位数
+    """
+    if not values:
+        return None
+    ordered = sorted(values)
+    rank = max(math.ceil(p / 100 * len(ordered)), 1)
+    return ordered[rank - 1]
+
+
+def parse_framestats(output: str, after: int = 0) -> List[tuple]:
+    """
+    解析 dumpsys gfxinfo <pkg> framestats 的 PROFILEDATA，跳过 Flags 非 0 的帧
+    :param after: 只返回 IntendedVsync 大于该值的帧
+    :return: [(IntendedVsync, FrameCompleted)]，单位纳秒，按时间排序
+    """
+    frames = []
+    columns = None
+    inside = False
+    for line in output.splitlines():
+        line = line.strip()
+        if line == PROFILE_DATA:
+            inside = not inside
+            columns = None
+            continue
+        if not inside or not line:
+            continue
+        parts = line.rstrip(',').split(',')
+        if columns is None:
+            columns = {name: i for i, name in enumerate(parts)}
+            continue
+        try:
+            if int(parts[columns['Flags']]) != 0:
+                continue
+            intended = int(parts[columns['IntendedVsync']])
+            completed = int(parts[columns['FrameCompleted']])
+        except (KeyError, ValueError, IndexError):
+            continue
+        if intended > after and completed > intended:
+            frames.append((intended, completed))
+    frames.sort()
+    return frames
+
+
+def parse_latency(output: str, after: int = 0) -> tuple:
+    """
+    解析 dumpsys SurfaceFlinger --latency <layer>
+    :param after: 只返回实际显示时间大于该值的帧
+    :return: (刷新周期, [实际显示时间])，单位纳秒
+    """
+    lines = output.splitlines()
+    try:
+        period = int(lines[0].strip())
+    except (IndexError, ValueError):
+        period = 0
+    presents = []
+    for line in lines[1:]:
+        parts = line.split()
+        if len(parts) != 3:
+            continue
+        try:
+            actual = int(parts[1])
+        except ValueError:
+            continue
+        if 0 < actual < PENDING_FENCE and actual > after:
+            presents.append(actual)
+    presents.sort()
+    return period, presents
+
+
+def find_layer(layers: str, package_name: str) -> Optional[str]:
+    """
+    从 SurfaceFlinger --list 中选出应用的图层，优先 SurfaceView（游戏、视频等自绘图层）
+    """
+    candidates = [line.strip() for line in layers.splitlines() if package_name in line]
+    for layer in candidates:
+        if layer.startswith('SurfaceView') and 'Background' not in layer:
+            return layer
+    for layer in candidates:
+        if '/' in layer:
+            return layer
+    return candidates[0] if candidates else None
+
+
+class FpsMonitor:
+    """
+    帧率与卡顿采样
+
+    gfxinfo 模式解析 framestats，只处理 IntendedVsync 晚于上次最后一帧的新帧，帧耗时为 FrameCompleted - IntendedVsync；
+    surfaceflinger 模式读取图层的 --latency，帧耗时为相邻两帧实际显示时间之差，适用于 SurfaceView 与游戏。
+    每次采样返回该窗口内的 FPS、卡顿帧数及帧耗时的 P90 / P99：gfxinfo 中耗时超过一个刷新周期、
+    surfaceflinger 中显示间隔超过 1.5 个刷新周期的帧记为卡顿。
+    """
+
+    def __init__(self, device: AdbDevice, package_name: str, mode: str = 'auto', snapshot: PropertySnapshot = None,
+                 timeout: float = ADB_SHELL_TIMEOUT):
+        """
+        :param device: 设备
+        :param package_name: 应用包名
+        :param mode: gfxinfo / surfaceflinger / auto，auto 时存在 SurfaceView 图层则用 surfaceflinger
+        :param snapshot: 设备属性快照
+        :param timeout: shell 调用超时（秒）
+        """
+        self.adb_device = device
+        self.package_name = package_name
+        self.mode = mode
+        self.timeout = timeout
+        self.snapshot = snapshot or PropertySnapshot(device)
+        self.source: Optional[str] = None
+        self.layer: Optional[str] = None
+        self.refresh_period = 0
+        self._last_frame = 0
+        self._last_sample = 0.0
+        self._lock = threading.Lock()
+
+    def _resolve_source(self):
+        if self.mode == 'gfxinfo':
+            self.source = 'gfxinfo'
+            return
+        layers = self.adb_device.shell("dumpsys SurfaceFlinger --list", timeout=self.timeout)
+        self.layer = find_layer(layers, self.package_name)
+        if self.mode == 'surfaceflinger' or (self.layer and self.layer.startswith('SurfaceView')):
+            self.source = 'surfaceflinger'
+        else:
+            self.source = 'gfxinfo'
+        logger.info(f"FPS source for {self.package_name}: {self.source}, layer {self.layer}")
+
+    def _refresh_period(self) -> int:
+        if not self.refresh_period:
+            # 不带图层名时只输出刷新周期
+            period, _ = parse_latency(self.adb_device.shell("dumpsys SurfaceFlinger --latency", timeout=self.timeout))
+            self.refresh_period = period or DEFAULT_REFRESH_PERIOD
+        return self.refresh_period
+
+    def _gfxinfo_frames(self) -> tuple:
+        output = self.adb_device.shell(f"dumpsys gfxinfo {shlex.quote(self.package_name)} framestats",
+                                      timeout=self.timeout)
+        frames = parse_framestats(output, self._last_frame)
+        if frames:
+            self._last_frame = frames[-1][0]
+        durations = [completed - intended for intended, completed in frames]
+        timestamps = [completed for _, completed in frames]
+        return durations, timestamps, len(frames) >= GFXINFO_FRAMES
+
+    def _latency_frames(self) -> tuple:
+        if not self.layer:
+            self._resolve_source()
+            if not self.layer:
+                return [], [], False
+        output = self.adb_device.shell(f"dumpsys SurfaceFlinger --latency {shlex.quote(self.layer)}",
+                                      timeout=self.timeout)
+        period, presents = parse_latency(output, self._last_frame)
+        if period:
+            self.refresh_period = period
+        if len(output.splitlines()) <= 1:
+            # 图层已不存在（如切换了界面），下次重新查找
+            self.layer = None
+            return [], [], False
+        previous = self._last_frame
+        if presents:
+            self._last_frame = presents[-1]
+        # 第一帧的耗时需要上一窗口的最后一帧
+        points = ([previous] if previous else []) + presents
+        durations = [b - a for a, b in zip(points, points[1:])]
+        return durations, presents, len(presents) >= 127
+
+    def sample(self) -> dict:
+        """
+        采样一次，首次调用只记录基准
+        :return: 包含 fps、frames、jank、p90、p99（毫秒）的字典
+        """
+        with self._lock:
+            if self.source is None:
+                self._resolve_source()
+            now = time.monotonic()
+            first = self._last_sample == 0
+            if self.source == 'surfaceflinger':
+                durations, timestamps, truncated = self._latency_frames()
+            else:
+                durations, timestamps, truncated = self._gfxinfo_frames()
+            period = self._refresh_period()
+            window = now - self._last_sample if self._last_sample else 0
+            self._last_sample = now
+
+        if first:
+            return {'source': self.source, 'fps': None, 'frames': 0, 'jank': 0, 'p90': None, 'p99': None,
+                    'maxFrameTime': None, 'refreshRate': round(1e9 / period), 'truncated': False}
+
+        frame_times = [duration / 1e6 for duration in durations]
+        threshold = period * LATENCY_JANK_FACTOR if self.source == 'surfaceflinger' else period
+        return {
+            'source': self.source,
+            'fps': round(len(timestamps) / window, 1) if window > 0 else 0,
+            'frames': len(timestamps),
+            'jank': sum(1 for duration in durations if duration > threshold),
+            'p90': round(percentile(frame_times, 90), 2) if frame_times else None,
+            'p99': round(percentile(frame_times, 99), 2) if frame_times else None,
+            'maxFrameTime': round(max(frame_times), 2) if frame_times else None,
+            'refreshRate': round(1e9 / period),
+            # 帧数超过缓冲区容量，窗口内较早的帧已被覆盖
+            'truncated': truncated,
+        }
@@ -0,0 +1,213 @@
+# !/usr/bin/env python
+# -*- coding:utf-8 -*-
+"""
+@Version  : Python 3.12
+@Software : PyCharm
+"""
+import os
+import posixpath
+import re
+import shlex
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List
+
+from adbutils import AdbDevice
+from loguru import logger
+
+from src.core.transfer import CountingReader
+
+# 设备上的临时目录，安装完成后删除
+INSTALL_TMP_DIR = "/data/local/tmp/cb-install"
+
+RE_SESSION = re.compile(r'\[(\d+)\]')
+
+
+class DeviceInstall:
+    """
+    单台设备的安装状态
+    """
+    __slots__ = ('serial', 'stage', 'total_bytes', 'sent_bytes', 'installed', 'error', 'started', 'finished')
+
+    def __init__(self, serial: str, total_bytes: int):
+        self.serial = serial
+        # pending / push / install / done / failed / cancelled
+        self.stage = 'pending'
+        self.total_bytes = total_bytes
+        self.sent_bytes = 0
+        self.installed: List[str] = []
+        self.error = None
+        self.started = 0.0
+        self.finished = 0.0
+
+    def to_dict(self) -> dict:
+        end = self.finished or (time.monotonic() if self.started else 0.0)
+        return {
+            'serial': self.serial,
+            'stage': self.stage,
+            'totalBytes': self.total_bytes,
+            'sentBytes': self.sent_bytes,
+            'installed': self.installed,
+            'error': self.error,
+            'elapsed': round(end - self.started, 2) if self.started else 0,
+        }
+
+
+class MultiInstaller:
+    """
+    多设备并行安装
+
+    每台设备在线程池中独立执行：APK 逐个 sync.push 到临时目录后用 pm 安装，总耗时取决于最慢的设备。
+    split=True 时所有 APK 作为同一个应用的拆分包，通过 install-create / install-write / install-commit 安装。
+    """
+
+    def __init__(self, devices: List[AdbDevice], apks: List[str], split: bool = False, workers: int = 8,
+                 on_progress: Callable[[dict], None] = None, progress_interval: float = 0.5):
+        """
+        :param devices: 目标设备
+        :param apks: 本地 APK 路径
+        :param split: 是否按拆分包安装
+        :param workers: 同时安装的设备数
+        :param on_progress: 进度回调
+        :param progress_interval: 进度回调的最小间隔（秒）
+        """
+        self.devices = devices
+        self.apks = apks
+        self.split = split
+        self.workers = max(1, workers)
+        self.on_progress = on_progress
+        self.progress_interval = progress_interval
+        self.id = uuid.uuid4().hex[:8]
+        total = sum(os.path.getsize(apk) for apk in apks)
+        self.states: Dict[str, DeviceInstall] = {device.serial: DeviceInstall(device.serial, total)
+                                                 for device in devices}
+        self._started = 0.0
+        self._emitted = 0.0
+        self._lock = threading.Lock()
+        self._cancelled = threading.Event()
+
+    def cancel(self):
+        self._cancelled.set()
+
+    def install(self) -> dict:
+        """
+        在全部设备上安装，阻塞直到所有设备完成
+        :return: 安装结果
+        """
+        self._started = time.monotonic()
+        logger.info(f"Install {self.id}: {len(self.apks)} apks on {len(self.devices)} devices, split={self.split}")
+        self._emit(force=True)
+        with ThreadPoolExecutor(max_workers=min(self.workers, len(self.devices) or 1),
+                                thread_name_prefix=f"install-{self.id}") as pool:
+            for device in self.devices:
+                pool.submit(self._install_device, device)
+        result = self.progress()
+        result['finished'] = True
+        logger.info(f"Install {self.id} finished: {result['failedDevices']} of {len(self.devices)} devices failed, "
+                    f"{result['elapsed']}s")
+        if self.on_progress:
+            self.on_progress(result)
+        return result
+
+    def _install_device(self, device: AdbDevice):
+        state = self.states[device.serial]
+        state.started = time.monotonic()
+        directory = f"{INSTALL_TMP_DIR}-{self.id}"
+        try:
+            self._check_cancelled()
+            state.stage = 'push'
+            self._emit(force=True)
+            device.shell(f"mkdir -p {directory}")
+            remote = []
+            for i, apk in enumerate(self.apks):
+                target = posixpath.join(directory, f"{i}.apk")
+                self._push(device, apk, target, state)
+                remote.append((apk, target))
+
+            self._check_cancelled()
+            state.stage = 'install'
+            self._emit(force=True)
+            if self.split:
+                self._install_split(device, remote)
+                state.installed = [os.path.basename(apk) for apk, _ in remote]
+            else:
+                for apk, target in remote:
+                    self._check_cancelled()
+                    self._check_output(device.shell(f"pm install -r -t {target}"))
+                    state.installed.append(os.path.basename(apk))
+                    self._emit()
+            state.stage = 'done'
+        except Exception as e:
+            state.stage = 'cancelled' if self._cancelled.is_set() else 'failed'
+            state.error = str(e)
+            if not self._cancelled.is_set():
+                logger.error(f"设备 {device.serial} 安装失败: {e}")
+        finally:
+            state.finished = time.monotonic()
+            try:
+                device.shell(f"rm -rf {directory}")
+            except Exception as e:
+                logger.debug(f"清理 {device.serial} 临时目录失败: {e}")
+            self._emit(force=True)
+
+    def _push(self, device: AdbDevice, apk: str, target: str, state: DeviceInstall):
+        def on_read(count: int):
+            self._check_cancelled()
+            with self._lock:
+                state.sent_bytes += count
+            self._emit()
+
+        with open(apk, 'rb') as f:
+            device.sync.push(CountingReader(f, on_read), target)
+
+    def _install_split(self, device: AdbDevice, remote: List[tuple]):
+        sizes = [os.path.getsize(apk) for apk, _ in remote]
+        output = device.shell(f"pm install-create -r -t -S {sum(sizes)}")
+        match = RE_SESSION.search(output)
+        if not match:
+            raise RuntimeError(output.strip() or "install-create failed")
+        session = match.group(1)
+        try:
+            for i, ((apk, target), size) in enumerate(zip(remote, sizes)):
+                self._check_cancelled()
+                name = shlex.quote(f"{i}_{os.path.basename(apk)}")
+                self._check_output(device.shell(f"pm install-write -S {size} {session} {name} {target}"))
+            self._check_output(device.shell(f"pm install-commit {session}"))
+        except Exception:
+            device.shell(f"pm install-abandon {session}")
+            raise
+
+    @staticmethod
+    def _check_output(output: str):
+        if 'Success' not in output:
+            raise RuntimeError(output.strip() or "install failed")
+
+    def _check_cancelled(self):
+        if self._cancelled.is_set():
+            raise InterruptedError("cancelled")
+
+    def _emit(self, force: bool = False):
+        if self.on_progress is None:
+            return
+        now = time.monotonic()
+        with self._lock:
+            if not force and now - self._emitted < self.progress_interval:
+                return
+            self._emitted = now
+        self.on_progress(self.progress())
+
+    def progress(self) -> dict:
+        devices = [state.to_dict() for state in self.states.values()]
+        return {
+            'id': self.id,
+            'apks': [os.path.basename(apk) for apk in self.apks],
+            'split': self.split,
+            'devices': devices,
+            'doneDevices': sum(1 for device in devices if device['stage'] == 'done'),
+            'failedDevices': sum(1 for device in devices if device['stage'] in ('failed', 'cancelled')),
+            'elapsed': round(time.monotonic() - self._started, 2) if self._started else 0,
+            'cancelled': self._cancelled.is_set(),
+            'finished': False,
+        }
@@ -0,0 +1,177 @@
+# !/usr/bin/env python
+# -*- coding:utf-8 -*-
+"""
+@Version  : Python 3.12
+@Software : PyCharm
+"""
+import posixpath
+import stat
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import List
+
+from adbutils import AdbDevice
+from loguru import logger
+
+
+class Listing:
+    """
+    单个目录的已排序列表，条目为 (名称, 是否目录, 大小, 修改时间, 模式) 元组，分页时才转换为字典
+    """
+    __slots__ = ('path', 'mtime', 'entries')
+
+    def __init__(self, path: str, mtime: float, entries: List[tuple]):
+        self.path = path
+        self.mtime = mtime
+        self.entries = entries
+
+
+class ListingCache:
+    """
+    按设备的目录列表缓存
+
+    以路径为键、目录修改时间为校验，目录未变化时直接返回缓存；
+    列表只在加载时排序一次，之后按游标分页返回，并在后台预取当前页中靠前的子目录。
+    """
+
+    def __init__(self, device: AdbDevice, max_dirs: int = 64, prefetch: int = 4):
+        """
+        :param device: 设备
+        :param max_dirs: 最多缓存的目录数，超出后淘汰最久未访问的目录
+        :param prefetch: 每次分页后预取的子目录数
+        """
+        self.device = device
+        self.max_dirs = max_dirs
+        self.prefetch = prefetch
+        self.hits = 0
+        self.misses = 0
+        self._listings: OrderedDict = OrderedDict()
+        self._loading = set()
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix=f"listing-{device.serial}")
+
+    @staticmethod
+    def _normalize(path: str) -> str:
+        return posixpath.normpath(path or '/').replace('//', '/')
+
+    def _dir_mtime(self, path: str) -> float:
+        # 结尾的 / 让符号链接（如 /sdcard）返回目标目录的信息
+        return self.device.sync.stat(path.rstrip('/') + '/').mtime.timestamp()
+
+    def _load(self, path: str, mtime: float) -> Listing:
+        started = time.perf_counter()
+        entries = []
+        for entry in self.device.sync.list(path):
+            if entry.path in ('.', '..'):
+                continue
+            # 符号链接多指向目录（如 /sdcard），按目录处理以便进入
+            is_dir = stat.S_ISDIR(entry.mode) or stat.S_ISLNK(entry.mode)
+            entries.append((entry.path, is_dir, entry.size, entry.mtime.timestamp(), entry.mode))
+        entries.sort(key=lambda e: (not e[1], e[0].lower()))
+        listing = Listing(path, mtime, entries)
+        logger.debug(f"列出目录 {path}: {len(entries)} 项, {round((time.perf_counter() - started) * 1000, 1)}ms")
+        return listing
+
+    def get(self, path: str, refresh: bool = False) -> Listing:
+        """
+        获取目录列表，目录修改时间未变化时使用缓存
+        """
+        path = self._normalize(path)
+        mtime = self._dir_mtime(path)
+        with self._lock:
+            listing = self._listings.get(path)
+            if listing is not None and not refresh and listing.mtime == mtime:
+                self._listings.move_to_end(path)
+                self.hits += 1
+                return listing
+            self.misses += 1
+        listing = self._load(path, mtime)
+        self._store(listing)
+        return listing
+
+    def _store(self, listing: Listing):
+        with self._lock:
+            self._listings[listing.path] = listing
+            self._listings.move_to_end(listing.path)
+            while len(self._listings) > self.max_dirs:
+                self._listings.popitem(last=False)
+
+    def invalidate(self, path: str = None):
+        """
+        使缓存失效，修改时间精度只有 1 秒，增删文件后需要主动失效
+        :param path: 目录，为空时清空全部缓存
+        """
+        with self._lock:
+            if path is None:
+                self._listings.clear()
+            else:
+                self._listings.pop(self._normalize(path), None)
+
+    def _prefetch(self, path: str):
+        try:
+            with self._lock:
+                if path in self._listings:
+                    return
+            self.get(path)
+        except Exception as e:
+            logger.debug(f"预取目录 {path} 失败: {e}")
+        finally:
+            with self._lock:
+                self._loading.discard(path)
+
+    def page(self, path: str, cursor: int = 0, limit: int = 500, refresh: bool = False) -> dict:
+        """
+        分页获取目录列表
+        :param path: 目录
+        :param cursor: 起始位置，取上一页返回的 cursor
+        :param limit: 每页条数
+        :param refresh: 是否忽略缓存重新列出
+        :return: 包含条目、下一页游标与总数的字典，没有下一页时 cursor 为 None
+        """
+        listing = self.get(path, refresh=refresh and cursor == 0)
+        end = min(cursor + limit, len(listing.entries))
+        page = listing.entries[cursor:end]
+        entries = [{
+            'name': name,
+            'path': posixpath.join(listing.path, name),
+            'size': size,
+            'is_dir': is_dir,
+            'permissions': stat.filemode(mode),
+            'owner': "未知",
+            'group': "未知",
+            'modified': time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(mtime)),
+        } for name, is_dir, size, mtime, mode in page]
+
+        if self.prefetch and cursor == 0:
+            for name, is_dir, _, _, mode in page:
+                if not is_dir or stat.S_ISLNK(mode):
+                    continue
+                child = posixpath.join(listing.path, name)
+                with self._lock:
+                    if len(self._loading) >= self.prefetch:
+                        break
+                    if child in self._listings or child in self._loading:
+                        continue
+                    self._loading.add(child)
+                self._executor.submit(self._prefetch, child)
+
+        return {
+            'path': listing.path,
+            'entries': entries,
+            'cursor': end if end < len(listing.entries) else None,
+            'total': len(listing.entries),
+        }
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                'dirs': len(self._listings),
+                'entries': sum(len(listing.entries) for listing in self._listings.values()),
+                'hits': self.hits,
+                'misses': self.misses,
+            }
+
+    def close(self):
+        self._executor.shutdown(wait=False)
@@ -0,0 +1,239 @@
+# !/usr/bin/env python
+# -*- coding:utf-8 -*-
+"""
+@Version  : Python 3.12
+@Software : PyCharm
+"""
+import json
+import os
+import threading
+import time
+import zlib
+from datetime import datetime
+from typing import Iterator, List, Union
+
+from loguru import logger
+
+LOGCAT_ARCHIVE_DIR = "logs/logcat"
+
+
+def parse_time(value: Union[int, float, str]) -> float:
+    """
+    解析时间参数，支持时间戳、"YYYY-MM-DD HH:MM:SS" 和当天的 "HH:MM:SS"
+    :return: 秒级时间戳
+    """
+    if isinstance(value, (int, float)):
+        return float(value)
+    value = value.strip()
+    for fmt in ("%Y-%m-%d %H:%M:%S", "%Y-%m-%d %H:%M:%S.%f"):
+        try:
+            return datetime.strptime(value, fmt).timestamp()
+        except ValueError:
+            pass
+    for fmt in ("%H:%M:%S", "%H:%M:%S.%f"):
+        try:
+            parsed = datetime.strptime(value, fmt).time()
+            return datetime.combine(datetime.now().date(), parsed).timestamp()
+        except ValueError:
+            pass
+    return float(value)
+
+
+class Segment:
+    """
+    一个压缩分段：数据文件由若干独立的 gzip 块拼接而成，索引文件每行记录一个块
+    (偏移, 长度, 最小时间, 最大时间, 条数)
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.index_path = path[:-len('.log.gz')] + '.idx'
+        self.blocks: List[tuple] = []
+        if os.path.exists(self.index_path):
+            with open(self.index_path, 'r', encoding='utf-8') as f:
+                for line in f:
+                    parts = line.split('\t')
+                    if len(parts) == 5:
+                        self.blocks.append((int(parts[0]), int(parts[1]), float(parts[2]),
+                                            float(parts[3]), int(parts[4])))
+
+    @property
+    def size(self) -> int:
+        return sum(block[1] for block in self.blocks)
+
+    @property
+    def start(self) -> float:
+        return min((block[2] for block in self.blocks), default=0.0)
+
+    @property
+    def end(self) -> float:
+        return max((block[3] for block in self.blocks), default=0.0)
+
+    def append_block(self, data: bytes, min_time: float, max_time: float, count: int):
+        with open(self.path, 'ab') as f:
+            offset = f.tell()
+            f.write(data)
+        block = (offset, len(data), min_time, max_time, count)
+        with open(self.index_path, 'a', encoding='utf-8') as f:
+            f.write('\t'.join(str(v) for v in block) + '\n')
+        self.blocks.append(block)
+
+    def read_blocks(self, start: float, end: float) -> Iterator[dict]:
+        """
+        只解压与时间范围重叠的块
+        """
+        blocks = list(self.blocks)
+        if not blocks:
+            return
+        with open(self.path, 'rb') as f:
+            for offset, length, min_time, max_time, _ in blocks:
+                if max_time < start or min_time > end:
+                    continue
+                f.seek(offset)
+                data = zlib.decompress(f.read(length), wbits=31)
+                for line in data.decode('utf-8').splitlines():
+                    entry = json.loads(line)
+                    if start <= entry.get('time', 0.0) <= end:
+                        yield entry
+
+    def delete(self):
+        for path in (self.path, self.index_path):
+            if os.path.exists(path):
+                os.remove(path)
+
+
+class LogArchive:
+    """
+    logcat 的磁盘归档
+
+    按设备写入轮转的压缩分段文件，每个分段带稀疏的时间→偏移索引；
+    按时间查询或导出时只解压相关的块，导出以流式写入磁盘。
+    """
+
+    def __init__(self, directory: str, segment_bytes: int = 64 * 1024 * 1024,
+                 block_bytes: int = 256 * 1024, block_interval: float = 5.0, max_segments: int = 32):
+        """
+        :param directory: 分段文件目录
+        :param segment_bytes: 单个分段的压缩后大小上限
+        :param block_bytes: 单个压缩块的原始大小
+        :param block_interval: 日志较少时，距上次落盘超过该秒数也会落盘
+        :param max_segments: 保留的分段数量，超出后删除最旧的分段
+        """
+        self.directory = directory
+        self.segment_bytes = segment_bytes
+        self.block_bytes = block_bytes
+        self.block_interval = block_interval
+        self.max_segments = max_segments
+        self._lines: List[str] = []
+        self._pending = 0
+        self._min_time = float('inf')
+        self._max_time = 0.0
+        self._flushed = time.monotonic()
+        self._lock = threading.Lock()
+        self._closed = threading.Event()
+        self._timer: threading.Thread = None
+        os.makedirs(directory, exist_ok=True)
+        self.segments = [Segment(os.path.join(directory, name))
+                         for name in sorted(os.listdir(directory)) if name.endswith('.log.gz')]
+        if not self.segments:
+            self._new_segment()
+
+    def _new_segment(self):
+        # 文件名以递增序号开头，按名称排序即为写入顺序
+        sequence = 0
+        if self.segments:
+            sequence = int(os.path.basename(self.segments[-1].path).split('_')[1]) + 1
+        name = f"segment_{sequence:06d}_{time.strftime('%Y%m%d_%H%M%S')}.log.gz"
+        self.segments.append(Segment(os.path.join(self.directory, name)))
+        while len(self.segments) > self.max_segments:
+            self.segments.pop(0).delete()
+
+    def write(self, entry: dict):
+        line = json.dumps(entry, ensure_ascii=False)
+        with self._lock:
+            if self._timer is None:
+                # 日志停止产生时 write 不再被调用，由定时线程把最后一块落盘
+                self._timer = threading.Thread(target=self._flush_loop, name="logarchive-flush")
+                self._timer.daemon = True
+                self._timer.start()
+            self._lines.append(line)
+            self._pending += len(line) + 1
+            entry_time = entry.get('time', 0.0)
+            self._min_time = min(self._min_time, entry_time)
+            self._max_time = max(self._max_time, entry_time)
+            if self._pending >= self.block_bytes or time.monotonic() - self._flushed >= self.block_interval:
+                self._flush_block()
+
+    def flush(self):
+        with self._lock:
+            self._flush_block()
+
+    def close(self):
+        """
+        停止定时落盘并写入剩余日志
+        """
+        self._closed.set()
+        self.flush()
+
+    def _flush_loop(self):
+        while not self._closed.wait(self.block_interval):
+            with self._lock:
+                if self._lines and time.monotonic() - self._flushed >= self.block_interval:
+                    self._flush_block()
+
+    def _flush_block(self):
+        self._flushed = time.monotonic()
+        if not self._lines:
+            return
+        compressor = zlib.compressobj(6, zlib.DEFLATED, 31)
+        data = compressor.compress(('\n'.join(self._lines) + '\n').encode('utf-8')) + compressor.flush()
+        segment = self.segments[-1]
+        segment.append_block(data, self._min_time, self._max_time, len(self._lines))
+        self._lines = []
+        self._pending = 0
+        self._min_time = float('inf')
+        self._max_time = 0.0
+        if segment.size >= self.segment_bytes:
+            self._new_segment()
+
+    def read_range(self, start: Union[int, float, str], end: Union[int, float, str]) -> Iterator[dict]:
+        """
+        读取时间范围内的日志，未落盘的日志也会被包含
+        """
+        start, end = parse_time(start), parse_time(end)
+        self.flush()
+        for segment in list(self.segments):
+            if segment.blocks and (segment.end < start or segment.start > end):
+                continue
+            yield from segment.read_blocks(start, end)
+
+    def read_around(self, timestamp: Union[int, float, str], window: float = 30.0) -> List[dict]:
+        """
+        读取某一时刻前后 window 秒内的日志
+        """
+        center = parse_time(timestamp)
+        return list(self.read_range(center - window, center + window))
+
+    def export(self, start: Union[int, float, str], end: Union[int, float, str], path: str) -> int:
+        """
+        以 threadtime 文本格式流式导出时间范围内的日志
+        :return: 导出的条数
+        """
+        count = 0
+        with open(path, 'w', encoding='utf-8') as f:
+            for entry in self.read_range(start, end):
+                pid, _, tid = entry.get('processId', '0-0').partition('-')
+                f.write(f"{entry.get('timestamp', '')} {pid:>5} {tid:>5} {entry.get('level', 'V')} "
+                        f"{entry.get('message', '')}\n")
+                count += 1
+        logger.info(f"Exported {count} log entries to {path}")
+        return count
+
+    def stats(self) -> dict:
+        return {
+            'directory': self.directory,
+            'segments': len(self.segments),
+            'bytes': sum(segment.size for segment in self.segments),
+            'start': min((s.start for s in self.segments if s.blocks), default=0.0),
+            'end': max((s.end for s in self.segments if s.blocks), default=0.0),
+        }
@@ -0,0 +1,422 @@
+# !/usr/bin/env python
+# -*- coding:utf-8 -*-
+"""
+@Version  : Python 3.12
+@Software : PyCharm
+"""
+import re
+import shlex
+import struct
+import threading
+import time
+from collections import deque
+from typing import Callable, Dict, List, Optional
+
+from adbutils import AdbDevice
+from loguru import logger
+
+from src.core.pid import PidCache
+
+LEVELS = 'VDIWEF'
+
+# logcat -B 的 priority 字节到级别字母
+PRIORITY_LEVELS = {2: 'V', 3: 'D', 4: 'I', 5: 'W', 6: 'E', 7: 'F'}
+
+# 非文本格式的日志缓冲区（events、stats、security），二进制模式下跳过
+BINARY_LOG_IDS = {2, 5, 6}
+
+# struct logger_entry: len, hdr_size, pid, tid, sec, nsec
+ENTRY_HEADER = struct.Struct('<HHiIII')
+
+
+class LogcatFilter:
+    """
+    logcat 过滤条件，尽量下推到设备端执行，减少经 USB 传输的数据量
+    """
+
+    def __init__(self, level: str = None, tags: List[str] = None, pid: int = None,
+                 uid: int = None, regex: str = None, package: str = None):
+        """
+        :param level: 最低级别 V/D/I/W/E/F
+        :param tags: tag:priority 列表，如 ["ActivityManager:I"]
+        :param pid: 只看该进程 (--pid)
+        :param uid: 只看该 uid (--uid)
+        :param regex: 消息正则 (-e)
+        :param package: 所属包名，仅用于标注日志
+        """
+        self.level = level.upper()[0] if level else None
+        self.tags = tags or []
+        self.pid = pid
+        self.uid = uid
+        self.regex = regex
+        self.package = package
+        self.pattern = re.compile(regex) if regex else None
+
+    @classmethod
+    def from_dict(cls, data: dict) -> 'LogcatFilter':
+        data = data or {}
+        return cls(level=data.get('level'), tags=data.get('tags'), pid=data.get('pid'),
+                   uid=data.get('uid'), regex=data.get('regex'), package=data.get('package'))
+
+    def options(self, with_regex: bool = True) -> List[str]:
+        options = []
+        if self.pid:
+            options.append(f'--pid={int(self.pid)}')
+        if self.uid is not None:
+            options.append(f'--uid={int(self.uid)}')
+        if self.regex and with_regex:
+            options.extend(['-e', shlex.quote(self.regex)])
+        return options
+
+    def filterspecs(self) -> List[str]:
+        specs = list(self.tags)
+        if self.level:
+            specs.append(f'*:{self.level}')
+        elif specs:
+            specs.append('*:S')
+        return [shlex.quote(spec) for spec in specs]
+
+    def key(self) -> tuple:
+        return self.level, tuple(self.tags), self.pid, self.uid, self.regex, self.package
+
+
+_minute_cache: Dict[str, float] = {}
+
+
+def parse_timestamp(date: str, time_: str) -> float:
+    """
+    把 threadtime 的 "MM-DD HH:MM:SS.mmm" 转为时间戳，年份取当前年
+    :return: 秒级时间戳，无法解析时返回 0
+    """
+    key = f"{date} {time_[:5]}"
+    base = _minute_cache.get(key)
+    if base is None:
+        try:
+            month, day = date.split('-')
+            hour, minute = time_[:5].split(':')
+            base = time.mktime((time.localtime().tm_year, int(month), int(day),
+                                int(hour), int(minute), 0, 0, 0, -1))
+        except ValueError:
+            return 0.0
+        if len(_minute_cache) > 1024:
+            _minute_cache.clear()
+        _minute_cache[key] = base
+    try:
+        return base + float(time_[6:])
+    except ValueError:
+        return base
+
+
+def parse_line(line: str) -> Optional[dict]:
+    """
+    解析 threadtime 格式的 logcat 行
+    :param line: logcat 行
+    :return: 日志字典，无法解析时返回 None
+    """
+    parts = line.split(None, 5)
+    if len(parts) < 6:
+        return None
+    date, time_, pid, tid, level, message = parts
+    return {
+        'timestamp': f"{date} {time_}",
+        'time': parse_timestamp(date, time_),
+        'processId': f"{pid}-{tid}",
+        'level': level[0],  # level (I/D/W/E/V)
+        'message': message,
+        'component': message.split(':', 1)[0].strip() if ':' in message else 'unknown',
+        'package': 'system'
+    }
+
+
+class LogcatReader:
+    """
+    单台设备的 logcat 读取管道
+
+    读取线程把解析后的日志写入有界环形缓冲区，推送线程按时间窗口或条数合并后批量推送；
+    消费跟不上时丢弃最旧的日志并计数，避免每行一次 evaluate_js 阻塞界面。
+    """
+
+    def __init__(self, device: AdbDevice, on_batch: Callable[[list, dict], None],
+                 log_filter: LogcatFilter = None, capacity: int = 5000, flush_interval: float = 0.2,
+                 batch_size: int = 500, clear: bool = False, sink: Callable[[dict], None] = None,
+                 pid_cache: PidCache = None, watch_interval: float = 1.0):
+        """
+        :param device: 设备
+        :param on_batch: 批量回调 (entries, stats)
+        :param log_filter: 过滤条件
+        :param capacity: 环形缓冲区容量
+        :param flush_interval: 推送时间窗口，单位秒
+        :param batch_size: 单批最大条数，缓冲区达到该条数时立即推送
+        :param clear: 启动前是否清空设备日志，会删除设备缓冲区中的日志，仅在用户明确要求时使用
+        :param sink: 每条日志的额外去向（如日志库），不受缓冲区丢弃影响
+        :param pid_cache: 过滤条件的 pid 由 package 解析而来时传入，应用重启后以新 pid 重启 logcat
+        :param watch_interval: 检查应用进程是否重启的间隔（秒）
+        """
+        self.device = device
+        self.on_batch = on_batch
+        self.filter = log_filter or LogcatFilter()
+        self.capacity = capacity
+        self.flush_interval = flush_interval
+        self.batch_size = batch_size
+        self.clear = clear
+        self.sink = sink
+        self.pid_cache = pid_cache
+        self.watch_interval = watch_interval
+        self.received = 0
+        self.delivered = 0
+        self.dropped = 0
+        self._buffer = deque(maxlen=capacity)
+        self._cond = threading.Condition()
+        self._stopped = threading.Event()
+        self._stream = None
+        self._restart = threading.Event()
+        self._threads = []
+
+    def _watching(self) -> bool:
+        return self.pid_cache is not None and bool(self.filter.package) and bool(self.filter.pid)
+
+    def start(self):
+        targets = [(self._read_loop, 'reader'), (self._flush_loop, 'flusher')]
+        if self._watching():
+            self.pid_cache.add_listener(self._on_process_event)
+            targets.append((self._watch_loop, 'watcher'))
+        for target, name in targets:
+            t = threading.Thread(target=target, name=f"logcat-{name}-{self.device.serial}")
+            t.daemon = True
+            t.start()
+            self._threads.append(t)
+
+    def stop(self):
+        self._stopped.set()
+        if self.pid_cache is not None:
+            self.pid_cache.remove_listener(self._on_process_event)
+        stream = self._stream
+        if stream is not None:
+            try:
+                stream.close()
+            except Exception:
+                pass
+        with self._cond:
+            self._cond.notify_all()
+        for t in self._threads:
+            if t is not threading.current_thread():
+                t.join(timeout=5)
+
+    def is_alive(self) -> bool:
+        return not self._stopped.is_set() and any(t.is_alive() for t in self._threads)
+
+    def stats(self) -> dict:
+        return {
+            'received': self.received,
+            'delivered': self.delivered,
+            'dropped': self.dropped,
+            'buffered': len(self._buffer),
+        }
+
+    def _command(self) -> str:
+        return ' '.join(['logcat', '-v', 'threadtime'] + self.filter.options() + self.filter.filterspecs())
+
+    def _parse(self, line: str) -> Optional[dict]:
+        entry = parse_line(line)
+        if entry is not None and self.filter.package:
+            entry['package'] = self.filter.package
+        return entry
+
+    def _put(self, entry: dict):
+        if self.sink is not None:
+            self.sink(entry)
+        with self._cond:
+            if len(self._buffer) == self.capacity:
+                self.dropped += 1
+            self._buffer.append(entry)
+            self.received += 1
+            if len(self._buffer) >= self.batch_size:
+                self._cond.notify()
+
+    def _watch_loop(self):
+        # PidCache 只在被查询时发现进程重启，这里定期查询以触发重启事件
+        while not self._stopped.wait(self.watch_interval):
+            try:
+                self.pid_cache.get_pid(self.filter.package)
+            except Exception as e:
+                logger.error(f"检查 {self.filter.package} 进程失败: {e}")
+
+    def _on_process_event(self, event: dict):
+        if event['process'] != self.filter.package or not event['pid'] or event['pid'] == self.filter.pid:
+            return
+        logger.info(f"{self.filter.package} restarted, following logcat of pid {event['pid']}")
+        self.filter.pid = event['pid']
+        self._restart.set()
+        stream = self._stream
+        if stream is not None:
+            try:
+                stream.close()
+            except Exception:
+                pass
+
+    def _read_loop(self):
+        try:
+            if self.clear:
+                self.device.shell("logcat --clear")
+            while not self._stopped.is_set():
+                self._restart.clear()
+                self._stream = self.device.shell(self._command(), stream=True)
+                try:
+                    with self._stream:
+                        self._read_stream(self._stream)
+                except Exception:
+                    if not self._restart.is_set():
+                        raise
+                # 只有应用重启导致的关闭才以新的 --pid 重新读取
+                if not self._restart.is_set():
+                    break
+        except Exception as e:
+            if not self._stopped.is_set():
+                logger.error(f"获取 logcat 日志失败: {e}")
+        finally:
+            self._stopped.set()
+            with self._cond:
+                self._cond.notify_all()
+
+    def _read_stream(self, stream):
+        f = stream.conn.makefile(encoding='utf-8', errors='replace')
+        while not self._stopped.is_set():
+            line = f.readline()
+            if not line:
+                break
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                entry = self._parse(line)
+            except Exception as e:
+                logger.error(f"解析 logcat 行时出错: {e}")
+                continue
+            if entry is not None:
+                self._put(entry)
+
+    def _flush_loop(self):
+        while True:
+            with self._cond:
+                # 攒满一批或时间窗口到期时推送
+                deadline = time.monotonic() + self.flush_interval
+                while len(self._buffer) < self.batch_size and not self._stopped.is_set():
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self._cond.wait(remaining)
+                batch = [self._buffer.popleft() for _ in range(min(len(self._buffer), self.batch_size))]
+                finished = self._stopped.is_set() and not self._buffer
+            if batch:
+                self.delivered += len(batch)
+                try:
+                    self.on_batch(batch, self.stats())
+                except Exception as e:
+                    logger.error(f"推送 logcat 日志失败: {e}")
+            if finished:
+                break
+
+
+class BinaryLogcatReader(LogcatReader):
+    """
+    读取 logcat -B 二进制格式，直接解码 logger_entry 头，省去设备端文本格式化和主机端再次切分。
+
+    Android 7 起非交互 shell 不再经过 pty，二进制数据不会被换行转换。
+    -e 正则在二进制模式下不被 logcat 执行，因此在主机端匹配。
+    """
+
+    def _command(self) -> str:
+        return ' '.join(['logcat', '-B'] + self.filter.options(with_regex=False) + self.filter.filterspecs())
+
+    def _read_stream(self, stream):
+        f = stream.conn.makefile('rb')
+        while not self._stopped.is_set():
+            header = f.read(ENTRY_HEADER.size)
+            if len(header) < ENTRY_HEADER.size:
+                break
+            length, hdr_size, pid, tid, sec, nsec = ENTRY_HEADER.unpack(header)
+            # v1 的 hdr_size 字段为填充 0，头长度固定 20 字节
+            extra = hdr_size - ENTRY_HEADER.size if hdr_size else 0
+            ext = f.read(extra) if extra > 0 else b''
+            payload = f.read(length)
+            if len(payload) < length or len(ext) < extra:
+                break
+            log_id = struct.unpack_from('<I', ext)[0] if len(ext) >= 4 else 0
+            if log_id in BINARY_LOG_IDS:
+                continue
+            try:
+                entry = self._decode(pid, tid, sec, nsec, payload)
+            except Exception as e:
+                logger.error(f"解析 logcat 二进制日志出错: {e}")
+                continue
+            if entry is not None:
+                self._put(entry)
+
+    def _decode(self, pid: int, tid: int, sec: int, nsec: int, payload: bytes) -> Optional[dict]:
+        if not payload:
+            return None
+        level = PRIORITY_LEVELS.get(payload[0], 'V')
+        tag, _, message = payload[1:].partition(b'\0')
+        tag = tag.decode('utf-8', errors='replace')
+        message = message.rstrip(b'\0').decode('utf-8', errors='replace')
+        if self.filter.pattern and not self.filter.pattern.search(message):
+            return None
+        return {
+            'timestamp': time.strftime('%m-%d %H:%M:%S', time.localtime(sec)) + f'.{nsec // 1000000:03d}',
+            'time': sec + nsec / 1e9,
+            'processId': f"{pid}-{tid}",
+            'level': level,
+            'message': f"{tag}: {message}",
+            'component': tag,
+            'package': self.filter.package or 'system'
+        }
+
+
+class LogcatManager:
+    """
+    保证每台设备只有一个 logcat 读取管道
+    """
+
+    def __init__(self):
+        self.readers: Dict[str, LogcatReader] = {}
+        self._lock = threading.Lock()
+
+    def start(self, device: AdbDevice, on_batch: Callable[[list, dict], None],
+              log_filter: LogcatFilter = None, binary: bool = False, **kwargs) -> LogcatReader:
+        """
+        启动设备的 logcat 读取；过滤条件或格式未变化时复用正在运行的读取管道，并替换其回调与 sink
+        """
+        log_filter = log_filter or LogcatFilter()
+        reader_cls = BinaryLogcatReader if binary else LogcatReader
+        with self._lock:
+            reader = self.readers.get(device.serial)
+            if reader is not None and reader.is_alive():
+                if type(reader) is reader_cls and reader.filter.key() == log_filter.key():
+                    # 回调与 sink（如是否写入归档）可能变化，原地替换，读取管道不重启
+                    reader.on_batch = on_batch
+                    if 'sink' in kwargs:
+                        reader.sink = kwargs['sink']
+                    return reader
+                reader.stop()
+            reader = reader_cls(device, on_batch, log_filter, **kwargs)
+            self.readers[device.serial] = reader
+            reader.start()
+            logger.info(f"Logcat reader started for {device.serial}")
+            return reader
+
+    def stop(self, serial: str = None) -> bool:
+        with self._lock:
+            if serial is None:
+                readers = list(self.readers.values())
+                self.readers.clear()
+            else:
+                reader = self.readers.pop(serial, None)
+                readers = [reader] if reader else []
+        for reader in readers:
+            reader.stop()
+            logger.info(f"Logcat reader stopped for {reader.device.serial}")
+        return len(readers) > 0
+
+    def stats(self, serial: str) -> dict:
+        reader = self.readers.get(serial)
+        return reader.stats() if reader else {}
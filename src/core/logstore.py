@@ -0,0 +1,273 @@
+# !/usr/bin/env python
+# -*- coding:utf-8 -*-
+"""
+@Version  : Python 3.12
+@Software : PyCharm
+"""
+import heapq
+import itertools
+import threading
+from array import array
+from bisect import bisect_left, bisect_right
+from typing import Dict, Iterable, List
+
+from src.core.logcat import LEVELS
+
+
+class LogStore:
+    """
+    按列存储的内存日志库
+
+    每个字段一列（array / list），tag 与包名做字符串驻留；按级别、tag、pid 建倒排索引，
+    时间范围通过二分查找定位，分页查询从请求的一端惰性扫描命中索引的行，凑满一页即停止。
+    超过容量时整块淘汰最旧的日志。
+    """
+
+    __slots__ = ('capacity', 'base', 'times', 'pids', 'tids', 'levels', 'tag_ids', 'package_ids',
+                 'messages', 'timestamps', 'strings', 'string_ids', 'level_index', 'tag_index',
+                 'pid_index', '_lock')
+
+    def __init__(self, capacity: int = 1000000):
+        self.capacity = capacity
+        # 第一行的全局行号，行号在淘汰后保持不变
+        self.base = 0
+        self.times = array('d')
+        self.pids = array('i')
+        self.tids = array('i')
+        self.levels = bytearray()
+        self.tag_ids = array('I')
+        self.package_ids = array('I')
+        self.messages: List[str] = []
+        self.timestamps: List[str] = []
+        self.strings: List[str] = []
+        self.string_ids: Dict[str, int] = {}
+        self.level_index: Dict[int, array] = {}
+        self.tag_index: Dict[int, array] = {}
+        self.pid_index: Dict[int, array] = {}
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.messages)
+
+    def _intern(self, value: str) -> int:
+        string_id = self.string_ids.get(value)
+        if string_id is None:
+            string_id = len(self.strings)
+            self.strings.append(value)
+            self.string_ids[value] = string_id
+        return string_id
+
+    def append(self, entry: dict):
+        self.extend([entry])
+
+    def extend(self, entries: Iterable[dict]):
+        with self._lock:
+            for entry in entries:
+                row = self.base + len(self.messages)
+                pid, _, tid = entry.get('processId', '0-0').partition('-')
+                pid = int(pid) if pid.isdigit() else 0
+                level = ord(entry.get('level', 'V')[:1] or 'V')
+                tag_id = self._intern(entry.get('component', 'unknown'))
+
+                self.times.append(entry.get('time', 0.0))
+                self.pids.append(pid)
+                self.tids.append(int(tid) if tid.isdigit() else 0)
+                self.levels.append(level)
+                self.tag_ids.append(tag_id)
+                self.package_ids.append(self._intern(entry.get('package', 'system')))
+                self.messages.append(entry.get('message', ''))
+                self.timestamps.append(entry.get('timestamp', ''))
+
+                self.level_index.setdefault(level, array('Q')).append(row)
+                self.tag_index.setdefault(tag_id, array('Q')).append(row)
+                self.pid_index.setdefault(pid, array('Q')).append(row)
+
+            if len(self.messages) > self.capacity:
+                self._evict(len(self.messages) - self.capacity + self.capacity // 10)
+
+    def _evict(self, count: int):
+        for column in (self.times, self.pids, self.tids, self.levels, self.tag_ids, self.package_ids,
+                       self.messages, self.timestamps):
+            del column[:count]
+        self.base += count
+        for index in (self.level_index, self.tag_index, self.pid_index):
+            for key in list(index):
+                rows = index[key]
+                del rows[:bisect_left(rows, self.base)]
+                if not rows:
+                    del index[key]
+
+    def clear(self):
+        with self._lock:
+            self.base += len(self.messages)
+            for column in (self.times, self.pids, self.tids, self.levels, self.tag_ids, self.package_ids,
+                           self.messages, self.timestamps):
+                del column[:]
+            self.level_index.clear()
+            self.tag_index.clear()
+            self.pid_index.clear()
+
+    def row(self, row: int) -> dict:
+        i = row - self.base
+        return {
+            'id': row,
+            'timestamp': self.timestamps[i],
+            'time': self.times[i],
+            'processId': f"{self.pids[i]}-{self.tids[i]}",
+            'level': chr(self.levels[i]),
+            'message': self.messages[i],
+            'component': self.strings[self.tag_ids[i]],
+            'package': self.strings[self.package_ids[i]],
+        }
+
+    def _candidates(self, log_filter: dict):
+        """
+        选出命中索引最少的过滤条件
+        :return: (条件数, 候选行号数组列表)，候选为 None 表示需要全表扫描
+        """
+        sources = []
+
+        if log_filter.get('level') or log_filter.get('minLevel'):
+            sources.append([self.level_index.get(ord(level), ()) for level in self._levels(log_filter)])
+
+        tag = log_filter.get('tag')
+        if tag:
+            if log_filter.get('tagExact'):
+                tag_ids = [self.string_ids[tag]] if tag in self.string_ids else []
+            else:
+                tag = tag.lower()
+                tag_ids = [i for i in self.tag_index if tag in self.strings[i].lower()]
+            sources.append([self.tag_index[i] for i in tag_ids])
+
+        if log_filter.get('pid'):
+            sources.append([self.pid_index.get(int(log_filter['pid']), ())])
+
+        conditions = len(sources) + bool(log_filter.get('text')) + bool(log_filter.get('package'))
+        if not sources:
+            return conditions, None
+        return conditions, min(sources, key=lambda lists: sum(len(rows) for rows in lists))
+
+    def _row_range(self, log_filter: dict):
+        """
+        时间范围对应的行号区间，日志按到达顺序追加，时间近似递增
+        """
+        start, end = 0, len(self.times)
+        if log_filter.get('start') is not None:
+            start = bisect_left(self.times, float(log_filter['start']))
+        if log_filter.get('end') is not None:
+            end = bisect_right(self.times, float(log_filter['end']))
+        return self.base + start, self.base + end
+
+    @staticmethod
+    def _iter_rows(sources: List[array], first: int, last: int, reverse: bool) -> tuple:
+        """
+        按行号顺序（或倒序）惰性遍历候选行，只访问 [first, last) 内的部分
+        :return: (迭代器, 区间内的候选行数)
+        """
+        iterators = []
+        count = 0
+        for rows in sources:
+            lo, hi = bisect_left(rows, first), bisect_left(rows, last)
+            count += hi - lo
+            positions = range(hi - 1, lo - 1, -1) if reverse else range(lo, hi)
+            iterators.append(map(rows.__getitem__, positions))
+        if len(iterators) == 1:
+            return iterators[0], count
+        return heapq.merge(*iterators, reverse=reverse), count
+
+    def query(self, log_filter: dict = None, offset: int = 0, limit: int = 100) -> dict:
+        """
+        分页查询
+
+        从请求的一端开始惰性遍历索引或候选行，收集到 offset + limit 条即停止，每页的代价与偏移量成正比，
+        与日志总量无关。只有单个索引条件或已遍历完全部候选行时 total 为精确值，否则按已遍历部分的命中率估算。
+        :param log_filter: 过滤条件：level(str|list)、minLevel、tag、tagExact、pid、package、text、start、end、reverse
+        :param offset: 偏移
+        :param limit: 每页条数
+        :return: {'total': 命中总数, 'exact': total 是否精确, 'more': 之后是否还有日志, 'offset': offset,
+                  'rows': 当前页日志}
+        """
+        log_filter = log_filter or {}
+        reverse = bool(log_filter.get('reverse'))
+        with self._lock:
+            first, last = self._row_range(log_filter)
+            conditions, sources = self._candidates(log_filter)
+            if conditions == 0:
+                # 只有时间范围时直接按行号分页
+                total = last - first
+                if reverse:
+                    page = range(last - 1 - offset, max(last - 1 - offset - limit, first - 1), -1)
+                else:
+                    page = range(first + offset, min(first + offset + limit, last))
+                return {'total': total, 'exact': True, 'more': offset + limit < total, 'offset': offset,
+                        'rows': [self.row(row) for row in page]}
+
+            if sources is None:
+                candidates = range(last - 1, first - 1, -1) if reverse else range(first, last)
+                candidate_count = last - first
+            else:
+                candidates, candidate_count = self._iter_rows(sources, first, last, reverse)
+            if conditions == 1 and sources is not None:
+                # 唯一的条件就是索引本身，候选行全部命中
+                total = candidate_count
+                page = list(itertools.islice(candidates, offset, offset + limit))
+                return {'total': total, 'exact': True, 'more': offset + limit < total, 'offset': offset,
+                        'rows': [self.row(row) for row in page]}
+
+            text = (log_filter.get('text') or '').lower()
+            package = (log_filter.get('package') or '').lower()
+            package_ids = {i for i, name in enumerate(self.strings) if package in name.lower()} if package else None
+            pid = int(log_filter['pid']) if log_filter.get('pid') else None
+            levels = None
+            if log_filter.get('level') or log_filter.get('minLevel'):
+                levels = {ord(level) for level in self._levels(log_filter)}
+            tag = log_filter.get('tag')
+
+            # 多取一条用于判断之后是否还有日志
+            wanted = offset + limit + 1
+            matched = []
+            scanned = 0
+            exhausted = True
+            for row in candidates:
+                scanned += 1
+                i = row - self.base
+                if levels is not None and self.levels[i] not in levels:
+                    continue
+                if pid is not None and self.pids[i] != pid:
+                    continue
+                if package_ids is not None and self.package_ids[i] not in package_ids:
+                    continue
+                if tag:
+                    name = self.strings[self.tag_ids[i]]
+                    if (name != tag) if log_filter.get('tagExact') else (tag.lower() not in name.lower()):
+                        continue
+                if text and text not in self.messages[i].lower():
+                    continue
+                matched.append(row)
+                if len(matched) >= wanted:
+                    exhausted = scanned >= candidate_count
+                    break
+
+            if exhausted:
+                total = len(matched)
+            else:
+                total = max(round(len(matched) * candidate_count / scanned), len(matched))
+            rows = [self.row(row) for row in matched[offset:offset + limit]]
+            return {'total': total, 'exact': exhausted, 'more': len(matched) > offset + limit, 'offset': offset,
+                    'rows': rows}
+
+    @staticmethod
+    def _levels(log_filter: dict) -> List[str]:
+        levels = log_filter.get('level')
+        if levels:
+            levels = [levels] if isinstance(levels, str) else levels
+            return [level.upper()[0] for level in levels]
+        return list(LEVELS[LEVELS.index(log_filter['minLevel'].upper()[0]):])
+
+    def stats(self) -> dict:
+        return {
+            'size': len(self.messages),
+            'first': self.base,
+            'tags': len(self.tag_index),
+            'pids': len(self.pid_index),
+        }
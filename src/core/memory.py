@@ -13,6 +13,23 @@ import traceback
 from adbutils import AdbDevice
 from loguru import logger
 
+from src.core.props import ADB_SHELL_TIMEOUT, PropertySnapshot
+
+# top 的 RES 列单位：无后缀为 KB
+RES_UNITS = {'K': 1 / 1024, 'M': 1, 'G': 1024, 'T': 1024 * 1024}
+
+
+def parse_top_res(value: str) -> float:
+    """
+    解析 top -o RES 的值（如 123M、1.2G、45678），单位转换为 MB
+    """
+    value = value.strip().upper()
+    if not value:
+        return 0.0
+    unit = RES_UNITS.get(value[-1])
+    if unit is None:
+        return round(float(value) / 1024, 1)
+    return round(float(value[:-1]) * unit, 1)
 
 
 class ParsMeminfo(object):
@@ -43,19 +60,39 @@ class MemoryMonitor:
         "TOTAL PSS": 0.0,
     }
 
-    def __init__(self, device: AdbDevice):
+    def __init__(self, device: AdbDevice, snapshot: PropertySnapshot = None, timeout: float = ADB_SHELL_TIMEOUT):
+        """
+        :param device: 设备
+        :param snapshot: 设备属性快照
+        :param timeout: shell 调用超时（秒）
+        """
         self.adb_device = device
+        self.snapshot = snapshot or PropertySnapshot(device)
+        self.timeout = timeout
 
-    def get_mem_info(self, pid: int, sdk_version: int, package_name: str = None):
+    def get_mem_info(self, pid: int, sdk_version: int = None, package_name: str = None):
+        if sdk_version is None:
+            sdk_version = self.snapshot.sdk_version
         if sdk_version >= 25:
-            mem_info = self.adb_device.shell(f"top -n 1 -p {pid} -o RES -b -q")
+            mem_info = self.adb_device.shell(f"top -n 1 -p {pid} -o RES -b -q", timeout=self.timeout)
             mem_info = mem_info.strip()
             logger.info("当前获取到的mem信息是{}".format(mem_info))
-            return mem_info
+            if not pid or not mem_info:
+                return None
+            try:
+                res = parse_top_res(mem_info.split()[-1])
+            except ValueError:
+                logger.error(f"解析内存数据失败: {mem_info}")
+                return None
+            # 与 dumpsys 的结果保持同样的结构，top 只有常驻内存，明细项为 0
+            mem_data = copy.deepcopy(self.MEM_DATA_TEMPLATE)
+            mem_data["TOTAL PSS"] = res
+            return {package_name or str(pid): mem_data}
         else:
             if package_name is None:
                 raise ValueError("package_name is None")
-            out = self.adb_device.shell(f"dumpsys meminfo --local -s --package {package_name}")
+            out = self.adb_device.shell(f"dumpsys meminfo --local -s --package {package_name}",
+                                       timeout=self.timeout)
             if out.startswith("No Process"):
                 return None
             mem_map = {}
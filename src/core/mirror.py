@@ -0,0 +1,445 @@
+# !/usr/bin/env python
+# -*- coding:utf-8 -*-
+"""
+@Version  : Python 3.12
+@Software : PyCharm
+"""
+import json
+import struct
+import threading
+import time
+from collections import deque
+from typing import BinaryIO, Callable, List, Optional
+
+from adbutils import AdbDevice
+from loguru import logger
+
+START_CODE = b'\x00\x00\x01'
+
+# NAL 类型
+NAL_SLICE = 1
+NAL_IDR = 5
+NAL_SEI = 6
+NAL_SPS = 7
+NAL_PPS = 8
+NAL_AUD = 9
+
+# screenrecord 在该时间内退出视为启动失败，连续失败 RESTART_ATTEMPTS 次后放弃
+RESTART_MIN_SECONDS = 1.0
+RESTART_ATTEMPTS = 3
+
+# /frames 中每帧的头：帧长度（4 字节大端）与是否关键帧（1 字节）
+FRAME_HEADER = struct.Struct('>IB')
+
+# 与流地址同源的播放页，无需 CORS
+VIEWER_HTML = """<!doctype html>
+<html>
+<head>
+<meta charset="utf-8">
+<style>
+html, body { margin: 0; height: 100%; background: #000; }
+canvas { display: block; width: 100%; height: 100%; object-fit: contain; }
+</style>
+</head>
+<body>
+<canvas id="screen"></canvas>
+<script>
+const canvas = document.getElementById("screen");
+const context = canvas.getContext("2d");
+let decoder = null;
+let timestamp = 0;
+
+// 从 SPS 的 profile_idc、constraint_flags、level_idc 生成 avc1 编码字符串
+function codecOf(data) {
+  for (let i = 0; i + 6 < data.length; i++) {
+    if (data[i] === 0 && data[i + 1] === 0 && data[i + 2] === 1 && (data[i + 3] & 0x1f) === 7) {
+      const hex = (b) => b.toString(16).padStart(2, "0");
+      return "avc1." + hex(data[i + 4]) + hex(data[i + 5]) + hex(data[i + 6]);
+    }
+  }
+  return null;
+}
+
+function createDecoder(codec) {
+  const created = new VideoDecoder({
+    output: (frame) => {
+      if (canvas.width !== frame.displayWidth || canvas.height !== frame.displayHeight) {
+        canvas.width = frame.displayWidth;
+        canvas.height = frame.displayHeight;
+      }
+      context.drawImage(frame, 0, 0);
+      frame.close();
+    },
+    error: (e) => {
+      console.error("mirror decode error", e);
+      decoder = null;
+    },
+  });
+  created.configure({ codec, optimizeForLatency: true });
+  return created;
+}
+
+function decode(data, keyframe) {
+  if (keyframe) {
+    const codec = codecOf(data);
+    if (codec && (!decoder || decoder.state === "closed")) {
+      decoder = createDecoder(codec);
+    }
+  }
+  // 解码器出错后等待下一个关键帧
+  if (!decoder || decoder.state !== "configured") return;
+  timestamp += 1;
+  decoder.decode(new EncodedVideoChunk({ type: keyframe ? "key" : "delta", timestamp, data }));
+}
+
+async function run() {
+  const response = await fetch("frames");
+  const reader = response.body.getReader();
+  let buffer = new Uint8Array(0);
+  for (;;) {
+    const { done, value } = await reader.read();
+    if (done) break;
+    const merged = new Uint8Array(buffer.length + value.length);
+    merged.set(buffer);
+    merged.set(value, buffer.length);
+    buffer = merged;
+    let offset = 0;
+    while (buffer.length - offset >= 5) {
+      const view = new DataView(buffer.buffer, offset, 5);
+      const length = view.getUint32(0);
+      if (buffer.length - offset - 5 < length) break;
+      decode(buffer.slice(offset + 5, offset + 5 + length), view.getUint8(4) === 1);
+      offset += 5 + length;
+    }
+    buffer = buffer.slice(offset);
+  }
+}
+
+run().catch((e) => console.error("mirror stream error", e));
+</script>
+</body>
+</html>
+"""
+
+
+class AccessUnitParser:
+    """
+    把 Annex-B 格式的 H.264 字节流切分为访问单元（一帧）
+    """
+
+    def __init__(self):
+        self._buffer = bytearray()
+        self._nals: List[bytes] = []
+        self._has_vcl = False
+
+    def feed(self, data: bytes) -> List[List[bytes]]:
+        """
+        输入字节流
+        :return: 已完整的访问单元列表，每个访问单元是带起始码的 NAL 列表
+        """
+        self._buffer += data
+        units = []
+        start = self._buffer.find(START_CODE)
+        while start >= 0:
+            end = self._buffer.find(START_CODE, start + 3)
+            if end < 0:
+                break
+            # 四字节起始码 00 00 00 01 的首个 0 属于上一个 NAL 的末尾
+            nal_end = end - 1 if self._buffer[end - 1] == 0 else end
+            unit = self._push(bytes(self._buffer[start:nal_end]))
+            if unit:
+                units.append(unit)
+            start = end
+        if start > 0:
+            del self._buffer[:start]
+        return units
+
+    def flush(self) -> List[List[bytes]]:
+        """
+        流结束时取出剩余的访问单元
+        """
+        units = []
+        start = self._buffer.find(START_CODE)
+        if start >= 0:
+            unit = self._push(bytes(self._buffer[start:]))
+            if unit:
+                units.append(unit)
+        self._buffer.clear()
+        # 末尾没有图像数据的参数集无法单独解码，丢弃
+        if self._nals and self._has_vcl:
+            units.append(self._nals)
+        self._nals, self._has_vcl = [], False
+        return units
+
+    def _push(self, nal: bytes) -> Optional[List[bytes]]:
+        if len(nal) < 4:
+            return None
+        nal_type = nal[3] & 0x1f
+        is_vcl = NAL_SLICE <= nal_type <= NAL_IDR
+        # first_mb_in_slice == 0 时 ue(v) 的首位为 1，表示新的一帧
+        new_frame = is_vcl and len(nal) > 4 and nal[4] & 0x80
+        starts_unit = nal_type in (NAL_AUD, NAL_SPS, NAL_PPS, NAL_SEI) or new_frame
+        unit = None
+        if self._has_vcl and starts_unit:
+            unit, self._nals, self._has_vcl = self._nals, [], False
+        self._nals.append(b'\x00' + nal)
+        self._has_vcl = self._has_vcl or is_vcl
+        return unit
+
+
+class Frame:
+    __slots__ = ('data', 'keyframe', 'received')
+
+    def __init__(self, nals: List[bytes]):
+        self.data = b''.join(nals)
+        self.keyframe = any(nal[4] & 0x1f in (NAL_IDR, NAL_SPS) for nal in nals)
+        self.received = time.monotonic()
+
+
+class Subscriber:
+    """
+    单个消费者的有界帧队列
+
+    队列满时丢弃积压并等待下一个关键帧，避免解码器拿到缺少参考帧的 P 帧。
+    """
+
+    def __init__(self, capacity: int):
+        self.capacity = capacity
+        self.frames = deque()
+        self.dropped = 0
+        self.waiting_keyframe = False
+        self.cond = threading.Condition()
+        self.closed = False
+
+    def put(self, frame: Frame):
+        with self.cond:
+            if self.waiting_keyframe and not frame.keyframe:
+                self.dropped += 1
+                return
+            if len(self.frames) >= self.capacity:
+                self.dropped += len(self.frames)
+                self.frames.clear()
+                if not frame.keyframe:
+                    self.waiting_keyframe = True
+                    self.dropped += 1
+                    return
+            self.waiting_keyframe = False
+            self.frames.append(frame)
+            self.cond.notify()
+
+    def get(self, timeout: float = 1.0) -> Optional[Frame]:
+        with self.cond:
+            if not self.frames and not self.closed:
+                self.cond.wait(timeout)
+            return self.frames.popleft() if self.frames else None
+
+    def close(self):
+        with self.cond:
+            self.closed = True
+            self.cond.notify_all()
+
+
+class ScreenMirror:
+    """
+    基于 screenrecord --output-format=h264 的实时投屏
+
+    读取线程把 H.264 流切分为访问单元并分发给各消费者（本地 HTTP 连接），
+    缓存最近一个 GOP 以便新连接从关键帧开始解码。screenrecord 到达时长上限退出后自动重启，消费者保持连接。
+    """
+
+    def __init__(self, device: AdbDevice, bit_rate: int = 8000000, size: str = None,
+                 queue_size: int = 30, source: Callable[[], BinaryIO] = None):
+        """
+        :param device: 设备
+        :param bit_rate: 码率
+        :param size: 分辨率，如 "720x1280"
+        :param queue_size: 每个消费者最多缓存的帧数
+        :param source: 返回 H.264 字节流的工厂函数，测试时可替换为假数据流
+        """
+        self.device = device
+        self.bit_rate = bit_rate
+        self.size = size
+        self.queue_size = queue_size
+        self.source = source or self._screenrecord
+        self.frames = 0
+        self.bytes = 0
+        self.restarts = 0
+        self._stream = None
+        self._gop: List[Frame] = []
+        self._subscribers: List[Subscriber] = []
+        self._frame_times = deque(maxlen=120)
+        self._latencies = deque(maxlen=120)
+        self._lock = threading.Lock()
+        self._stopped = threading.Event()
+        self._thread: threading.Thread = None
+
+    def _screenrecord(self) -> BinaryIO:
+        command = f"screenrecord --output-format=h264 --bit-rate {int(self.bit_rate)}"
+        if self.size:
+            command += f" --size {self.size}"
+        self._stream = self.device.shell(command + " -", stream=True)
+        return self._stream.conn.makefile('rb')
+
+    def start(self):
+        self._thread = threading.Thread(target=self._read_loop, name=f"mirror-{self.device.serial}")
+        self._thread.daemon = True
+        self._thread.start()
+
+    def stop(self):
+        self._stopped.set()
+        if self._stream is not None:
+            try:
+                self._stream.close()
+            except Exception:
+                pass
+        if self._thread and self._thread is not threading.current_thread():
+            self._thread.join(timeout=5)
+        with self._lock:
+            for subscriber in self._subscribers:
+                subscriber.close()
+
+    def is_alive(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def _read_loop(self):
+        failures = 0
+        try:
+            while not self._stopped.is_set():
+                started = time.monotonic()
+                self._read_stream()
+                if self._stopped.is_set():
+                    break
+                # screenrecord 到达时长上限（通常 180 秒）后自行退出，重新启动并保留已连接的消费者；
+                # 新的流以 SPS/PPS 和关键帧开头，解码器可以直接接上
+                failures = failures + 1 if time.monotonic() - started < RESTART_MIN_SECONDS else 0
+                if failures >= RESTART_ATTEMPTS:
+                    logger.error(f"投屏进程连续 {failures} 次启动后立即退出，停止投屏")
+                    break
+                logger.info(f"screenrecord exited, restarting mirror for {self.device.serial}")
+                self.restarts += 1
+        except Exception as e:
+            if not self._stopped.is_set():
+                logger.error(f"投屏读取失败: {e}")
+        finally:
+            self._stopped.set()
+            with self._lock:
+                for subscriber in self._subscribers:
+                    subscriber.close()
+            logger.info(f"Mirror stopped for {self.device.serial}")
+
+    def _read_stream(self):
+        """
+        读取一次 screenrecord 的输出直到 EOF
+        """
+        parser = AccessUnitParser()
+        f = self.source()
+        try:
+            while not self._stopped.is_set():
+                chunk = f.read1(65536) if hasattr(f, 'read1') else f.read(65536)
+                if not chunk:
+                    break
+                self.bytes += len(chunk)
+                for unit in parser.feed(chunk):
+                    self._publish(Frame(unit))
+            for unit in parser.flush():
+                self._publish(Frame(unit))
+        finally:
+            if self._stream is not None:
+                try:
+                    self._stream.close()
+                except Exception:
+                    pass
+
+    def _publish(self, frame: Frame):
+        self.frames += 1
+        self._frame_times.append(frame.received)
+        with self._lock:
+            if frame.keyframe:
+                self._gop = [frame]
+            elif self._gop and len(self._gop) < 600:
+                self._gop.append(frame)
+            else:
+                self._gop = []
+            for subscriber in self._subscribers:
+                subscriber.put(frame)
+
+    def subscribe(self) -> Subscriber:
+        subscriber = Subscriber(self.queue_size)
+        with self._lock:
+            # 新连接从最近的关键帧开始，GOP 超过队列容量时等待下一个关键帧
+            if self._gop and len(self._gop) <= self.queue_size:
+                subscriber.frames.extend(self._gop)
+            else:
+                subscriber.waiting_keyframe = True
+            self._subscribers.append(subscriber)
+        return subscriber
+
+    def unsubscribe(self, subscriber: Subscriber):
+        with self._lock:
+            if subscriber in self._subscribers:
+                self._subscribers.remove(subscriber)
+        subscriber.close()
+
+    def stats(self) -> dict:
+        times = list(self._frame_times)
+        fps = 0.0
+        if len(times) > 1 and times[-1] > times[0]:
+            fps = round((len(times) - 1) / (times[-1] - times[0]), 1)
+        latencies = list(self._latencies)
+        with self._lock:
+            dropped = sum(s.dropped for s in self._subscribers)
+            subscribers = len(self._subscribers)
+        return {
+            'running': self.is_alive(),
+            'frames': self.frames,
+            'bytes': self.bytes,
+            'fps': fps,
+            'latencyMs': round(sum(latencies) / len(latencies) * 1000, 1) if latencies else 0.0,
+            'dropped': dropped,
+            'subscribers': subscribers,
+            'restarts': self.restarts,
+        }
+
+    def serve(self, handler, path: str):
+        """
+        LocalServer 路由处理：空路径输出 video/h264 字节流（可用 ffplay 等播放器打开），
+        /frames 输出带长度前缀的帧，/view 输出用 WebCodecs 解码 /frames 的播放页，/stats 输出统计信息
+        """
+        if path in ('/stats', '/view'):
+            if path == '/stats':
+                body, content_type = json.dumps(self.stats()).encode('utf-8'), 'application/json'
+            else:
+                body, content_type = VIEWER_HTML.encode('utf-8'), 'text/html; charset=utf-8'
+            handler.send_response(200)
+            handler.send_header('Content-Type', content_type)
+            handler.send_header('Content-Length', str(len(body)))
+            handler.end_headers()
+            if handler.command != 'HEAD':
+                handler.wfile.write(body)
+            return
+        if path not in ('', '/frames'):
+            handler.send_error(404)
+            return
+
+        framed = path == '/frames'
+        handler.send_response(200)
+        handler.send_header('Content-Type', 'application/octet-stream' if framed else 'video/h264')
+        handler.send_header('Cache-Control', 'no-store')
+        handler.send_header('Connection', 'close')
+        handler.end_headers()
+        handler.close_connection = True
+        if handler.command == 'HEAD':
+            return
+        subscriber = self.subscribe()
+        try:
+            while not subscriber.closed or subscriber.frames:
+                frame = subscriber.get()
+                if frame is None:
+                    continue
+                if framed:
+                    handler.wfile.write(FRAME_HEADER.pack(len(frame.data), frame.keyframe))
+                handler.wfile.write(frame.data)
+                handler.wfile.flush()
+                self._latencies.append(time.monotonic() - frame.received)
+        finally:
+            self.unsubscribe(subscriber)
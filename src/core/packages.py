@@ -0,0 +1,460 @@
+# !/usr/bin/env python
+# -*- coding:utf-8 -*-
+"""
+@Version  : Python 3.12
+@Software : PyCharm
+"""
+import json
+import os
+import posixpath
+import re
+import shlex
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Dict, List, Optional
+
+from adbutils import AdbDevice
+from loguru import logger
+
+PACKAGE_CACHE_DIR = "cache/packages"
+
+RE_PACKAGE = re.compile(r'^\s*Package \[([^\]]+)\]')
+RE_FIELD = re.compile(r'(\w+)=(\S+)')
+RE_LIST_PACKAGE = re.compile(r'^package:(\S+)')
+RE_LIST_FIELD = re.compile(r'(versionCode|uid):(\d+)')
+RE_USER_STATE = re.compile(r'^\s*User 0:.*?\benabled=(\d)')
+RE_DISKSTATS = re.compile(r'^(Package Names|App Sizes|App Data Sizes|Cache Sizes): (\[.*\])$')
+
+# PackageManager.COMPONENT_ENABLED_STATE_*，0 默认、1 启用，其余均为禁用
+ENABLED_STATES = ('0', '1')
+
+# 批量操作 -> shell 命令模板
+PACKAGE_ACTIONS = {
+    'start': 'monkey -p {package} -c android.intent.category.LAUNCHER 1',
+    'stop': 'am force-stop {package}',
+    'clear': 'pm clear {package}',
+    'disable': 'pm disable-user {package}',
+    'enable': 'pm enable {package}',
+    'uninstall': 'pm uninstall {package}',
+}
+BULK_MARKER = '@@BULK'
+# 增量刷新依次尝试的列表命令：--show-versioncode 需要 Android 9，-U 需要 Android 8
+LIST_COMMANDS = (
+    'pm list packages -f -U --show-versioncode',
+    'pm list packages -f -U',
+    'pm list packages -f',
+)
+# 单次 shell 命令的字节上限，旧版本 adbd 的一个数据包最大 4096 字节
+BULK_SCRIPT_BYTES = 4000
+
+SORT_KEYS = {
+    'packageName': lambda p: p['packageName'],
+    'versionName': lambda p: p.get('versionName') or '',
+    'installTime': lambda p: p.get('installTime') or 0,
+    'updateTime': lambda p: p.get('updateTime') or 0,
+    'codeSize': lambda p: p.get('codeSize') or 0,
+    'dataSize': lambda p: p.get('dataSize') or 0,
+    'totalSize': lambda p: (p.get('codeSize') or 0) + (p.get('dataSize') or 0) + (p.get('cacheSize') or 0),
+}
+
+
+def _parse_time(value: str) -> float:
+    try:
+        return datetime.strptime(value, "%Y-%m-%d %H:%M:%S").timestamp()
+    except ValueError:
+        return 0.0
+
+
+def parse_dumpsys_packages(output: str) -> Dict[str, dict]:
+    """
+    解析 dumpsys package 输出中的 Package [...] 块
+    :return: {包名: 元数据}
+    """
+    packages = {}
+    current = None
+    in_packages = False
+    for line in output.splitlines():
+        # 只解析 Packages: 段，跳过 Hidden system packages: 等重复段
+        if line and not line[0].isspace():
+            in_packages = line.startswith('Packages:')
+            current = None
+            continue
+        if not in_packages:
+            continue
+        match = RE_PACKAGE.match(line)
+        if match:
+            current = {
+                'packageName': match.group(1),
+                'versionCode': 0,
+                'versionName': '',
+                'uid': None,
+                'enabled': True,
+                'isSystem': False,
+                'installTime': 0.0,
+                'updateTime': 0.0,
+                'codePath': '',
+                'apkPaths': [],
+                'splits': [],
+            }
+            packages[current['packageName']] = current
+            continue
+        if current is None:
+            continue
+        stripped = line.strip()
+        if stripped.startswith('flags=['):
+            current['isSystem'] = ' SYSTEM ' in stripped + ' '
+        elif stripped.startswith('firstInstallTime='):
+            current['installTime'] = _parse_time(stripped.split('=', 1)[1])
+        elif stripped.startswith('lastUpdateTime='):
+            current['updateTime'] = _parse_time(stripped.split('=', 1)[1])
+        elif stripped.startswith('versionName='):
+            current['versionName'] = stripped.split('=', 1)[1]
+        elif stripped.startswith('splits=['):
+            current['splits'] = [s.strip() for s in stripped[len('splits=['):-1].split(',') if s.strip()]
+        elif stripped.startswith(('userId=', 'appId=', 'codePath=', 'versionCode=')):
+            for key, value in RE_FIELD.findall(stripped):
+                if key in ('userId', 'appId'):
+                    current['uid'] = int(value)
+                elif key == 'codePath':
+                    current['codePath'] = value
+                elif key == 'versionCode':
+                    current['versionCode'] = int(value)
+        else:
+            match = RE_USER_STATE.match(line)
+            if match:
+                current['enabled'] = match.group(1) in ENABLED_STATES
+
+    for package in packages.values():
+        code_path = package['codePath']
+        if code_path.endswith('.apk'):
+            package['apkPaths'] = [code_path]
+        elif code_path:
+            package['apkPaths'] = [f"{code_path}/base.apk"] + [
+                f"{code_path}/split_{split}.apk" for split in package['splits'] if split != 'base']
+    return packages
+
+
+def parse_diskstats(output: str) -> Dict[str, dict]:
+    """
+    解析 dumpsys diskstats 中按包统计的大小（Android 8.0 起）
+    :return: {包名: {codeSize, dataSize, cacheSize}}
+    """
+    arrays = {}
+    for line in output.splitlines():
+        match = RE_DISKSTATS.match(line.strip())
+        if match:
+            try:
+                arrays[match.group(1)] = json.loads(match.group(2))
+            except ValueError:
+                pass
+    names = arrays.get('Package Names', [])
+
+    def column(key: str) -> list:
+        values = arrays.get(key, [])
+        return values + [None] * (len(names) - len(values))
+
+    sizes = {}
+    for name, code_size, data_size, cache_size in zip(names, column('App Sizes'), column('App Data Sizes'),
+                                                      column('Cache Sizes')):
+        sizes[name] = {'codeSize': code_size, 'dataSize': data_size, 'cacheSize': cache_size}
+    return sizes
+
+
+def parse_package_list(output: str) -> Dict[str, tuple]:
+    """
+    解析 pm list packages -f -U --show-versioncode，每行形如 package:<apk 路径>=<包名> versionCode:.. uid:..
+    :return: {包名: (versionCode, uid, apk 路径)}，旧版本不输出的字段为 None
+    """
+    packages = {}
+    for line in output.splitlines():
+        match = RE_LIST_PACKAGE.match(line.strip())
+        if not match:
+            continue
+        # 路径中可能含有 =（如 /data/app/~~xxx==/），包名在最后一个 = 之后
+        path, _, name = match.group(1).rpartition('=')
+        fields = dict(RE_LIST_FIELD.findall(line))
+        version_code = int(fields['versionCode']) if 'versionCode' in fields else None
+        uid = int(fields['uid']) if 'uid' in fields else None
+        packages[name] = (version_code, uid, path)
+    return packages
+
+
+def _same_code_path(apk_path: str, code_path: str) -> bool:
+    """
+    pm list packages -f 给出 apk 文件，dumpsys 的 codePath 通常是其所在目录，旧版本单 apk 时是文件本身
+    """
+    return apk_path == code_path or posixpath.dirname(apk_path) == code_path
+
+
+class PackageIndex:
+    """
+    按设备的应用元数据索引
+
+    首次用一次 dumpsys package 与 dumpsys diskstats 批量建立索引并缓存到主机；
+    之后对比 pm list packages -f -U --show-versioncode（旧版本退回不带版本号的命令），
+    只重新读取新增、版本或安装路径变化的应用；同版本覆盖安装时 codePath 会变化，据此刷新 apk 路径、更新时间与大小。
+    """
+
+    def __init__(self, device: AdbDevice, directory: str = PACKAGE_CACHE_DIR, ttl: float = 60.0):
+        """
+        :param device: 设备
+        :param directory: 主机缓存目录
+        :param ttl: 距上次刷新超过该秒数时，查询前先增量刷新
+        """
+        self.device = device
+        self.ttl = ttl
+        filename = re.sub(r'[^\w.-]', '_', device.serial)
+        self.path = os.path.join(directory, f"{filename}.json")
+        self.packages: Dict[str, dict] = {}
+        self.refreshed = 0.0
+        self._lock = threading.RLock()
+        self._load()
+
+    def _load(self):
+        if not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                self.packages = json.load(f).get('packages', {})
+            logger.info(f"Loaded {len(self.packages)} cached packages from {self.path}")
+        except Exception as e:
+            logger.error(f"读取应用缓存失败: {e}")
+
+    def _save(self):
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        tmp = self.path + '.tmp'
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump({'serial': self.device.serial, 'saved': time.time(), 'packages': self.packages},
+                      f, ensure_ascii=False)
+        os.replace(tmp, self.path)
+
+    def _disabled(self) -> set:
+        output = self.device.shell('pm list packages -d')
+        return {match.group(1) for match in map(RE_LIST_PACKAGE.match, output.splitlines()) if match}
+
+    def _apply_sizes(self, packages: Dict[str, dict]):
+        sizes = parse_diskstats(self.device.shell('dumpsys diskstats'))
+        for name, package in packages.items():
+            package.update(sizes.get(name, {'codeSize': None, 'dataSize': None, 'cacheSize': None}))
+
+    def build(self):
+        """
+        全量建立索引
+        """
+        started = time.perf_counter()
+        packages = parse_dumpsys_packages(self.device.shell('dumpsys package packages'))
+        self._apply_sizes(packages)
+        with self._lock:
+            self.packages = packages
+            self.refreshed = time.monotonic()
+            self._save()
+        logger.info(f"Built package index for {self.device.serial}: {len(packages)} packages, "
+                    f"{round(time.perf_counter() - started, 2)}s")
+
+    def refresh(self, force: bool = False) -> dict:
+        """
+        增量刷新
+        :param force: 忽略 ttl 立即刷新
+        :return: 新增、更新、删除的包名
+        """
+        with self._lock:
+            if not self.packages:
+                self.build()
+                return {'added': list(self.packages), 'updated': [], 'removed': []}
+            if not force and time.monotonic() - self.refreshed < self.ttl:
+                return {'added': [], 'updated': [], 'removed': []}
+
+            started = time.perf_counter()
+            listed = self._list_packages()
+            if not listed:
+                # 列表命令失败时保留缓存，不能把全部应用当作已卸载
+                logger.error(f"设备 {self.device.serial} 应用列表为空，跳过增量刷新")
+                return {'added': [], 'updated': [], 'removed': []}
+            added = [name for name in listed if name not in self.packages]
+            updated = [name for name, listing in listed.items()
+                       if name in self.packages and self._changed(self.packages[name], *listing)]
+            removed = [name for name in self.packages if name not in listed]
+            for name in removed:
+                del self.packages[name]
+
+            changed = added + updated
+            if changed:
+                # 一次 shell 依次输出变化应用的 dumpsys，避免逐个往返
+                names = ' '.join(shlex.quote(name) for name in changed)
+                output = self.device.shell(f'for p in {names}; do dumpsys package "$p"; done')
+                fresh = parse_dumpsys_packages(output)
+                self._apply_sizes(fresh)
+                self.packages.update({name: fresh[name] for name in changed if name in fresh})
+
+            disabled = self._disabled()
+            for name, package in self.packages.items():
+                package['enabled'] = name not in disabled
+            self.refreshed = time.monotonic()
+            self._save()
+        logger.info(f"Refreshed package index for {self.device.serial}: {len(added)} added, {len(updated)} updated, "
+                    f"{len(removed)} removed, {round(time.perf_counter() - started, 2)}s")
+        return {'added': added, 'updated': updated, 'removed': removed}
+
+    def _list_packages(self) -> Dict[str, tuple]:
+        """
+        依次尝试 LIST_COMMANDS，旧版本不支持的参数会报错或没有输出
+        :return: parse_package_list 的结果，全部失败时为空字典
+        """
+        for command in LIST_COMMANDS:
+            try:
+                listed = parse_package_list(self.device.shell(command))
+            except Exception as e:
+                logger.error(f"执行 {command} 失败: {e}")
+                continue
+            if listed:
+                return listed
+        return {}
+
+    @staticmethod
+    def _changed(package: dict, version_code: Optional[int], uid: Optional[int], apk_path: str) -> bool:
+        """
+        对比 pm list packages 的结果，判断缓存的元数据是否过期；旧版本没有输出的字段不参与比较
+        """
+        if version_code is not None and package.get('versionCode') != version_code:
+            return True
+        if uid is not None and package.get('uid') != uid:
+            return True
+        return bool(apk_path) and not _same_code_path(apk_path, package.get('codePath', ''))
+
+    def invalidate(self):
+        """
+        安装、卸载、启用、禁用后调用，下次查询时立即增量刷新
+        """
+        self.refreshed = 0.0
+
+    def query(self, search: str = '', system: bool = True, sort: str = 'packageName', reverse: bool = False,
+              offset: int = 0, limit: int = 0) -> dict:
+        """
+        查询索引
+        :param search: 包名或版本号子串，不区分大小写
+        :param system: 是否包含系统应用
+        :param sort: 排序字段，见 SORT_KEYS
+        :param reverse: 是否倒序
+        :param offset: 起始位置
+        :param limit: 条数，0 表示全部
+        :return: 包含 total 与 packages 的字典
+        """
+        search = search.lower()
+        with self._lock:
+            packages = [package for package in self.packages.values()
+                        if (system or not package.get('isSystem'))
+                        and (not search or search in package['packageName'].lower()
+                             or search in (package.get('versionName') or '').lower())]
+        packages.sort(key=SORT_KEYS.get(sort, SORT_KEYS['packageName']), reverse=reverse)
+        total = len(packages)
+        if limit:
+            packages = packages[offset:offset + limit]
+        elif offset:
+            packages = packages[offset:]
+        return {'total': total, 'packages': packages}
+
+
+def build_bulk_scripts(operations: List[tuple], budget: int = BULK_SCRIPT_BYTES) -> List[str]:
+    """
+    把 (序号, 包名, 操作) 列表拼成 shell 脚本，每个操作前后输出带 /proc/uptime 的标记用于计时
+    :param budget: 每个脚本的字节上限，超出时拆成多个脚本依次执行
+    :return: 脚本列表
+    """
+    scripts = []
+    lines, size = [], 0
+    for i, package, action in operations:
+        command = PACKAGE_ACTIONS[action].format(package=shlex.quote(package))
+        line = (f'read t _ </proc/uptime; echo "{BULK_MARKER} begin {i} $t"; {command} 2>&1; r=$?; '
+                f'read t _ </proc/uptime; echo "{BULK_MARKER} end {i} $r $t"')
+        length = len(line.encode()) + 1
+        if lines and size + length > budget:
+            scripts.append('\n'.join(lines))
+            lines, size = [], 0
+        lines.append(line)
+        size += length
+    if lines:
+        scripts.append('\n'.join(lines))
+    return scripts
+
+
+def parse_bulk_output(output: str) -> Dict[int, dict]:
+    """
+    解析批量脚本输出
+    :return: {序号: {exitCode, output, durationMs}}
+    """
+    results = {}
+    current, started, lines = None, 0.0, []
+    for line in output.splitlines():
+        if line.startswith(BULK_MARKER):
+            parts = line.split()
+            if parts[1] == 'begin':
+                current, started, lines = int(parts[2]), float(parts[3]), []
+            elif parts[1] == 'end' and current is not None:
+                results[current] = {
+                    'exitCode': int(parts[3]),
+                    'output': '\n'.join(lines).strip(),
+                    'durationMs': round((float(parts[4]) - started) * 1000),
+                }
+                current = None
+        elif current is not None:
+            lines.append(line)
+    return results
+
+
+def _succeeded(action: str, exit_code: int, output: str) -> bool:
+    # 旧版本 pm 失败时退出码也为 0，需要检查输出
+    if exit_code != 0 or output.startswith(('Failure', 'Error')):
+        return False
+    if action == 'start':
+        return 'No activities found' not in output and 'aborted' not in output
+    if action == 'clear':
+        # pm clear 失败时输出 Failed 且退出码为 0
+        return 'Success' in output
+    return True
+
+
+def run_bulk(device: AdbDevice, packages: List[str], actions: List[str], channels: int = 1) -> dict:
+    """
+    批量执行应用操作，每个通道按脚本大小分几次 shell 往返
+    :param device: 设备
+    :param packages: 包名列表
+    :param actions: 依次对每个包执行的操作，见 PACKAGE_ACTIONS
+    :param channels: 并行的 shell 通道数，操作按包分配到各通道，同一个包的操作保持顺序；
+                     每个通道的脚本按 BULK_SCRIPT_BYTES 拆分后依次执行
+    :return: 包含每个操作结果与总耗时的字典
+    """
+    for action in actions:
+        if action not in PACKAGE_ACTIONS:
+            raise ValueError(f"Unsupported package action: {action}")
+    operations = [(i * len(actions) + j, package, action)
+                  for i, package in enumerate(packages) for j, action in enumerate(actions)]
+    channels = max(1, min(channels, len(packages)))
+    groups = [[op for op in operations if (op[0] // len(actions)) % channels == c] for c in range(channels)]
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=channels) as pool:
+        outputs = list(pool.map(
+            lambda group: '\n'.join(device.shell(script) for script in build_bulk_scripts(group)), groups))
+    parsed = {}
+    for output in outputs:
+        parsed.update(parse_bulk_output(output))
+
+    results = []
+    for i, package, action in operations:
+        result = parsed.get(i)
+        if result is None:
+            results.append({'packageName': package, 'action': action, 'success': False,
+                            'output': '未执行', 'exitCode': None, 'durationMs': None})
+            continue
+        results.append({
+            'packageName': package,
+            'action': action,
+            'success': _succeeded(action, result['exitCode'], result['output']),
+            **result,
+        })
+    elapsed = round((time.perf_counter() - started) * 1000)
+    failed = sum(1 for result in results if not result['success'])
+    logger.info(f"Bulk {actions} on {len(packages)} packages: {failed} failed, {elapsed}ms")
+    return {'results': results, 'failed': failed, 'elapsedMs': elapsed}
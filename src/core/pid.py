@@ -0,0 +1,203 @@
+# !/usr/bin/env python
+# -*- coding:utf-8 -*-
+"""
+@Version  : Python 3.12
+@Software : PyCharm
+"""
+import shlex
+import threading
+import time
+from typing import Callable, Dict, List
+
+from adbutils import AdbDevice
+from loguru import logger
+
+from src.core.props import ADB_SHELL_TIMEOUT
+
+
+def parse_proc_stat(line: str):
+    """
+    解析 /proc/<pid>/stat 的一行
+    :param line: stat 内容
+    :return: (pid, comm, 第3个字段开始的字段列表)，解析失败返回 None
+    """
+    left = line.find(' (')
+    right = line.rfind(')')
+    if left < 0 or right < left:
+        return None
+    try:
+        pid = int(line[:left])
+    except ValueError:
+        return None
+    return pid, line[left + 2:right], line[right + 1:].split()
+
+
+def stat_start_time(fields: list) -> int:
+    """
+    /proc/<pid>/stat 第22个字段 starttime，用于识别 PID 复用
+    """
+    return int(fields[19]) if len(fields) > 19 else 0
+
+
+class PidCache:
+    """
+    按包名缓存进程 PID
+
+    只有当缓存的进程已退出（/proc/<pid>/stat 不存在或 starttime 变化）或超过 refresh 时间时
+    才重新解析，一次调用返回主进程以及 :service 等子进程。进程重启时通知监听者。
+    """
+
+    def __init__(self, device: AdbDevice, ttl: float = 1.0, refresh: float = 10.0, timeout: float = ADB_SHELL_TIMEOUT):
+        """
+        :param device: 设备
+        :param ttl: 存活校验的最小间隔，单位秒
+        :param refresh: 强制重新解析的间隔（用于发现新启动的子进程），单位秒
+        :param timeout: shell 调用超时（秒）
+        """
+        self.device = device
+        self.ttl = ttl
+        self.refresh = refresh
+        self.timeout = timeout
+        self._cache: Dict[str, dict] = {}
+        self._listeners: List[Callable[[dict], None]] = []
+        self._lock = threading.Lock()
+
+    def add_listener(self, listener: Callable[[dict], None]):
+        """
+        注册进程重启/退出事件监听
+        :param listener: 回调，参数为事件字典
+        """
+        self._listeners.append(listener)
+
+    def remove_listener(self, listener: Callable[[dict], None]):
+        if listener in self._listeners:
+            self._listeners.remove(listener)
+
+    def invalidate(self, package_name: str = None):
+        with self._lock:
+            if package_name is None:
+                self._cache.clear()
+            else:
+                self._cache.pop(package_name, None)
+
+    def get_pid(self, package_name: str) -> int:
+        """
+        获取主进程 PID
+        :param package_name: 应用包名
+        :return: 进程PID，如果未找到返回0
+        """
+        for process in self.get_processes(package_name):
+            if process['name'] == package_name:
+                return process['pid']
+        return 0
+
+    def get_processes(self, package_name: str) -> List[dict]:
+        """
+        获取包名下的全部进程（主进程及 :xxx 子进程）
+        :param package_name: 应用包名
+        :return: 进程列表，每项包含 pid、name、startTime
+        """
+        with self._lock:
+            entry = self._cache.get(package_name)
+            now = time.monotonic()
+            if entry is None or now - entry['resolved'] >= self.refresh:
+                processes = self._resolve(package_name)
+            elif now - entry['checked'] < self.ttl:
+                return list(entry['processes'])
+            elif self._alive(entry['processes']):
+                entry['checked'] = now
+                return list(entry['processes'])
+            else:
+                processes = self._resolve(package_name)
+
+            previous = entry['processes'] if entry else None
+            self._cache[package_name] = {
+                'processes': processes,
+                'resolved': now,
+                'checked': now,
+            }
+        if previous is not None:
+            self._notify(package_name, previous, processes)
+        return list(processes)
+
+    def _resolve(self, package_name: str) -> List[dict]:
+        pattern = shlex.quote(package_name)
+        # 先输出 ps 的表头，用于区分 ps -A -o 不受支持（报错或打印默认列、用法）与没有匹配的进程
+        output = self.device.shell(
+            f'ps -A -o PID,NAME 2>&1 | {{ read header; echo "H $header"; grep -F {pattern} | while read pid name; do '
+            f'echo "P $pid $name"; cat /proc/$pid/stat 2>/dev/null; done; }}', timeout=self.timeout)
+        header = next((line.split()[1:] for line in output.splitlines() if line.startswith('H ')), None)
+        if header != ['PID', 'NAME']:
+            # Android 8 以下的 ps 不支持 -o，退回解析默认列
+            output = self.device.shell(f'ps | grep -F {pattern}', timeout=self.timeout)
+            pids = {}
+            for line in output.splitlines():
+                parts = line.split()
+                if len(parts) >= 9 and parts[1].isdigit():
+                    pids[int(parts[1])] = parts[-1]
+            names = pids
+            stats = self._read_stats(list(pids))
+        else:
+            names = {}
+            stats = {}
+            for line in output.splitlines():
+                if line.startswith('P '):
+                    parts = line.split()
+                    if len(parts) >= 3 and parts[1].isdigit():
+                        names[int(parts[1])] = parts[2]
+                    continue
+                parsed = parse_proc_stat(line.strip())
+                if parsed:
+                    stats[parsed[0]] = stat_start_time(parsed[2])
+
+        processes = [
+            {'pid': pid, 'name': name, 'startTime': stats.get(pid, 0)}
+            for pid, name in names.items()
+            if name == package_name or name.startswith(package_name + ':')
+        ]
+        processes.sort(key=lambda p: (p['name'] != package_name, p['name']))
+        logger.debug(f"Resolved processes for {package_name}: {processes}")
+        return processes
+
+    def _read_stats(self, pids: List[int]) -> Dict[int, int]:
+        if not pids:
+            return {}
+        files = ' '.join(f'/proc/{pid}/stat' for pid in pids)
+        stats = {}
+        for line in self.device.shell(f'cat {files} 2>/dev/null', timeout=self.timeout).splitlines():
+            parsed = parse_proc_stat(line.strip())
+            if parsed:
+                stats[parsed[0]] = stat_start_time(parsed[2])
+        return stats
+
+    def _alive(self, processes: List[dict]) -> bool:
+        if not processes:
+            return False
+        stats = self._read_stats([p['pid'] for p in processes])
+        return all(stats.get(p['pid']) == p['startTime'] for p in processes)
+
+    def _notify(self, package_name: str, previous: List[dict], current: List[dict]):
+        before = {p['name']: p['pid'] for p in previous}
+        after = {p['name']: p['pid'] for p in current}
+        events = []
+        for name, pid in after.items():
+            if name in before and before[name] != pid:
+                events.append({'type': 'restart', 'package': package_name, 'process': name,
+                               'oldPid': before[name], 'pid': pid})
+            elif name not in before and name == package_name:
+                events.append({'type': 'start', 'package': package_name, 'process': name,
+                               'oldPid': 0, 'pid': pid})
+        for name, pid in before.items():
+            if name not in after:
+                events.append({'type': 'died', 'package': package_name, 'process': name,
+                               'oldPid': pid, 'pid': 0})
+
+        timestamp = int(time.time() * 1000)
+        for event in events:
+            event['timestamp'] = timestamp
+            logger.info(f"Process event: {event}")
+            for listener in list(self._listeners):
+                try:
+                    listener(event)
+                except Exception as e:
+                    logger.error(f"进程事件回调失败: {e}")
@@ -0,0 +1,185 @@
+# !/usr/bin/env python
+# -*- coding:utf-8 -*-
+"""
+@Version  : Python 3.12
+@Software : PyCharm
+"""
+import base64
+import codecs
+import shlex
+import threading
+import time
+import uuid
+from collections import deque
+from typing import Callable
+
+from adbutils import AdbDevice
+from loguru import logger
+
+# dd 的块大小，偏移按块对齐后在主机端裁剪
+BLOCK_SIZE = 4096
+
+
+def encode_window(data: bytes) -> tuple:
+    """
+    文本直接解码，含 \\0 的二进制数据转为 base64
+    :return: (编码方式, 数据)
+    """
+    if b'\x00' in data:
+        return 'base64', base64.b64encode(data).decode('ascii')
+    return 'text', data.decode('utf-8', 'replace')
+
+
+def read_range(device: AdbDevice, path: str, offset: int = 0, length: int = 64 * 1024) -> dict:
+    """
+    读取设备文件的一段字节，不传输整个文件
+
+    从头读取时使用 sync 流式读取，读够即断开；其余偏移用 dd 按块跳转。
+    :param device: 设备
+    :param path: 文件路径
+    :param offset: 起始偏移，负数表示距文件末尾的字节数
+    :param length: 读取的字节数
+    :return: 包含数据、偏移、文件大小的字典
+    """
+    size = device.sync.stat(path).size
+    if offset < 0:
+        offset = max(size + offset, 0)
+    offset = min(offset, size)
+    length = max(0, min(length, size - offset))
+
+    started = time.perf_counter()
+    data = b''
+    if length and offset == 0:
+        chunks = []
+        received = 0
+        stream = device.sync.iter_content(path)
+        try:
+            for chunk in stream:
+                chunks.append(chunk)
+                received += len(chunk)
+                if received >= length:
+                    break
+        finally:
+            # 提前关闭生成器即断开 sync 连接
+            stream.close()
+        data = b''.join(chunks)[:length]
+    elif length:
+        skip = offset // BLOCK_SIZE
+        count = (offset % BLOCK_SIZE + length + BLOCK_SIZE - 1) // BLOCK_SIZE
+        raw = device.shell(f"dd if={shlex.quote(path)} bs={BLOCK_SIZE} skip={skip} count={count} 2>/dev/null",
+                           encoding=None, rstrip=False)
+        start = offset % BLOCK_SIZE
+        data = raw[start:start + length]
+
+    encoding, content = encode_window(data)
+    return {
+        'path': path,
+        'offset': offset,
+        'length': len(data),
+        'size': size,
+        'eof': offset + len(data) >= size,
+        'encoding': encoding,
+        'data': content,
+        'elapsedMs': round((time.perf_counter() - started) * 1000, 1),
+    }
+
+
+class TailFollower:
+    """
+    tail -f 跟随文件追加的内容
+
+    读取线程把数据放入有界缓冲区，推送线程按间隔合并推送；前端处理不及时时丢弃最旧的数据并计数。
+    """
+
+    def __init__(self, device: AdbDevice, path: str, on_data: Callable[[dict], None], backlog: int = 16 * 1024,
+                 max_buffer: int = 256 * 1024, interval: float = 0.3):
+        """
+        :param device: 设备
+        :param path: 文件路径
+        :param on_data: 数据回调
+        :param backlog: 开始跟随时先输出的末尾字节数
+        :param max_buffer: 缓冲区最大字节数
+        :param interval: 推送间隔（秒）
+        """
+        self.device = device
+        self.path = path
+        self.on_data = on_data
+        self.backlog = backlog
+        self.max_buffer = max_buffer
+        self.interval = interval
+        self.id = uuid.uuid4().hex[:8]
+        self.received = 0
+        self.dropped = 0
+        self._chunks = deque()
+        self._buffered = 0
+        self._stream = None
+        self._lock = threading.Lock()
+        self._stopped = threading.Event()
+        self._reader: threading.Thread = None
+        self._flusher: threading.Thread = None
+
+    def start(self):
+        self._reader = threading.Thread(target=self._read_loop, name=f"tail-{self.id}")
+        self._reader.daemon = True
+        self._reader.start()
+        self._flusher = threading.Thread(target=self._flush_loop, name=f"tail-flush-{self.id}")
+        self._flusher.daemon = True
+        self._flusher.start()
+
+    def stop(self):
+        self._stopped.set()
+        if self._stream is not None:
+            try:
+                self._stream.close()
+            except Exception:
+                pass
+
+    def is_alive(self) -> bool:
+        return self._reader is not None and self._reader.is_alive()
+
+    def _read_loop(self):
+        try:
+            self._stream = self.device.shell(f"tail -c {int(self.backlog)} -f {shlex.quote(self.path)}", stream=True)
+            with self._stream:
+                conn = self._stream.conn
+                conn.settimeout(None)
+                while not self._stopped.is_set():
+                    chunk = conn.recv(65536)
+                    if not chunk:
+                        break
+                    self._append(chunk)
+        except Exception as e:
+            if not self._stopped.is_set():
+                logger.error(f"跟随文件 {self.path} 失败: {e}")
+        finally:
+            self._stopped.set()
+
+    def _append(self, chunk: bytes):
+        with self._lock:
+            self.received += len(chunk)
+            self._chunks.append(chunk)
+            self._buffered += len(chunk)
+            while self._buffered > self.max_buffer and len(self._chunks) > 1:
+                dropped = self._chunks.popleft()
+                self._buffered -= len(dropped)
+                self.dropped += len(dropped)
+
+    def _flush_loop(self):
+        # 多字节字符可能被拆在两次读取之间
+        decoder = codecs.getincrementaldecoder('utf-8')('replace')
+        while True:
+            stopped = self._stopped.wait(self.interval)
+            with self._lock:
+                chunks = list(self._chunks)
+                self._chunks.clear()
+                self._buffered = 0
+            if chunks or stopped:
+                self.on_data({
+                    'id': self.id,
+                    'data': decoder.decode(b''.join(chunks), final=stopped),
+                    'received': self.received,
+                    'dropped': self.dropped,
+                    'done': stopped,
+                })
+            if stopped:
+                return
@@ -0,0 +1,258 @@
+# !/usr/bin/env python
+# -*- coding:utf-8 -*-
+"""
+@Version  : Python 3.12
+@Software : PyCharm
+"""
+import re
+import threading
+import time
+from typing import Callable, Dict, List
+
+from adbutils import AdbDevice
+from loguru import logger
+
+from src.core.pid import parse_proc_stat, stat_start_time
+
+PAGE_SIZE = 4096
+# Android 上 CLK_TCK 固定为 100
+CLOCK_TICKS = 100
+
+# 常见的系统 uid，见 android_filesystem_config.h
+AID_NAMES = {
+    0: 'root', 1000: 'system', 1001: 'radio', 1002: 'bluetooth', 1003: 'graphics', 1004: 'input',
+    1005: 'audio', 1006: 'camera', 1010: 'wifi', 1013: 'media', 1017: 'keystore', 1019: 'drm',
+    1021: 'gps', 1036: 'logd', 1041: 'audioserver', 1047: 'cameraserver', 1068: 'secure_element',
+    1069: 'lmkd', 2000: 'shell', 9999: 'nobody',
+}
+
+RE_HEAD_HEADER = re.compile(r'==> /proc/(\d+)/cmdline <==\n')
+
+# 每次 shell 读取 cmdline 与属主的进程数，使命令长度保持在旧版本 adbd 的 4096 字节数据包以内
+IDENTIFY_BATCH = 64
+
+# 行内容中参与变化比较的字段
+DIFF_FIELDS = ('name', 'state', 'cpu', 'rss', 'threads', 'user')
+
+
+def uid_name(uid: int) -> str:
+    """
+    uid 转为 ps 显示的用户名，应用 uid 显示为 u0_a123 形式
+    """
+    user, app = divmod(uid, 100000)
+    if app >= 10000:
+        if app >= 99000:
+            return f"u{user}_i{app - 99000}"
+        return f"u{user}_a{app - 10000}"
+    name = AID_NAMES.get(app, str(app))
+    return name if user == 0 else f"u{user}_{name}"
+
+
+def parse_cpu_lines(output: str) -> tuple:
+    """
+    解析 /proc/stat 中的 cpu 行
+    :return: (总 jiffies, 核心数)
+    """
+    total = 0
+    cores = 0
+    for line in output.splitlines():
+        if line.startswith('cpu '):
+            total = sum(int(value) for value in line.split()[1:8])
+        elif line.startswith('cpu'):
+            cores += 1
+    return total, max(cores, 1)
+
+
+def parse_cmdlines(output: str, pids: List[int]) -> Dict[int, str]:
+    """
+    解析 head /proc/<pid>/cmdline 的输出，参数之间的 \\0 替换为空格
+    """
+    if len(pids) == 1 and not RE_HEAD_HEADER.search(output):
+        return {pids[0]: output.replace('\0', ' ').strip()}
+    names = {}
+    parts = RE_HEAD_HEADER.split(output)
+    # split 结果为 [前导, pid, 内容, pid, 内容, ...]
+    for i in range(1, len(parts) - 1, 2):
+        names[int(parts[i])] = parts[i + 1].replace('\0', ' ').strip()
+    return names
+
+
+def format_cpu_time(seconds: float) -> str:
+    """
+    与 top 的 TIME+ 列一致的 分:秒.百分秒 格式
+    """
+    minutes, seconds = divmod(seconds, 60)
+    return f"{int(minutes)}:{seconds:05.2f}"
+
+
+class ProcessSampler:
+    """
+    基于 /proc 的进程表采样
+
+    每次采样用一次 cat 读取 /proc/stat 和全部 /proc/<pid>/stat，在主机上根据与上次快照的 jiffies 差值计算 CPU%；
+    cmdline 和 uid 只在进程首次出现时读取。sample() 只返回新增、删除和变化的行。
+    """
+
+    def __init__(self, device: AdbDevice):
+        self.device = device
+        # pid -> 行
+        self.rows: Dict[int, dict] = {}
+        # pid -> (starttime, utime + stime)
+        self._times: Dict[int, tuple] = {}
+        # (pid, starttime) -> (名称, uid)
+        self._identities: Dict[tuple, tuple] = {}
+        self._total = 0
+        self._lock = threading.Lock()
+
+    def reset(self):
+        """
+        清空上次快照，下一次采样返回全部进程
+        """
+        with self._lock:
+            self.rows = {}
+
+    def table(self) -> List[dict]:
+        with self._lock:
+            return list(self.rows.values())
+
+    def _identify(self, stats: Dict[int, tuple]):
+        new = [pid for pid, (_, fields) in stats.items()
+               if (pid, stat_start_time(fields)) not in self._identities]
+        if not new:
+            return
+        names = {}
+        owners = {}
+        for i in range(0, len(new), IDENTIFY_BATCH):
+            batch = new[i:i + IDENTIFY_BATCH]
+            files = ' '.join(f'/proc/{pid}/cmdline' for pid in batch)
+            dirs = ' '.join(f'/proc/{pid}' for pid in batch)
+            output = self.device.shell(f"head -n 1 {files} 2>/dev/null; echo @@UID; "
+                                       f"stat -c '%u %n' {dirs} 2>/dev/null")
+            cmdlines, _, uids = output.partition('@@UID\n')
+            names.update(parse_cmdlines(cmdlines, batch))
+            for line in uids.splitlines():
+                parts = line.split()
+                if len(parts) == 2 and parts[0].isdigit():
+                    owners[int(parts[1].rsplit('/', 1)[-1])] = int(parts[0])
+        alive = set()
+        for pid, (comm, fields) in stats.items():
+            key = (pid, stat_start_time(fields))
+            alive.add(key)
+            if key not in self._identities:
+                self._identities[key] = (names.get(pid) or comm, owners.get(pid, -1))
+        for key in list(self._identities):
+            if key not in alive:
+                del self._identities[key]
+
+    def sample(self) -> dict:
+        """
+        采样一次进程表
+        :return: 包含 added、changed（完整行）与 removed（pid）的字典
+        """
+        started = time.perf_counter()
+        output = self.device.shell("cat /proc/stat /proc/[0-9]*/stat 2>/dev/null")
+        total, cores = parse_cpu_lines(output)
+        stats = {}
+        for line in output.splitlines():
+            if line.startswith('cpu') or ' (' not in line:
+                continue
+            parsed = parse_proc_stat(line.strip())
+            if parsed and len(parsed[2]) > 21:
+                stats[parsed[0]] = (parsed[1], parsed[2])
+
+        with self._lock:
+            self._identify(stats)
+            elapsed_total = total - self._total if self._total else 0
+            rows = {}
+            times = {}
+            for pid, (comm, fields) in stats.items():
+                start_time = stat_start_time(fields)
+                jiffies = int(fields[11]) + int(fields[12])
+                times[pid] = (start_time, jiffies)
+                previous = self._times.get(pid)
+                cpu = 0.0
+                if elapsed_total > 0 and previous and previous[0] == start_time:
+                    # 与 top 一致，100% 表示占满一个核心
+                    cpu = round((jiffies - previous[1]) * cores * 100 / elapsed_total, 1)
+                name, uid = self._identities.get((pid, start_time), (comm, -1))
+                rows[pid] = {
+                    'pid': pid,
+                    'ppid': int(fields[1]),
+                    'name': name,
+                    'uid': uid,
+                    'user': uid_name(uid) if uid >= 0 else '',
+                    'state': fields[0],
+                    'cpu': max(cpu, 0.0),
+                    'time': format_cpu_time(jiffies / CLOCK_TICKS),
+                    'rss': int(fields[21]) * PAGE_SIZE,
+                    'threads': int(fields[17]),
+                    'startTime': start_time,
+                }
+
+            added, changed = [], []
+            for pid, row in rows.items():
+                old = self.rows.get(pid)
+                if old is None or old['startTime'] != row['startTime']:
+                    added.append(row)
+                elif any(old[field] != row[field] for field in DIFF_FIELDS):
+                    changed.append(row)
+            removed = [pid for pid in self.rows if pid not in rows]
+            reset = not self.rows
+            self.rows = rows
+            self._times = times
+            self._total = total
+
+        return {
+            'reset': reset,
+            'added': added,
+            'changed': changed,
+            'removed': removed,
+            'total': len(rows),
+            'elapsedMs': round((time.perf_counter() - started) * 1000, 1),
+            'timestamp': int(time.time() * 1000),
+        }
+
+
+class ProcessMonitor:
+    """
+    按固定间隔采样进程表，把增量推送给前端
+    """
+
+    def __init__(self, sampler: ProcessSampler, on_delta: Callable[[dict], None], interval: float = 1.0):
+        """
+        :param sampler: 进程表采样器
+        :param on_delta: 增量回调，没有变化时不回调
+        :param interval: 采样间隔（秒）
+        """
+        self.sampler = sampler
+        self.on_delta = on_delta
+        self.interval = interval
+        self._stopped = threading.Event()
+        self._thread: threading.Thread = None
+
+    def start(self):
+        # 新的监听方需要完整的进程表
+        self.sampler.reset()
+        self._thread = threading.Thread(target=self._loop, name=f"process-{self.sampler.device.serial}")
+        self._thread.daemon = True
+        self._thread.start()
+
+    def stop(self):
+        self._stopped.set()
+
+    def is_alive(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def _loop(self):
+        next_tick = time.monotonic()
+        while not self._stopped.is_set():
+            try:
+                delta = self.sampler.sample()
+                if delta['reset'] or delta['added'] or delta['changed'] or delta['removed']:
+                    self.on_delta(delta)
+            except Exception as e:
+                logger.error(f"采样进程表失败: {e}")
+            next_tick += self.interval
+            # 采样耗时超过间隔时不追赶
+            next_tick = max(next_tick, time.monotonic())
+            self._stopped.wait(next_tick - time.monotonic())
@@ -0,0 +1,186 @@
+# !/usr/bin/env python
+# -*- coding:utf-8 -*-
+"""
+@Version  : Python 3.12
+@Software : PyCharm
+"""
+import re
+import threading
+import time
+from typing import Dict, List
+
+from adbutils import AdbDevice
+from loguru import logger
+
+SECTION_MARKER = '@@@CBADB@@@'
+
+# 与 adbutils shell 的默认超时一致
+ADB_SHELL_TIMEOUT = 600.0
+
+RE_PROP = re.compile(r'^\[(.+?)]: \[(.*)]$')
+
+# 会话内不变的信息：完整 getprop 与内核版本
+STATIC_SECTIONS = {
+    'getprop': 'getprop',
+    'uname': 'uname -r',
+}
+
+# 易变信息：按 TTL 刷新
+VOLATILE_SECTIONS = {
+    'fontScale': 'settings get system font_scale',
+    'wlan0': 'ip addr show wlan0',
+    'meminfo': 'cat /proc/meminfo',
+    'wmSize': 'wm size',
+    'wmDensity': 'wm density',
+}
+
+
+def build_batch_command(sections: Dict[str, str]) -> str:
+    """
+    把多条命令拼成一次 shell 调用，每段输出前插入分隔标记
+    :param sections: {段名: 命令}
+    :return: shell 命令
+    """
+    return '; '.join(f"echo '{SECTION_MARKER}{name}'; {command} 2>/dev/null"
+                     for name, command in sections.items())
+
+
+def parse_batch_output(output: str) -> Dict[str, str]:
+    """
+    一次遍历解析 build_batch_command 的输出
+    :param output: shell 输出
+    :return: {段名: 段内容}
+    """
+    sections = {}
+    name = None
+    lines: List[str] = []
+    for line in output.splitlines():
+        if line.startswith(SECTION_MARKER):
+            if name is not None:
+                sections[name] = '\n'.join(lines).strip()
+            name = line[len(SECTION_MARKER):].strip()
+            lines = []
+        elif name is not None:
+            lines.append(line)
+    if name is not None:
+        sections[name] = '\n'.join(lines).strip()
+    return sections
+
+
+def parse_getprop(output: str) -> Dict[str, str]:
+    props = {}
+    for line in output.splitlines():
+        match = RE_PROP.match(line.strip())
+        if match:
+            props[match.group(1)] = match.group(2)
+    return props
+
+
+class PropertySnapshot:
+    """
+    单台设备的属性快照
+
+    首次访问时通过一次 shell 调用取得完整 getprop 与其它设备信息，静态字段（品牌、ABI、SDK、序列号等）
+    在整个会话内缓存，易变字段（IP、可用内存等）超过 ttl 后在下次访问时刷新。
+    """
+
+    def __init__(self, device: AdbDevice, ttl: float = 5.0, timeout: float = ADB_SHELL_TIMEOUT):
+        """
+        :param device: 设备
+        :param ttl: 易变信息的有效期（秒）
+        :param timeout: shell 调用超时（秒）
+        """
+        self.device = device
+        self.ttl = ttl
+        self.timeout = timeout
+        self.props: Dict[str, str] = {}
+        self.kernel_version = ''
+        self._static_loaded = False
+        self._volatile: Dict[str, str] = {name: '' for name in VOLATILE_SECTIONS}
+        self._volatile_time = 0.0
+        self._lock = threading.Lock()
+
+    def _load(self, force_volatile: bool = False):
+        with self._lock:
+            sections = {}
+            if not self._static_loaded:
+                sections.update(STATIC_SECTIONS)
+            if force_volatile or time.monotonic() - self._volatile_time >= self.ttl:
+                sections.update(VOLATILE_SECTIONS)
+            if not sections:
+                return
+
+            output = self.device.shell(build_batch_command(sections), timeout=self.timeout)
+            parsed = parse_batch_output(output)
+            if 'getprop' in parsed:
+                self.props = parse_getprop(parsed['getprop'])
+                self.kernel_version = parsed.get('uname', '')
+                self._static_loaded = True
+            if 'meminfo' in parsed:
+                self._volatile = {name: parsed.get(name, '') for name in VOLATILE_SECTIONS}
+                self._volatile_time = time.monotonic()
+            logger.debug(f"Property snapshot loaded for {self.device.serial}: {list(sections)}")
+
+    def get(self, name: str, default: str = '') -> str:
+        """
+        读取缓存的 getprop 属性
+        """
+        if not self._static_loaded:
+            self._load()
+        return self.props.get(name, default)
+
+    @property
+    def sdk_version(self) -> int:
+        try:
+            return int(self.get('ro.build.version.sdk', '0'))
+        except ValueError:
+            return 0
+
+    def volatile(self, refresh: bool = False) -> Dict[str, str]:
+        """
+        获取易变信息原始输出，超过 ttl 自动刷新
+        """
+        self._load(force_volatile=refresh)
+        return dict(self._volatile)
+
+    def device_info(self) -> dict:
+        """
+        组装设备详细信息
+        """
+        volatile = self.volatile()
+        device_info = {
+            'kernelVersion': self.kernel_version,
+            'fontScale': volatile['fontScale'],
+            'name': self.get('ro.product.name'),
+            'model': self.get('ro.product.model'),
+            'brand': self.get('ro.product.brand'),
+            'serialNum': self.get('ro.serialno'),
+            'androidVersion': self.get('ro.build.version.release'),
+            'processor': self.get('ro.product.board'),
+            'abi': self.get('ro.product.cpu.abi')
+        }
+
+        # Network info
+        mac_match = re.search(r'link/ether ([0-9a-fA-F:]+) brd', volatile['wlan0'])
+        ip_match = re.search(r'inet (\d+\.\d+\.\d+\.\d+)/\d+', volatile['wlan0'])
+        device_info.update({
+            'ipAddress': ip_match.group(1) if ip_match else None,
+            'macAddress': mac_match.group(1) if mac_match else None
+        })
+
+        # Memory info
+        mem_total = re.search(r'MemTotal:\s+(.+)', volatile['meminfo'])
+        mem_available = re.search(r'MemAvailable:\s+(.+)', volatile['meminfo'])
+        device_info.update({
+            'memTotal': mem_total.group(1) if mem_total else None,
+            'memFree': mem_available.group(1) if mem_available else None
+        })
+
+        # Screen info
+        size = volatile['wmSize'].splitlines()[0].split(': ')[-1].strip() if volatile['wmSize'] else ''
+        density = volatile['wmDensity'].splitlines()[0].split(': ')[-1].strip() if volatile['wmDensity'] else ''
+        device_info.update({
+            'physicalResolution': f"{size} ({density}dpi)",
+            'resolution': size
+        })
+        return device_info
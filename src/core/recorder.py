@@ -0,0 +1,218 @@
+# !/usr/bin/env python
+# -*- coding:utf-8 -*-
+"""
+@Version  : Python 3.12
+@Software : PyCharm
+"""
+import os
+import queue
+import shlex
+import shutil
+import subprocess
+import tempfile
+import threading
+import time
+from typing import Callable, List, Optional
+
+from adbutils import AdbDevice
+from loguru import logger
+
+RECORDING_DIR = os.path.join(tempfile.gettempdir(), "cb-adb-easy", "recordings")
+
+# screenrecord 单次最长 180 秒，留出余量
+SEGMENT_SECONDS = 170
+
+
+def concat_segments(segments: List[str], output: str) -> bool:
+    """
+    使用 ffmpeg concat 无损拼接分段，主机未安装 ffmpeg 时返回 False
+    """
+    ffmpeg = shutil.which("ffmpeg")
+    if ffmpeg is None:
+        return False
+    list_file = output + ".txt"
+    with open(list_file, 'w', encoding='utf-8') as f:
+        for segment in segments:
+            path = segment.replace("'", "'\\''")
+            f.write(f"file '{path}'\n")
+    try:
+        result = subprocess.run([ffmpeg, "-y", "-loglevel", "error", "-f", "concat", "-safe", "0",
+                                 "-i", list_file, "-c", "copy", output], capture_output=True, timeout=300)
+        if result.returncode != 0:
+            logger.error(f"拼接录屏分段失败: {result.stderr.decode('utf-8', 'ignore')}")
+            return False
+        return True
+    finally:
+        os.remove(list_file)
+
+
+class ScreenRecorder:
+    """
+    分段屏幕录制
+
+    录制线程依次运行 screenrecord --time-limit，前后分段首尾相接以突破 3 分钟限制；
+    拉取线程在下一段录制的同时把已完成的分段 sync.pull 到主机并删除设备上的文件，
+    设备存储占用不超过两个分段，停止时只需拉取最后一段。
+    """
+
+    def __init__(self, device: AdbDevice, directory: str = RECORDING_DIR, segment_seconds: int = SEGMENT_SECONDS,
+                 concat: bool = True, on_segment: Callable[[dict], None] = None):
+        """
+        :param device: 设备
+        :param directory: 主机上的保存目录
+        :param segment_seconds: 每段时长（秒），不超过 180
+        :param concat: 停止后是否在主机上拼接为一个文件
+        :param on_segment: 每拉取完一个分段后的回调
+        """
+        self.device = device
+        self.directory = directory
+        self.segment_seconds = max(1, min(int(segment_seconds), 180))
+        self.concat = concat
+        self.on_segment = on_segment
+        self.timestamp = time.strftime("%Y%m%d_%H%M%S")
+        self.name = f"screenrecord_{device.serial}_{self.timestamp}"
+        self.segments: List[str] = []
+        # 停止时未能拉取的设备端分段
+        self.missing: List[str] = []
+        self.bytes = 0
+        self.error: Exception = None
+        self._pending = queue.Queue()
+        self._stopped = threading.Event()
+        self._stream = None
+        self._pulling: Optional[str] = None
+        self._thread: threading.Thread = None
+        self._puller: threading.Thread = None
+
+    def _remote_file(self, index: int) -> str:
+        return f"/sdcard/{self.name}_{index:03d}.mp4"
+
+    def start(self):
+        os.makedirs(self.directory, exist_ok=True)
+        logger.info(f"Starting segmented screen recording {self.name}, {self.segment_seconds}s per segment")
+        self._thread = threading.Thread(target=self._record, name=f"recorder-{self.device.serial}")
+        self._thread.daemon = True
+        self._thread.start()
+        self._puller = threading.Thread(target=self._pull, name=f"recorder-pull-{self.device.serial}")
+        self._puller.daemon = True
+        self._puller.start()
+
+    def _record(self):
+        index = 0
+        try:
+            while not self._stopped.is_set():
+                remote_file = self._remote_file(index)
+                started = time.monotonic()
+                self._stream = self.device.shell(
+                    f"screenrecord --time-limit {self.segment_seconds} {remote_file}", stream=True)
+                with self._stream:
+                    # screenrecord 退出后连接关闭
+                    self._stream.conn.settimeout(None)
+                    self._stream.read_until_close()
+                self._pending.put(remote_file)
+                index += 1
+                # 未到时长就退出说明 screenrecord 启动失败，避免空转
+                if not self._stopped.is_set() and time.monotonic() - started < 1:
+                    raise RuntimeError("screenrecord exited immediately")
+        except Exception as e:
+            self.error = e
+            logger.error(f"Recording error: {e}")
+        finally:
+            self._pending.put(None)
+
+    def _pull(self):
+        while True:
+            remote_file = self._pending.get()
+            if remote_file is None:
+                return
+            self._pulling = remote_file
+            try:
+                if self.device.sync.stat(remote_file).size == 0:
+                    # screenrecord 未写入任何帧，空文件同样需要删除
+                    self.device.shell(f"rm -f {remote_file}")
+                    continue
+                local_file = os.path.join(self.directory, os.path.basename(remote_file))
+                started = time.perf_counter()
+                self.device.sync.pull(remote_file, local_file)
+                self.device.shell(f"rm {remote_file}")
+                size = os.path.getsize(local_file)
+                self.segments.append(local_file)
+                self.bytes += size
+                logger.info(f"Recording segment pulled to {local_file}: {size} bytes, "
+                            f"{round(time.perf_counter() - started, 2)}s")
+                if self.on_segment:
+                    self.on_segment({'segments': len(self.segments), 'bytes': self.bytes})
+            except Exception as e:
+                logger.error(f"拉取录屏分段 {remote_file} 失败: {e}")
+            finally:
+                self._pulling = None
+
+    def _unpulled(self) -> List[str]:
+        """
+        取出拉取线程正在处理及尚未处理的分段，不再拉取排队中的分段
+        """
+        remaining = [self._pulling] if self._pulling else []
+        while True:
+            try:
+                remote_file = self._pending.get_nowait()
+            except queue.Empty:
+                # 拉取线程恢复后仍能收到结束标记并退出
+                self._pending.put(None)
+                return remaining
+            if remote_file is not None:
+                remaining.append(remote_file)
+
+    def is_recording(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def abort(self):
+        """
+        设备已断开时结束录制：只关闭连接，不再向设备发送命令，之后调用 stop 取得已拉取的分段
+        """
+        self._stopped.set()
+        if self._stream is not None:
+            try:
+                self._stream.close()
+            except Exception:
+                pass
+
+    def stop(self, timeout: float = 10.0, pull_timeout: float = 120.0) -> List[str]:
+        """
+        停止录制，等待最后一段拉取完成
+        :param timeout: 等待 screenrecord 退出的最长时间
+        :param pull_timeout: 等待剩余分段拉取完成的最长时间，超时（如拉取中途拔出设备）的分段记录在 missing 中
+        :return: 主机上已拉取的文件列表，拼接成功时只有一个文件
+        """
+        logger.info("Stopping screen recording")
+        self._stopped.set()
+        deadline = time.monotonic() + timeout
+        # 只匹配本次录制的文件名，不影响投屏及其它工具启动的 screenrecord；
+        # [s] 使 pkill 自身的命令行不被匹配
+        pattern = shlex.quote(f"[s]creenrecord .*{self.name}_")
+        # 录制线程可能正在启动下一段，持续发送 SIGINT 直到线程退出
+        while self._thread.is_alive() and time.monotonic() < deadline:
+            self.device.shell(f"pkill -l SIGINT -f {pattern}")
+            self._thread.join(0.5)
+        if self._thread.is_alive():
+            logger.warning("screenrecord did not exit in time")
+            if self._stream is not None:
+                self._stream.close()
+            self._thread.join(1)
+        self._puller.join(pull_timeout)
+        if self._puller.is_alive():
+            self.missing = self._unpulled()
+            logger.warning(f"Recording segments not pulled in time: {self.missing}")
+
+        # 拉取线程超时后仍可能追加分段，只处理此刻已完成的部分
+        segments = list(self.segments)
+        if len(segments) <= 1 or not self.concat:
+            return segments
+        output = os.path.join(self.directory, f"{self.name}.mp4")
+        started = time.perf_counter()
+        if not concat_segments(segments, output):
+            logger.warning("ffmpeg unavailable or failed, keeping recording segments")
+            return segments
+        for segment in segments:
+            os.remove(segment)
+        logger.info(f"Concatenated {len(segments)} segments into {output}, "
+                    f"{round(time.perf_counter() - started, 2)}s")
+        return [output]
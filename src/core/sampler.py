@@ -0,0 +1,180 @@
+# !/usr/bin/env python
+# -*- coding:utf-8 -*-
+"""
+@Version  : Python 3.12
+@Software : PyCharm
+"""
+import threading
+import time
+from typing import Callable, Dict, Optional
+
+from loguru import logger
+
+# 采样间隔下限（秒），间隔为 0 时节拍计算会除零
+MIN_INTERVAL = 0.01
+
+
+class SamplingTask:
+    """
+    单个包名的采样循环
+
+    按固定节拍采样（以起始时间为锚点，不累计漂移），若单次采样耗时超过间隔，
+    直接跳过错过的节拍而不是堆积调用；采样结果按 batch_interval 合并后一次性推送。
+    """
+
+    def __init__(self, name: str, sample_func: Callable[[], Optional[dict]],
+                 on_batch: Callable[[str, list, dict], None],
+                 interval: float = 1.0, batch_interval: float = 1.0):
+        self.name = name
+        self.sample_func = sample_func
+        self.on_batch = on_batch
+        self.interval = max(interval, MIN_INTERVAL)
+        self.batch_interval = batch_interval
+        self.samples = 0
+        self.skipped = 0
+        self.errors = 0
+        self._buffer = []
+        self._lock = threading.Lock()
+        self._stopped = threading.Event()
+        self._reset = threading.Event()
+        self._thread: threading.Thread = None
+        self.on_stop: Optional[Callable[[], None]] = None
+
+    def start(self):
+        self._thread = threading.Thread(target=self._loop, name=f"sampler-{self.name}")
+        self._thread.daemon = True
+        self._thread.start()
+
+    def stop(self, timeout: float = None):
+        self._stopped.set()
+        if self._thread and self._thread is not threading.current_thread():
+            self._thread.join(timeout)
+        self._flush()
+        if self.on_stop:
+            self.on_stop()
+
+    def set_interval(self, interval: float):
+        """
+        修改采样间隔，下一次采样立即以新节拍重新对齐，不小于 MIN_INTERVAL
+        """
+        self.interval = max(interval, MIN_INTERVAL)
+        self._reset.set()
+
+    def is_alive(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def stats(self) -> dict:
+        return {
+            'interval': self.interval,
+            'samples': self.samples,
+            'skipped': self.skipped,
+            'errors': self.errors,
+        }
+
+    def _loop(self):
+        anchor = time.monotonic()
+        tick = 0
+        last_flush = anchor
+        while not self._stopped.is_set():
+            if self._reset.is_set():
+                self._reset.clear()
+                anchor = time.monotonic()
+                tick = 0
+
+            delay = anchor + tick * self.interval - time.monotonic()
+            if delay > 0 and self._stopped.wait(delay):
+                break
+
+            started = time.time()
+            try:
+                data = self.sample_func()
+            except Exception as e:
+                self.errors += 1
+                data = None
+                logger.error(f"采样 {self.name} 失败: {e}")
+
+            if data is not None:
+                self.samples += 1
+                data.setdefault('timestamp', int(started * 1000))
+                with self._lock:
+                    self._buffer.append(data)
+
+            # 以锚点计算下一个节拍，慢设备上跳过已经错过的节拍
+            tick += 1
+            behind = time.monotonic() - (anchor + tick * self.interval)
+            if behind > 0:
+                missed = int(behind // self.interval) + 1
+                self.skipped += missed
+                tick += missed
+
+            now = time.monotonic()
+            if now - last_flush >= self.batch_interval:
+                last_flush = now
+                self._flush()
+
+    def _flush(self):
+        with self._lock:
+            batch, self._buffer = self._buffer, []
+        if not batch:
+            return
+        try:
+            self.on_batch(self.name, batch, self.stats())
+        except Exception as e:
+            logger.error(f"推送采样数据失败: {e}")
+
+
+class PerformanceSampler:
+    """
+    后台采样引擎，按名称管理多个采样任务
+    """
+
+    def __init__(self, batch_interval: float = 1.0):
+        self.batch_interval = batch_interval
+        self.tasks: Dict[str, SamplingTask] = {}
+        self._lock = threading.Lock()
+
+    def start(self, name: str, sample_func: Callable[[], Optional[dict]],
+              on_batch: Callable[[str, list, dict], None], interval: float = 1.0) -> SamplingTask:
+        """
+        启动采样任务，已存在的同名任务会先被停止
+        :param name: 任务名称，一般为包名
+        :param sample_func: 采样函数，返回 None 表示本次无数据
+        :param on_batch: 批量回调 (name, samples, stats)
+        :param interval: 采样间隔，单位秒
+        :return: 采样任务
+        """
+        self.stop(name)
+        task = SamplingTask(name, sample_func, on_batch, interval, self.batch_interval)
+        with self._lock:
+            self.tasks[name] = task
+        task.start()
+        logger.info(f"Sampler started: {name}, interval {interval}s")
+        return task
+
+    def stop(self, name: str = None) -> bool:
+        """
+        停止采样任务
+        :param name: 任务名称，为空时停止全部任务
+        :return: 是否有任务被停止
+        """
+        with self._lock:
+            if name is None:
+                tasks = list(self.tasks.values())
+                self.tasks.clear()
+            else:
+                task = self.tasks.pop(name, None)
+                tasks = [task] if task else []
+        for task in tasks:
+            task.stop(timeout=5)
+            logger.info(f"Sampler stopped: {task.name}")
+        return len(tasks) > 0
+
+    def set_interval(self, name: str, interval: float) -> bool:
+        task = self.tasks.get(name)
+        if task is None:
+            return False
+        task.set_interval(interval)
+        return True
+
+    def stats(self) -> dict:
+        return {name: task.stats() for name, task in self.tasks.items()}
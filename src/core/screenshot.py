@@ -0,0 +1,99 @@
+# !/usr/bin/env python
+# -*- coding:utf-8 -*-
+"""
+@Version  : Python 3.12
+@Software : PyCharm
+"""
+import io
+import struct
+import time
+
+from PIL import Image
+from adbutils import AdbDevice
+from loguru import logger
+
+IMAGE_FORMATS = {
+    'png': 'image/png',
+    'jpeg': 'image/jpeg',
+    'webp': 'image/webp',
+}
+
+# screencap 原始输出的像素格式 -> (PIL 模式, raw 解码模式, 每像素字节数)
+PIXEL_FORMATS = {
+    1: ('RGBA', 'RGBA', 4),  # RGBA_8888
+    2: ('RGB', 'RGBX', 4),  # RGBX_8888
+    3: ('RGB', 'RGB', 3),  # RGB_888
+    4: ('RGB', 'BGR;16', 2),  # RGB_565
+}
+
+
+def png_size(data: bytes) -> tuple:
+    """
+    从 PNG 的 IHDR 头读取宽高，无需解码图片
+    """
+    if len(data) < 24 or data[:8] != b'\x89PNG\r\n\x1a\n':
+        raise ValueError("Invalid PNG data")
+    return struct.unpack('>II', data[16:24])
+
+
+def decode_raw(data: bytes):
+    """
+    解析 screencap 原始帧缓冲：width, height, format[, colorspace] 头加像素数据
+    :return: PIL 图片
+    """
+    width, height, pixel_format = struct.unpack_from('<III', data)
+    mode, raw_mode, bpp = PIXEL_FORMATS.get(pixel_format, PIXEL_FORMATS[1])
+    pixels = width * height * bpp
+    # Android 9 起头部多了 4 字节的 colorspace
+    header = len(data) - pixels if len(data) - pixels in (12, 16) else 12
+    return Image.frombuffer(mode, (width, height), data[header:header + pixels], 'raw', raw_mode, 0, 1)
+
+
+def capture(device: AdbDevice, image_format: str = 'png', quality: int = 80) -> dict:
+    """
+    截屏
+
+    PNG 直接透传设备 screencap -p 的输出，不在主机端解码再编码；
+    JPEG / WebP 拉取原始帧缓冲后在主机端一次编码。
+    :param device: 设备
+    :param image_format: png / jpeg / webp
+    :param quality: JPEG / WebP 质量
+    :return: 包含图片数据、宽高、格式与耗时的字典
+    """
+    image_format = image_format.lower()
+    if image_format == 'jpg':
+        image_format = 'jpeg'
+    if image_format not in IMAGE_FORMATS:
+        raise ValueError(f"Unsupported image format: {image_format}")
+
+    started = time.perf_counter()
+    if image_format == 'png':
+        data = device.shell('screencap -p', encoding=None, rstrip=False)
+        captured = time.perf_counter()
+        width, height = png_size(data)
+        encoded = captured
+    else:
+        raw = device.shell('screencap', encoding=None, rstrip=False)
+        captured = time.perf_counter()
+        image = decode_raw(raw)
+        width, height = image.size
+        if image_format == 'jpeg' and image.mode != 'RGB':
+            image = image.convert('RGB')
+        with io.BytesIO() as buffered:
+            image.save(buffered, format=image_format.upper(), quality=quality)
+            data = buffered.getvalue()
+        encoded = time.perf_counter()
+
+    result = {
+        'data': data,
+        'width': width,
+        'height': height,
+        'format': image_format,
+        'mime': IMAGE_FORMATS[image_format],
+        'bytes': len(data),
+        'captureMs': round((captured - started) * 1000, 1),
+        'encodeMs': round((encoded - captured) * 1000, 1),
+        'latencyMs': round((encoded - started) * 1000, 1),
+    }
+    logger.debug(f"Screenshot {image_format}: {width}x{height}, {len(data)} bytes, {result['latencyMs']}ms")
+    return result
@@ -0,0 +1,281 @@
+# !/usr/bin/env python
+# -*- coding:utf-8 -*-
+"""
+@Version  : Python 3.12
+@Software : PyCharm
+"""
+import fnmatch
+import posixpath
+import shlex
+import stat
+import threading
+import time
+import uuid
+from typing import Callable, Dict, List, Optional
+
+from adbutils import AdbDevice
+from loguru import logger
+
+# stat 输出格式：十六进制模式 大小 修改时间 路径，路径放在最后以容纳空格
+STAT_FORMAT = "'%f %s %Y %n'"
+# 每次 stat 的路径数，find -exec ... + 会攒满整条命令行才执行，结果成块到达
+STAT_BATCH = 32
+INDEX_STAT_BATCH = 256
+
+
+def find_stat_command(root: str, args: str, batch: int = STAT_BATCH) -> str:
+    """
+    find 的结果经 xargs 分批交给 stat，每批输出后立即可读
+    :param root: 搜索的根目录，结尾的 / 让 find 进入符号链接指向的目录（如 /sdcard）
+    :param args: find 的过滤参数
+    :param batch: 每次 stat 的路径数
+    """
+    return (f"find {shlex.quote(root)} {args} -print0 2>/dev/null "
+            f"| xargs -0 -n {batch} stat -c {STAT_FORMAT} 2>/dev/null")
+
+
+def parse_stat_line(line: str) -> Optional[tuple]:
+    """
+    解析 STAT_FORMAT 格式的一行
+    :return: (路径, 是否目录, 大小, 修改时间)，无法解析时为 None
+    """
+    parts = line.rstrip('\r').split(' ', 3)
+    if len(parts) != 4:
+        return None
+    try:
+        mode = int(parts[0], 16)
+        return parts[3], stat.S_ISDIR(mode), int(parts[1]), float(parts[2])
+    except ValueError:
+        return None
+
+
+def name_matcher(pattern: str) -> Callable[[str], bool]:
+    """
+    不区分大小写的文件名匹配，与 find -iname 一致；不含通配符时按子串匹配
+    """
+    if not any(c in pattern for c in '*?['):
+        pattern = f"*{pattern}*"
+    pattern = pattern.lower()
+    return lambda name: fnmatch.fnmatchcase(name.lower(), pattern)
+
+
+def to_result(path: str, is_dir: bool, size: int, mtime: float) -> dict:
+    return {
+        'name': posixpath.basename(path),
+        'path': path,
+        'size': size,
+        'is_dir': is_dir,
+        'modified': time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(mtime)),
+    }
+
+
+class FileSearch:
+    """
+    设备端 find 搜索，按行读取输出，结果分批回调，无需等待 find 结束
+    """
+
+    def __init__(self, device: AdbDevice, root: str, pattern: str, on_results: Callable[[dict], None],
+                 limit: int = 5000, batch_interval: float = 0.2):
+        """
+        :param device: 设备
+        :param root: 搜索的根目录
+        :param pattern: 文件名模式，支持 * ? 通配符，不含通配符时按子串匹配
+        :param on_results: 结果回调，参数包含 id、results、total、done
+        :param limit: 最多返回的结果数
+        :param batch_interval: 结果回调的最小间隔（秒）
+        """
+        self.device = device
+        self.root = root
+        self.pattern = pattern if any(c in pattern for c in '*?[') else f"*{pattern}*"
+        self.on_results = on_results
+        self.limit = limit
+        self.batch_interval = batch_interval
+        self.id = uuid.uuid4().hex[:8]
+        self.total = 0
+        self._stream = None
+        self._cancelled = threading.Event()
+        self._thread: threading.Thread = None
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name=f"search-{self.id}")
+        self._thread.daemon = True
+        self._thread.start()
+
+    def cancel(self):
+        self._cancelled.set()
+        if self._stream is not None:
+            try:
+                self._stream.close()
+            except Exception:
+                pass
+
+    def _run(self):
+        started = time.perf_counter()
+        # 结尾的 / 让 find 进入符号链接指向的目录（如 /sdcard）
+        root = self.root.rstrip('/') + '/'
+        command = find_stat_command(root, f"-iname {shlex.quote(self.pattern)}")
+        batch = []
+        flushed = time.monotonic()
+        try:
+            self._stream = self.device.shell(command, stream=True)
+            with self._stream:
+                f = self._stream.conn.makefile('rb')
+                for raw in f:
+                    if self._cancelled.is_set():
+                        break
+                    parsed = parse_stat_line(raw.decode('utf-8', 'replace').rstrip('\n'))
+                    if parsed is None:
+                        continue
+                    path, is_dir, size, mtime = parsed
+                    batch.append(to_result(path.replace('//', '/'), is_dir, size, mtime))
+                    self.total += 1
+                    if time.monotonic() - flushed >= self.batch_interval:
+                        self._emit(batch, False)
+                        batch, flushed = [], time.monotonic()
+                    if self.total >= self.limit:
+                        break
+        except Exception as e:
+            if not self._cancelled.is_set():
+                logger.error(f"搜索 {self.root} 失败: {e}")
+        finally:
+            self._emit(batch, True)
+            logger.info(f"Search {self.id} {self.pattern} in {self.root}: {self.total} results, "
+                        f"{round(time.perf_counter() - started, 2)}s")
+
+    def _emit(self, results: List[dict], done: bool):
+        self.on_results({
+            'id': self.id,
+            'results': results,
+            'total': self.total,
+            'done': done,
+            'cancelled': self._cancelled.is_set(),
+        })
+
+
+class PathIndex:
+    """
+    设备目录树的路径索引（名称、大小、修改时间）
+
+    首次用一条 find 建立索引；之后只用 find -type d 取回所有目录的修改时间，
+    仅重新列出修改时间变化的目录。目录修改时间只随增删改名变化，文件内容变化导致的大小更新可能滞后。
+    """
+
+    def __init__(self, device: AdbDevice, root: str = "/sdcard", ttl: float = 30.0):
+        """
+        :param device: 设备
+        :param root: 索引的根目录
+        :param ttl: 距上次刷新超过该秒数时，搜索前先增量刷新
+        """
+        self.device = device
+        self.root = root.rstrip('/') or '/'
+        self.ttl = ttl
+        # 目录 -> {名称: (是否目录, 大小, 修改时间)}
+        self.children: Dict[str, Dict[str, tuple]] = {}
+        self.dir_mtimes: Dict[str, float] = {}
+        self.refreshed = 0.0
+        self.refreshed_dirs = 0
+        self._lock = threading.Lock()
+
+    def _find(self, args: str) -> List[tuple]:
+        # 一次读取全部输出，批次可以更大以减少 stat 进程数
+        output = self.device.shell(find_stat_command(self.root + '/', args, batch=INDEX_STAT_BATCH))
+        entries = []
+        for line in output.splitlines():
+            parsed = parse_stat_line(line)
+            if parsed is not None:
+                path = parsed[0].rstrip('/') or '/'
+                entries.append((path.replace('//', '/'),) + parsed[1:])
+        return entries
+
+    def build(self):
+        """
+        全量建立索引
+        """
+        started = time.perf_counter()
+        children: Dict[str, Dict[str, tuple]] = {}
+        dir_mtimes: Dict[str, float] = {}
+        for path, is_dir, size, mtime in self._find(''):
+            if is_dir:
+                dir_mtimes[path] = mtime
+                children.setdefault(path, {})
+            if path != self.root:
+                parent, name = posixpath.split(path)
+                children.setdefault(parent, {})[name] = (is_dir, size, mtime)
+        with self._lock:
+            self.children = children
+            self.dir_mtimes = dir_mtimes
+            self.refreshed = time.monotonic()
+            self.refreshed_dirs = len(dir_mtimes)
+        logger.info(f"Built path index for {self.root}: {len(dir_mtimes)} dirs, {self.size()} entries, "
+                    f"{round(time.perf_counter() - started, 2)}s")
+
+    def _list_dir(self, path: str) -> Dict[str, tuple]:
+        entries = {}
+        for entry in self.device.sync.list(path):
+            if entry.path in ('.', '..'):
+                continue
+            entries[entry.path] = (stat.S_ISDIR(entry.mode), entry.size, entry.mtime.timestamp())
+        return entries
+
+    def refresh(self):
+        """
+        增量刷新：只重新列出修改时间变化或新出现的目录，删除已不存在的目录
+        """
+        if not self.dir_mtimes:
+            self.build()
+            return
+        started = time.perf_counter()
+        current = {path: mtime for path, _, _, mtime in self._find('-type d')}
+        changed = [path for path, mtime in current.items() if self.dir_mtimes.get(path) != mtime]
+        listed = {}
+        for path in changed:
+            try:
+                listed[path] = self._list_dir(path)
+            except Exception as e:
+                logger.debug(f"列出目录 {path} 失败: {e}")
+        with self._lock:
+            for path in list(self.dir_mtimes):
+                if path not in current:
+                    self.dir_mtimes.pop(path, None)
+                    self.children.pop(path, None)
+            for path, entries in listed.items():
+                self.children[path] = entries
+                self.dir_mtimes[path] = current[path]
+            self.refreshed = time.monotonic()
+            self.refreshed_dirs = len(listed)
+        logger.debug(f"Refreshed path index for {self.root}: {len(listed)}/{len(current)} dirs changed, "
+                     f"{round(time.perf_counter() - started, 2)}s")
+
+    def ensure_fresh(self):
+        if not self.dir_mtimes:
+            self.build()
+        elif time.monotonic() - self.refreshed > self.ttl:
+            self.refresh()
+
+    def search(self, pattern: str, limit: int = 5000) -> List[dict]:
+        """
+        在本地索引中按文件名搜索
+        """
+        match = name_matcher(pattern)
+        results = []
+        with self._lock:
+            for directory, entries in self.children.items():
+                for name, (is_dir, size, mtime) in entries.items():
+                    if match(name):
+                        results.append(to_result(posixpath.join(directory, name), is_dir, size, mtime))
+                        if len(results) >= limit:
+                            return results
+        return results
+
+    def size(self) -> int:
+        with self._lock:
+            return sum(len(entries) for entries in self.children.values())
+
+    def stats(self) -> dict:
+        return {
+            'root': self.root,
+            'dirs': len(self.dir_mtimes),
+            'entries': self.size(),
+            'refreshedDirs': self.refreshed_dirs,
+            'age': round(time.monotonic() - self.refreshed, 1) if self.refreshed else None,
+        }
@@ -0,0 +1,158 @@
+# !/usr/bin/env python
+# -*- coding:utf-8 -*-
+"""
+@Version  : Python 3.12
+@Software : PyCharm
+"""
+import hmac
+import mimetypes
+import os
+import re
+import secrets
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Dict
+
+from loguru import logger
+
+
+RE_RANGE = re.compile(r'bytes=(\d*)-(\d*)')
+
+
+def serve_file(handler: BaseHTTPRequestHandler, file_path: str, chunk_size: int = 256 * 1024):
+    """
+    输出本地文件，支持 Range 请求，按块读取，内存占用与文件大小无关
+    :param handler: 请求处理器
+    :param file_path: 文件路径
+    :param chunk_size: 每次读取的字节数
+    """
+    if not os.path.isfile(file_path):
+        handler.send_error(404)
+        return
+    size = os.path.getsize(file_path)
+    start, end = 0, size - 1
+    status = 200
+    match = RE_RANGE.match(handler.headers.get('Range', ''))
+    if match and (match.group(1) or match.group(2)):
+        if match.group(1):
+            start = int(match.group(1))
+            end = min(int(match.group(2)), size - 1) if match.group(2) else size - 1
+        else:
+            start = max(size - int(match.group(2)), 0)
+        if start > end or start >= size:
+            handler.send_response(416)
+            handler.send_header('Content-Range', f'bytes */{size}')
+            handler.send_header('Content-Length', '0')
+            handler.end_headers()
+            return
+        status = 206
+
+    handler.send_response(status)
+    handler.send_header('Content-Type', mimetypes.guess_type(file_path)[0] or 'application/octet-stream')
+    handler.send_header('Accept-Ranges', 'bytes')
+    handler.send_header('Content-Length', str(end - start + 1))
+    if status == 206:
+        handler.send_header('Content-Range', f'bytes {start}-{end}/{size}')
+    handler.end_headers()
+    if handler.command == 'HEAD':
+        return
+    with open(file_path, 'rb') as f:
+        f.seek(start)
+        remaining = end - start + 1
+        while remaining > 0:
+            chunk = f.read(min(chunk_size, remaining))
+            if not chunk:
+                break
+            handler.wfile.write(chunk)
+            remaining -= len(chunk)
+
+
+class _RequestHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def do_GET(self):
+        self.server.dispatch(self)
+
+    def do_HEAD(self):
+        self.server.dispatch(self)
+
+    def log_message(self, format, *args):
+        logger.debug(f"LocalServer: {format % args}")
+
+
+class _Server(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address, routes: Dict[str, Callable], token: str):
+        super().__init__(address, _RequestHandler)
+        self.routes = routes
+        self.token = token
+
+    def dispatch(self, handler: BaseHTTPRequestHandler):
+        # 路径必须以 /<token> 开头，本机其它网页无法猜到地址
+        token, _, rest = handler.path.split('?', 1)[0].lstrip('/').partition('/')
+        if not hmac.compare_digest(token.encode('utf-8'), self.token.encode('utf-8')):
+            handler.send_error(404)
+            return
+        path = '/' + rest
+        # 最长前缀优先，前缀之后必须是路径结尾或 /
+        for prefix in sorted(self.routes, key=len, reverse=True):
+            base = prefix.rstrip('/')
+            if path == base or path.startswith(base + '/'):
+                try:
+                    self.routes[prefix](handler, path[len(prefix):])
+                except (BrokenPipeError, ConnectionResetError):
+                    pass
+                except Exception as e:
+                    logger.error(f"处理请求 {path} 失败: {e}")
+                return
+        handler.send_error(404)
+
+
+class LocalServer:
+    """
+    仅监听 127.0.0.1 的本地 HTTP 服务，供前端拉取视频流、录屏文件等大块数据，避免经 js_api 桥传输
+
+    每次启动生成随机 token，所有地址都以 /<token> 开头，缺少 token 的请求返回 404；不发送 CORS 头。
+    """
+
+    def __init__(self, host: str = '127.0.0.1', port: int = 0):
+        self.host = host
+        self.port = port
+        self.routes: Dict[str, Callable] = {}
+        self.token = secrets.token_urlsafe(16)
+        self._server: _Server = None
+        self._lock = threading.Lock()
+
+    def route(self, prefix: str, handler: Callable[[BaseHTTPRequestHandler, str], None]):
+        """
+        注册路由
+        :param prefix: 路径前缀（不含 token），只匹配该路径本身及其子路径
+        :param handler: 处理函数 (request_handler, 前缀之后的路径)
+        """
+        self.routes[prefix] = handler
+
+    def unroute(self, prefix: str):
+        self.routes.pop(prefix, None)
+
+    def start(self):
+        with self._lock:
+            if self._server is not None:
+                return
+            self._server = _Server((self.host, self.port), self.routes, self.token)
+            self.port = self._server.server_address[1]
+            t = threading.Thread(target=self._server.serve_forever, name='local-server')
+            t.daemon = True
+            t.start()
+            logger.info(f"Local server listening on {self.host}:{self.port}")
+
+    def stop(self):
+        with self._lock:
+            if self._server is not None:
+                self._server.shutdown()
+                self._server.server_close()
+                self._server = None
+
+    def url(self, path: str) -> str:
+        self.start()
+        return f"http://{self.host}:{self.port}/{self.token}{path}"
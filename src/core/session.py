@@ -0,0 +1,417 @@
+# !/usr/bin/env python
+# -*- coding:utf-8 -*-
+"""
+@Version  : Python 3.12
+@Software : PyCharm
+"""
+import os
+import re
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor, wait
+from typing import Callable, Dict, List, Optional
+
+from adbutils import AdbDevice, adb
+from loguru import logger
+
+from src.core.cpu import CpuMonitor
+from src.core.fps import FpsMonitor
+from src.core.listing import ListingCache
+from src.core.logarchive import LOGCAT_ARCHIVE_DIR, LogArchive
+from src.core.logcat import LogcatFilter, LogcatManager
+from src.core.logstore import LogStore
+from src.core.memory import MemoryMonitor
+from src.core.mirror import ScreenMirror
+from src.core.packages import PackageIndex
+from src.core.pid import PidCache
+from src.core.process import ProcessMonitor, ProcessSampler
+from src.core.props import PropertySnapshot
+from src.core.sampler import PerformanceSampler
+from src.core.search import PathIndex
+
+# 多设备监控支持的指标
+FLEET_METRICS = ('cpu', 'memory', 'fps', 'logcat')
+
+# 会话内 shell 调用的超时（秒），半断开的设备不会无限期占用线程
+SHELL_TIMEOUT = 10.0
+
+
+def parse_meminfo(output: str) -> dict:
+    """
+    解析 /proc/meminfo 中的总内存与可用内存（MB）
+    """
+    values = {}
+    for line in output.splitlines():
+        parts = line.split()
+        if len(parts) >= 2 and parts[0] in ('MemTotal:', 'MemAvailable:'):
+            values[parts[0][:-1]] = int(parts[1]) // 1024
+    total = values.get('MemTotal', 0)
+    available = values.get('MemAvailable', 0)
+    return {
+        'total': total,
+        'available': available,
+        'usage': round((total - available) * 100 / total, 1) if total else None,
+    }
+
+
+class DeviceSession:
+    """
+    单台设备的会话，持有该设备的连接、各类缓存与监控，首次使用时创建
+    """
+
+    def __init__(self, serial: str, device: AdbDevice = None, timeout: float = SHELL_TIMEOUT):
+        """
+        :param serial: 序列号
+        :param device: 设备，为空时按序列号连接
+        :param timeout: 属性快照与 PID 缓存的 shell 调用超时（秒）
+        """
+        self.serial = serial
+        self.device = device or adb.device(serial)
+        self.timeout = timeout
+        self.snapshot = PropertySnapshot(self.device, timeout=timeout)
+        self.pid_cache = PidCache(self.device, timeout=timeout)
+        # 单设备视图的采样任务，每台设备独立，互不影响
+        self.sampler = PerformanceSampler()
+        self.path_indexes: Dict[str, PathIndex] = {}
+        self.mirror: Optional[ScreenMirror] = None
+        self.process_monitor: Optional[ProcessMonitor] = None
+        self._package_index: Optional[PackageIndex] = None
+        self._listing_cache: Optional[ListingCache] = None
+        self._process_sampler: Optional[ProcessSampler] = None
+        self._process_snapshot: Optional[ProcessSampler] = None
+        self._log_store: Optional[LogStore] = None
+        self._log_archive: Optional[LogArchive] = None
+        self._lock = threading.Lock()
+
+    @property
+    def package_index(self) -> PackageIndex:
+        with self._lock:
+            if self._package_index is None:
+                self._package_index = PackageIndex(self.device)
+            return self._package_index
+
+    @property
+    def listing_cache(self) -> ListingCache:
+        with self._lock:
+            if self._listing_cache is None:
+                self._listing_cache = ListingCache(self.device)
+            return self._listing_cache
+
+    @property
+    def process_sampler(self) -> ProcessSampler:
+        with self._lock:
+            if self._process_sampler is None:
+                self._process_sampler = ProcessSampler(self.device)
+            return self._process_sampler
+
+    @property
+    def process_snapshot(self) -> ProcessSampler:
+        """
+        单次查询进程表用的采样器，与 process_monitor 的增量基线互不干扰
+        """
+        with self._lock:
+            if self._process_snapshot is None:
+                self._process_snapshot = ProcessSampler(self.device)
+            return self._process_snapshot
+
+    @property
+    def log_store(self) -> LogStore:
+        with self._lock:
+            if self._log_store is None:
+                self._log_store = LogStore()
+            return self._log_store
+
+    @property
+    def log_archive(self) -> LogArchive:
+        with self._lock:
+            if self._log_archive is None:
+                safe_serial = re.sub(r'[<>:"/\\|?*\x00-\x1f]', '_', self.serial)
+                self._log_archive = LogArchive(os.path.join(LOGCAT_ARCHIVE_DIR, safe_serial))
+            return self._log_archive
+
+    def path_index(self, root: str) -> PathIndex:
+        root = root.rstrip('/') or '/'
+        with self._lock:
+            index = self.path_indexes.get(root)
+            if index is None:
+                index = PathIndex(self.device, root)
+                self.path_indexes[root] = index
+            return index
+
+    def flush_log_archive(self):
+        if self._log_archive is not None:
+            self._log_archive.flush()
+
+    def close(self):
+        """
+        停止该设备的全部采样与后台任务
+        """
+        self.sampler.stop()
+        if self.process_monitor is not None:
+            self.process_monitor.stop()
+        if self.mirror is not None:
+            self.mirror.stop()
+        if self._listing_cache is not None:
+            self._listing_cache.close()
+        if self._log_archive is not None:
+            self._log_archive.close()
+
+
+class SessionManager:
+    """
+    按序列号管理设备会话，多设备任务共用一个线程池
+    """
+
+    def __init__(self, workers: int = 16):
+        """
+        :param workers: 共享线程池的大小
+        """
+        self.sessions: Dict[str, DeviceSession] = {}
+        self.pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="session")
+        # run() 超时后仍在执行的任务，按序列号记录，完成前不再为该设备提交新任务
+        self._abandoned: Dict[str, Future] = {}
+        # 多设备监控的 logcat 与单设备日志视图相互独立
+        self.logcat = LogcatManager()
+        self._lock = threading.Lock()
+
+    def get(self, serial: str) -> DeviceSession:
+        with self._lock:
+            session = self.sessions.get(serial)
+            if session is None:
+                session = DeviceSession(serial)
+                self.sessions[serial] = session
+                logger.info(f"Session created for {serial}")
+            return session
+
+    def find(self, serial: str) -> Optional[DeviceSession]:
+        """
+        获取已存在的会话，不创建新会话（用于后台任务，避免为已断开的设备重新创建会话）
+        """
+        with self._lock:
+            return self.sessions.get(serial)
+
+    def close(self, serial: str = None):
+        """
+        关闭会话
+        :param serial: 序列号，为空时关闭全部会话
+        """
+        with self._lock:
+            if serial is None:
+                sessions = list(self.sessions.values())
+                self.sessions.clear()
+            else:
+                session = self.sessions.pop(serial, None)
+                sessions = [session] if session else []
+        for session in sessions:
+            self.logcat.stop(session.serial)
+            session.close()
+            logger.info(f"Session closed for {session.serial}")
+
+    def run(self, serials: List[str], func: Callable[[DeviceSession], object], timeout: float = 10.0) -> dict:
+        """
+        在共享线程池中对多台设备并行执行，单台设备超时或出错不影响其他设备
+        :param serials: 序列号列表
+        :param func: 以会话为参数的函数
+        :param timeout: 等待的最长时间（秒）
+        :return: {序列号: {'result': ...} 或 {'error': ...}}
+        """
+        results = {}
+        futures = {}
+        with self._lock:
+            for serial in serials:
+                abandoned = self._abandoned.get(serial)
+                if abandoned is not None and not abandoned.done():
+                    # 上一次超时的任务仍占用着线程，不再叠加
+                    results[serial] = {'error': 'busy'}
+                    continue
+                self._abandoned.pop(serial, None)
+                futures[serial] = self.pool.submit(lambda s=serial: func(self.get(s)))
+        wait(futures.values(), timeout=timeout)
+        for serial, future in futures.items():
+            if not future.done():
+                # 尚未开始的任务直接取消，已在执行的任务依靠 shell 超时结束
+                if not future.cancel():
+                    with self._lock:
+                        self._abandoned[serial] = future
+                results[serial] = {'error': 'timeout'}
+            elif future.exception() is not None:
+                results[serial] = {'error': str(future.exception())}
+            else:
+                results[serial] = {'result': future.result()}
+        return results
+
+
+class FleetMonitor:
+    """
+    多设备监控
+
+    调度线程按节拍把每台设备的一次采样提交到共享线程池；某台设备上一次采样尚未完成时跳过该设备本次节拍，
+    慢设备或掉线设备只影响自身。结果按序列号缓存，按 batch_interval 合并后一次性回调。
+    """
+
+    def __init__(self, manager: SessionManager, serials: List[str], metrics: List[str], package_name: str = None,
+                 on_batch: Callable[[dict, dict], None] = None, on_logs: Callable[[str, list, dict], None] = None,
+                 interval: float = 1.0, batch_interval: float = 1.0, timeout: float = SHELL_TIMEOUT):
+        """
+        :param manager: 会话管理
+        :param serials: 序列号列表
+        :param metrics: 指标，见 FLEET_METRICS
+        :param package_name: 应用包名，为空时只采样整机指标，fps 需要包名
+        :param on_batch: 批量回调 ({序列号: 采样列表}, {序列号: 统计})
+        :param on_logs: logcat 回调 (序列号, 日志, 统计)
+        :param interval: 采样间隔（秒）
+        :param batch_interval: 推送间隔（秒）
+        :param timeout: 每次 shell 调用的超时（秒），超时的采样计为失败
+        """
+        self.manager = manager
+        self.serials = list(serials)
+        self.metrics = [metric for metric in metrics if metric in FLEET_METRICS]
+        self.package_name = package_name
+        self.on_batch = on_batch
+        self.on_logs = on_logs
+        self.interval = interval
+        self.batch_interval = batch_interval
+        self.timeout = timeout
+        self.stats = {serial: {'samples': 0, 'skipped': 0, 'errors': 0, 'lastMs': None} for serial in self.serials}
+        self._futures: Dict[str, Future] = {}
+        # 每台设备独立的差值采样状态
+        self._cpu: Dict[str, CpuMonitor] = {}
+        self._fps: Dict[str, FpsMonitor] = {}
+        self._memory: Dict[str, MemoryMonitor] = {}
+        self._buffer: Dict[str, list] = {}
+        self._lock = threading.Lock()
+        self._stopped = threading.Event()
+        self._thread: threading.Thread = None
+
+    def start(self):
+        # 会话在这里创建，采样线程中只查找已有会话
+        for serial in self.serials:
+            self.manager.get(serial)
+        if 'logcat' in self.metrics and self.on_logs is not None:
+            for serial in self.serials:
+                self.manager.pool.submit(self._start_logcat, serial)
+        self._thread = threading.Thread(target=self._loop, name="fleet-monitor")
+        self._thread.daemon = True
+        self._thread.start()
+
+    def stop(self):
+        self._stopped.set()
+        if 'logcat' in self.metrics:
+            for serial in self.serials:
+                self.manager.logcat.stop(serial)
+        self._flush()
+
+    def is_alive(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def remove(self, serial: str):
+        """
+        停止监控一台设备（如设备已断开），其余设备不受影响
+        """
+        # 调度线程遍历的是旧列表，这里整体替换而不原地修改
+        self.serials = [s for s in self.serials if s != serial]
+        self.manager.logcat.stop(serial)
+        # 之后推送的快照中不再出现该设备
+        with self._lock:
+            for per_device in (self.stats, self._futures, self._buffer, self._cpu, self._memory, self._fps):
+                per_device.pop(serial, None)
+
+    def _start_logcat(self, serial: str):
+        try:
+            session = self.manager.find(serial)
+            if session is None:
+                return
+            log_filter = LogcatFilter.from_dict({'level': 'E'})
+            self.manager.logcat.start(session.device, lambda entries, stats: self.on_logs(serial, entries, stats),
+                                      log_filter, clear=False)
+        except Exception as e:
+            logger.error(f"启动 {serial} 的 logcat 失败: {e}")
+
+    def _loop(self):
+        anchor = time.monotonic()
+        tick = 0
+        last_flush = anchor
+        while not self._stopped.is_set():
+            delay = anchor + tick * self.interval - time.monotonic()
+            if delay > 0 and self._stopped.wait(delay):
+                break
+            for serial in self.serials:
+                future = self._futures.get(serial)
+                if future is not None and not future.done():
+                    stats = self.stats.get(serial)
+                    if stats is not None:
+                        stats['skipped'] += 1
+                    continue
+                self._futures[serial] = self.manager.pool.submit(self._sample, serial)
+            tick += 1
+            # 调度本身落后时跳过错过的节拍
+            behind = time.monotonic() - (anchor + tick * self.interval)
+            if behind > 0:
+                tick += int(behind // self.interval) + 1
+            now = time.monotonic()
+            if now - last_flush >= self.batch_interval:
+                last_flush = now
+                self._flush()
+
+    def _sample(self, serial: str):
+        started = time.perf_counter()
+        stats = self.stats.get(serial)
+        session = self.manager.find(serial)
+        if session is None or stats is None or serial not in self.serials:
+            # 设备已断开，会话已关闭，丢弃本次采样
+            return
+        try:
+            data = self.collect(session)
+            stats['samples'] += 1
+        except Exception as e:
+            stats['errors'] += 1
+            data = {'error': str(e)}
+        stats['lastMs'] = round((time.perf_counter() - started) * 1000, 1)
+        data['timestamp'] = int(time.time() * 1000)
+        with self._lock:
+            if serial in self.stats:
+                self._buffer.setdefault(serial, []).append(data)
+
+    def collect(self, session: DeviceSession) -> dict:
+        """
+        采样一台设备的各项指标
+        """
+        data = {}
+        pid = session.pid_cache.get_pid(self.package_name) if self.package_name else 0
+        if self.package_name:
+            data['pid'] = pid
+        if 'cpu' in self.metrics:
+            monitor = self._cpu.get(session.serial)
+            if monitor is None:
+                monitor = self._cpu[session.serial] = CpuMonitor(session.device, session.snapshot, top_threads=3,
+                                                                 timeout=self.timeout)
+            cpu = monitor.sample(pid)
+            data['cpu'] = {'total': cpu['total'], 'process': cpu['process'], 'threads': cpu['threads']}
+        if 'memory' in self.metrics:
+            if self.package_name:
+                monitor = self._memory.get(session.serial)
+                if monitor is None:
+                    monitor = self._memory[session.serial] = MemoryMonitor(session.device, session.snapshot,
+                                                                           timeout=self.timeout)
+                processes = monitor.get_mem_info(pid, package_name=self.package_name)
+                data['memory'] = {'processes': processes or {}}
+            else:
+                data['memory'] = parse_meminfo(session.device.shell("cat /proc/meminfo", timeout=self.timeout))
+        if 'fps' in self.metrics and self.package_name:
+            monitor = self._fps.get(session.serial)
+            if monitor is None:
+                monitor = self._fps[session.serial] = FpsMonitor(session.device, self.package_name,
+                                                                 snapshot=session.snapshot, timeout=self.timeout)
+            data['fps'] = monitor.sample()
+        return data
+
+    def _flush(self):
+        with self._lock:
+            batch, self._buffer = self._buffer, {}
+            stats = {serial: dict(stats) for serial, stats in self.stats.items()}
+        if not batch or self.on_batch is None:
+            return
+        try:
+            self.on_batch(batch, stats)
+        except Exception as e:
+            logger.error(f"推送多设备采样数据失败: {e}")
@@ -0,0 +1,223 @@
+# !/usr/bin/env python
+# -*- coding:utf-8 -*-
+"""
+@Version  : Python 3.12
+@Software : PyCharm
+"""
+import subprocess
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional, Set
+
+from adbutils import adb
+from loguru import logger
+
+PROP_MARKER = '@@PROP'
+# 设备可用的状态，其余如 offline、unauthorized 只在设备表中记录
+ONLINE_STATE = 'device'
+
+
+def parse_props(output: str) -> Dict[str, str]:
+    """
+    解析逐行 getprop 的输出，各属性之间以 PROP_MARKER 分隔
+    :return: {'model': ..., 'name': ...}
+    """
+    values = [part.strip() for part in output.split(PROP_MARKER)]
+    return {'model': values[0] if values else '', 'name': values[1] if len(values) > 1 else ''}
+
+
+class DeviceTracker:
+    """
+    基于 adb server track-devices 的设备跟踪
+
+    后台线程读取 track-devices 推送的设备变化，维护设备表；设备首次上线时在线程池中执行一次 adb root
+    并读取型号与名称，属性按序列号缓存，重新插拔不再读取。设备断开或离开 device 状态（offline、unauthorized）
+    时回调 on_disconnect。连接 adb server 中断时表中设备标记为未知并重连，重连后 track-devices 会重新推送
+    当前的全部设备，超过 resync_timeout 仍未出现的设备才视为断开，adb server 短暂重启不会关闭设备会话。
+    """
+
+    def __init__(self, on_event: Callable[[dict], None] = None,
+                 on_disconnect: Callable[[str], None] = None, reconnect_interval: float = 1.0,
+                 resync_timeout: float = 5.0, root: bool = True, workers: int = 4):
+        """
+        :param on_event: 设备事件回调 {'type': connected / disconnected / state, 'device': {...}}
+        :param on_disconnect: 设备断开回调 (序列号)
+        :param reconnect_interval: 重连 adb server 的初始间隔（秒），连续失败时逐次翻倍，最长 10 秒
+        :param resync_timeout: 连接中断后，设备在重连后多少秒内未重新出现才视为断开
+        :param root: 设备首次上线时是否执行 adb root
+        :param workers: 读取设备属性的线程数
+        """
+        self.on_event = on_event
+        self.on_disconnect = on_disconnect
+        self.reconnect_interval = reconnect_interval
+        self.resync_timeout = resync_timeout
+        self.root = root
+        # 序列号 -> {serial, state, model, name}
+        self.devices: Dict[str, dict] = {}
+        # 序列号 -> {model, name}，断开后保留
+        self._props: Dict[str, Dict[str, str]] = {}
+        self._rooted: Set[str] = set()
+        self._pending: Set[str] = set()
+        # 连接中断后状态未知的设备 -> 标记时间
+        self._unknown: Dict[str, float] = {}
+        self._ready = threading.Event()
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="device-props")
+        self._lock = threading.Lock()
+        self._stopped = threading.Event()
+        self._thread: threading.Thread = None
+
+    def start(self):
+        self._thread = threading.Thread(target=self._loop, name="device-tracker")
+        self._thread.daemon = True
+        self._thread.start()
+
+    def stop(self):
+        self._stopped.set()
+
+    def is_alive(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def wait_ready(self, timeout: float = 2.0) -> bool:
+        """
+        等待首次连接 adb server 后的设备推送完成
+        """
+        return self._ready.wait(timeout)
+
+    def list(self, online: bool = True) -> List[dict]:
+        """
+        读取设备表
+        :param online: 为 True 时只返回可用设备
+        """
+        with self._lock:
+            return [dict(device) for device in self.devices.values()
+                    if not online or (device['state'] == ONLINE_STATE and device['serial'] not in self._pending
+                                      and device['serial'] not in self._unknown)]
+
+    def is_online(self, serial: str) -> bool:
+        """
+        设备是否处于 device 状态，adb server 重连期间状态未知的设备仍视为在线
+        """
+        with self._lock:
+            device = self.devices.get(serial)
+            return device is not None and device['state'] == ONLINE_STATE
+
+    def _loop(self):
+        delay = self.reconnect_interval
+        while not self._stopped.is_set():
+            try:
+                for event in adb.track_devices():
+                    delay = self.reconnect_interval
+                    if self._stopped.is_set():
+                        return
+                    if event.present:
+                        self._update(event.serial, event.status)
+                    else:
+                        self._remove(event.serial)
+                    # 首批事件在连接后立即推送，之后只在设备变化时才有数据
+                    self._ready.set()
+            except Exception as e:
+                if not self._stopped.is_set():
+                    logger.error(f"跟踪设备失败，{delay:.0f} 秒后重连: {e}")
+            # 连接中断期间无法得知设备状态，先标记为未知，重连后仍未出现的设备再视为断开
+            now = time.monotonic()
+            with self._lock:
+                for serial in self.devices:
+                    self._unknown.setdefault(serial, now)
+                expire = bool(self._unknown)
+            if expire:
+                timer = threading.Timer(delay + self.resync_timeout, self._expire_unknown)
+                timer.daemon = True
+                timer.start()
+            # adb server 未启动时也不阻塞设备列表的读取
+            self._ready.set()
+            if self._stopped.wait(delay):
+                return
+            delay = min(delay * 2, 10.0)
+
+    def _expire_unknown(self):
+        now = time.monotonic()
+        with self._lock:
+            expired = [serial for serial, since in self._unknown.items() if now - since >= self.resync_timeout]
+        for serial in expired:
+            self._remove(serial)
+
+    def _update(self, serial: str, state: str):
+        with self._lock:
+            device = self.devices.get(serial)
+            previous = device['state'] if device else None
+            self._unknown.pop(serial, None)
+            props = self._props.get(serial)
+            device = {'serial': serial, 'state': state,
+                      'model': props['model'] if props else serial, 'name': props['name'] if props else ''}
+            self.devices[serial] = device
+            fetch = state == ONLINE_STATE and props is None and serial not in self._pending
+            if fetch:
+                self._pending.add(serial)
+        logger.info(f"Device {serial}: {previous} -> {state}")
+        if fetch:
+            self._pool.submit(self._prepare, serial)
+        elif state == ONLINE_STATE:
+            self._emit('connected', device)
+        elif previous is not None:
+            if previous == ONLINE_STATE:
+                # offline、unauthorized 的设备无法使用，与断开同样处理
+                self._disconnected(serial)
+            self._emit('state', device)
+
+    def _remove(self, serial: str):
+        with self._lock:
+            device = self.devices.pop(serial, None)
+            self._pending.discard(serial)
+            self._unknown.pop(serial, None)
+        if device is None:
+            return
+        logger.info(f"Device {serial} disconnected")
+        if device['state'] == ONLINE_STATE:
+            self._disconnected(serial)
+        self._emit('disconnected', device)
+
+    def _disconnected(self, serial: str):
+        if self.on_disconnect is None:
+            return
+        try:
+            self.on_disconnect(serial)
+        except Exception as e:
+            logger.error(f"处理设备 {serial} 断开失败: {e}")
+
+    def _prepare(self, serial: str):
+        """
+        设备首次上线：adb root 与读取属性
+        """
+        if self.root and serial not in self._rooted:
+            self._rooted.add(serial)
+            try:
+                subprocess.run(['adb', '-s', serial, 'root'], capture_output=True, timeout=10)
+            except Exception as e:
+                logger.error(f"设备 {serial} 执行 adb root 失败: {e}")
+        props: Optional[Dict[str, str]] = None
+        try:
+            output = adb.device(serial).shell(
+                f"getprop ro.product.model; echo {PROP_MARKER}; getprop ro.product.name", timeout=10)
+            props = parse_props(output)
+        except Exception as e:
+            # adb root 重启 adbd 时设备会短暂断开，重新上线后再读取
+            logger.error(f"读取设备 {serial} 属性失败: {e}")
+        with self._lock:
+            self._pending.discard(serial)
+            device = self.devices.get(serial)
+            if props is not None:
+                self._props[serial] = props
+                if device is not None:
+                    device.update(props)
+            device = dict(device) if device is not None else None
+        if device is not None and device['state'] == ONLINE_STATE:
+            self._emit('connected', device)
+
+    def _emit(self, event_type: str, device: dict):
+        if self.on_event is None:
+            return
+        try:
+            self.on_event({'type': event_type, 'device': device})
+        except Exception as e:
+            logger.error(f"推送设备事件失败: {e}")
@@ -0,0 +1,333 @@
+# !/usr/bin/env python
+# -*- coding:utf-8 -*-
+"""
+@Version  : Python 3.12
+@Software : PyCharm
+"""
+import contextlib
+import os
+import posixpath
+import shlex
+import stat
+import threading
+import time
+import uuid
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, List, Optional
+
+from adbutils import AdbDevice
+from loguru import logger
+
+PART_SUFFIX = ".part"
+
+
+class TransferItem:
+    __slots__ = ('source', 'target', 'size', 'mtime')
+
+    def __init__(self, source: str, target: str, size: int, mtime: float):
+        self.source = source
+        self.target = target
+        self.size = size
+        self.mtime = mtime
+
+
+class CountingReader:
+    """
+    包装本地文件，统计 sync.push 读取的字节数
+    """
+
+    def __init__(self, f, on_read: Callable[[int], None]):
+        self._f = f
+        self._on_read = on_read
+
+    def read(self, size: int = -1) -> bytes:
+        data = self._f.read(size)
+        self._on_read(len(data))
+        return data
+
+
+def walk_remote(device: AdbDevice, root: str) -> List[tuple]:
+    """
+    遍历设备上的文件或目录
+    :return: [(远程路径, 相对路径, 大小, 修改时间)]
+    """
+    info = device.sync.stat(root)
+    # /sdcard 等入口是指向目录的符号链接
+    is_dir = stat.S_ISDIR(info.mode) or (stat.S_ISLNK(info.mode) and any(
+        entry.path not in ('.', '..') for entry in device.sync.list(root.rstrip('/') + '/')))
+    if not is_dir:
+        return [(root, posixpath.basename(root), info.size, info.mtime.timestamp())]
+    files = []
+    pending = [(root, '')]
+    while pending:
+        directory, relative = pending.pop()
+        for entry in device.sync.list(directory):
+            if entry.path in ('.', '..'):
+                continue
+            path = posixpath.join(directory, entry.path)
+            rel = posixpath.join(relative, entry.path) if relative else entry.path
+            if stat.S_ISDIR(entry.mode):
+                pending.append((path, rel))
+            elif stat.S_ISREG(entry.mode):
+                files.append((path, rel, entry.size, entry.mtime.timestamp()))
+    return files
+
+
+def walk_local(root: str, empty_dirs: List[str] = None) -> List[tuple]:
+    """
+    遍历本地文件或目录
+    :param root: 文件或目录
+    :param empty_dirs: 不为空时收集空目录的相对路径
+    :return: [(本地路径, 相对路径, 大小, 修改时间)]
+    """
+    if os.path.isfile(root):
+        return [(root, os.path.basename(root), os.path.getsize(root), os.path.getmtime(root))]
+    files = []
+    for directory, dirs, names in os.walk(root):
+        if empty_dirs is not None and not dirs and not names:
+            empty_dirs.append(os.path.relpath(directory, root).replace(os.sep, '/'))
+        for name in names:
+            path = os.path.join(directory, name)
+            rel = os.path.relpath(path, root).replace(os.sep, '/')
+            st = os.stat(path)
+            files.append((path, rel, st.st_size, st.st_mtime))
+    return files
+
+
+def remote_files(device: AdbDevice, root: str) -> dict:
+    """
+    设备目录下已有的文件 {相对路径: (远程路径, 大小, 修改时间)}，目录不存在时为空
+    """
+    try:
+        return {rel: (path, size, mtime) for path, rel, size, mtime in walk_remote(device, root)}
+    except Exception:
+        return {}
+
+
+def make_dirs(device: AdbDevice, directories) -> None:
+    """
+    一次 shell 创建全部目录，不在每个文件传输前单独 mkdir
+    """
+    directories = sorted(set(directories))
+    if directories:
+        device.shell("mkdir -p " + " ".join(shlex.quote(d) for d in directories))
+
+
+class DirectoryTransfer:
+    """
+    递归传输目录
+
+    用 sync.list / os.walk 遍历目录树，在有界线程池中并发传输，每个文件独占一条 sync 连接；
+    目标文件大小与修改时间一致时跳过，重新传输时以文件为单位续传；下载先写入 .part 文件，
+    失败或中断时删除，不会留下看似完整的文件，中断的文件下次从头传输。
+    """
+
+    def __init__(self, device: AdbDevice, workers: int = 4, on_progress: Callable[[dict], None] = None,
+                 progress_interval: float = 0.5):
+        """
+        :param device: 设备
+        :param workers: 并发传输的文件数
+        :param on_progress: 进度回调
+        :param progress_interval: 进度回调的最小间隔（秒）
+        """
+        self.device = device
+        self.workers = workers
+        self.on_progress = on_progress
+        self.progress_interval = progress_interval
+        self.id = uuid.uuid4().hex[:8]
+        self.direction = None
+        self.items: List[TransferItem] = []
+        # 上传时需要创建的空目录（相对路径）
+        self.directories: List[str] = []
+        self.total_bytes = 0
+        self.done_bytes = 0
+        self.done_files = 0
+        self.skipped_files = 0
+        self.skipped_bytes = 0
+        self.completed: List[TransferItem] = []
+        self.failed: List[dict] = []
+        self.current: Optional[str] = None
+        self._started = 0.0
+        self._emitted = 0.0
+        # (时间, 已传输字节) 滑动窗口，用于计算速率
+        self._window = deque(maxlen=20)
+        self._lock = threading.Lock()
+        self._cancelled = threading.Event()
+
+    def cancel(self):
+        self._cancelled.set()
+
+    def download(self, remote: str, local: str) -> dict:
+        """
+        下载文件或目录
+        :param remote: 设备上的文件或目录
+        :param local: 本地目标目录，内容保存在 local/<remote 的名称> 下
+        :return: 传输结果
+        """
+        self.direction = 'download'
+        base = os.path.join(local, posixpath.basename(remote.rstrip('/')) or 'root')
+        files = walk_remote(self.device, remote)
+        if len(files) == 1 and files[0][0] == remote:
+            base = local
+        for source, rel, size, mtime in files:
+            target = os.path.join(base, *rel.split('/'))
+            # 大小与修改时间一致说明已下载完成
+            if os.path.isfile(target) and os.path.getsize(target) == size \
+                    and abs(os.path.getmtime(target) - mtime) < 1:
+                self.skipped_files += 1
+                self.skipped_bytes += size
+                continue
+            self.items.append(TransferItem(source, target, size, mtime))
+        return self._run(self._download_item)
+
+    def upload(self, local: str, remote: str) -> dict:
+        """
+        上传文件或目录
+        :param local: 本地文件或目录
+        :param remote: 设备上的目标目录，内容保存在 remote/<local 的名称> 下
+        :return: 传输结果
+        """
+        self.direction = 'upload'
+        base = posixpath.join(remote, os.path.basename(os.path.normpath(local)))
+        files = walk_local(local, self.directories)
+        if os.path.isfile(local):
+            base = remote
+        existing = remote_files(self.device, base)
+        for source, rel, size, mtime in files:
+            # sync.push 以上传时刻作为修改时间，远程文件不早于本地文件即视为已上传
+            _, remote_size, remote_mtime = existing.get(rel, (None, -1, 0))
+            if remote_size == size and remote_mtime >= int(mtime):
+                self.skipped_files += 1
+                self.skipped_bytes += size
+                continue
+            self.items.append(TransferItem(source, posixpath.join(base, rel), size, mtime))
+        make_dirs(self.device, [posixpath.dirname(item.target) for item in self.items]
+                  + [posixpath.join(base, rel) for rel in self.directories])
+        return self._run(self._upload_item)
+
+    def run(self, direction: str, items: List[TransferItem]) -> dict:
+        """
+        传输已确定的文件列表，上传时目标目录需已存在
+        :param direction: download / upload
+        :param items: 待传输的文件
+        :return: 传输结果
+        """
+        self.direction = direction
+        self.items = list(items)
+        return self._run(self._download_item if direction == 'download' else self._upload_item)
+
+    def _run(self, worker: Callable[[TransferItem, Callable[[int], None]], None]) -> dict:
+        self.total_bytes = sum(item.size for item in self.items)
+        self._started = time.monotonic()
+        self._window.append((self._started, 0))
+        logger.info(f"Transfer {self.id} {self.direction}: {len(self.items)} files, {self.total_bytes} bytes, "
+                    f"{self.skipped_files} skipped")
+        self._emit(force=True)
+        # 先传大文件，避免最后只剩一个大文件串行传输
+        items = sorted(self.items, key=lambda item: item.size, reverse=True)
+        with ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix=f"transfer-{self.id}") as pool:
+            for item in items:
+                pool.submit(self._transfer, worker, item)
+        result = self.progress()
+        result['finished'] = True
+        logger.info(f"Transfer {self.id} finished: {self.done_files}/{len(self.items)} files, "
+                    f"{len(self.failed)} failed, {result['elapsed']}s")
+        if self.on_progress:
+            self.on_progress(result)
+        return result
+
+    def _transfer(self, worker: Callable[[TransferItem, Callable[[int], None]], None], item: TransferItem):
+        if self._cancelled.is_set():
+            return
+        self.current = item.source
+        transferred = 0
+
+        def on_bytes(count: int):
+            nonlocal transferred
+            transferred += count
+            self._add_bytes(count)
+
+        try:
+            worker(item, on_bytes)
+            with self._lock:
+                self.done_files += 1
+                self.completed.append(item)
+        except Exception as e:
+            # 失败文件已计入的字节需要扣除
+            self._add_bytes(-transferred)
+            with self._lock:
+                self.failed.append({'path': item.source, 'error': str(e)})
+            if not self._cancelled.is_set():
+                logger.error(f"传输 {item.source} 失败: {e}")
+        self._emit()
+
+    def _download_item(self, item: TransferItem, on_bytes: Callable[[int], None]):
+        os.makedirs(os.path.dirname(item.target), exist_ok=True)
+        part = item.target + PART_SUFFIX
+        try:
+            with open(part, 'wb') as f:
+                for chunk in self.device.sync.iter_content(item.source):
+                    if self._cancelled.is_set():
+                        raise InterruptedError("cancelled")
+                    f.write(chunk)
+                    on_bytes(len(chunk))
+        except Exception:
+            # open 失败时 .part 不存在，删除出错不能掩盖原来的异常
+            with contextlib.suppress(OSError):
+                os.remove(part)
+            raise
+        os.replace(part, item.target)
+        os.utime(item.target, (item.mtime, item.mtime))
+
+    def _upload_item(self, item: TransferItem, on_bytes: Callable[[int], None]):
+        def on_read(count: int):
+            if self._cancelled.is_set():
+                raise InterruptedError("cancelled")
+            on_bytes(count)
+
+        with open(item.source, 'rb') as f:
+            self.device.sync.push(CountingReader(f, on_read), item.target)
+
+    def _add_bytes(self, count: int):
+        with self._lock:
+            self.done_bytes += count
+        self._emit()
+
+    def _emit(self, force: bool = False):
+        if self.on_progress is None:
+            return
+        now = time.monotonic()
+        with self._lock:
+            if not force and now - self._emitted < self.progress_interval:
+                return
+            self._emitted = now
+            self._window.append((now, self.done_bytes))
+        self.on_progress(self.progress())
+
+    def progress(self) -> dict:
+        now = time.monotonic()
+        with self._lock:
+            window = list(self._window)
+            done_bytes = self.done_bytes
+        speed = 0.0
+        if len(window) > 1 and window[-1][0] > window[0][0]:
+            speed = (window[-1][1] - window[0][1]) / (window[-1][0] - window[0][0])
+        remaining = max(self.total_bytes - done_bytes, 0)
+        return {
+            'id': self.id,
+            'direction': self.direction,
+            'totalFiles': len(self.items),
+            'doneFiles': self.done_files,
+            'skippedFiles': self.skipped_files,
+            'failedFiles': len(self.failed),
+            'failed': self.failed[-20:],
+            'totalBytes': self.total_bytes,
+            'doneBytes': done_bytes,
+            'speed': round(speed),
+            'eta': round(remaining / speed, 1) if speed > 0 else None,
+            'elapsed': round(now - self._started, 2),
+            'current': self.current,
+            'cancelled': self._cancelled.is_set(),
+            'finished': False,
+        }
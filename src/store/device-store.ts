@@ -9,9 +9,10 @@ interface DeviceState {
   fetchDeviceInfo: (serial: string) => Promise<void>;
   fetchDevices: () => Promise<void>;
   setCurrentDevice: (serial: string) => void;
+  handleDeviceEvent: (event: API.DeviceEvent) => void;
 }
 
-export const useDeviceStore = create<DeviceState>((set) => ({
+export const useDeviceStore = create<DeviceState>((set, get) => ({
   deviceInfo: null,
   devices: [],
   loading: false,
@@ -46,4 +47,25 @@ export const useDeviceStore = create<DeviceState>((set) => ({
       set({ loading: false });
     }
   },
+  handleDeviceEvent: (event) => {
+    const { serial, model, name } = event.device;
+    const others = get().devices.filter((device) => device.serial !== serial);
+    if (event.type === "connected") {
+      set({ devices: [...others, { serial, model, name }] });
+      // 没有选中设备时自动选中新插入的设备
+      if (!get().currentDevice) {
+        get().fetchDeviceInfo(serial);
+      }
+      return;
+    }
+    // 断开或变为 offline / unauthorized 的设备不可用
+    set({ devices: others });
+    if (get().currentDevice === serial) {
+      if (others.length > 0) {
+        get().fetchDeviceInfo(others[0].serial);
+      } else {
+        set({ currentDevice: null, deviceInfo: null });
+      }
+    }
+  },
 }));
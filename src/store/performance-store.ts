@@ -13,18 +13,39 @@ interface ProcessMemoryInfo {
   "TOTAL PSS": number;
 }
 
+export interface ProcessEvent {
+  type: "start" | "restart" | "died";
+  package: string;
+  process: string;
+  oldPid: number;
+  pid: number;
+  timestamp: number;
+}
+
 interface TimePoint {
   time: string;
   processes: {
     [processName: string]: ProcessMemoryInfo;
   };
+  events?: ProcessEvent[];
+}
+
+interface MemorySampleBatch {
+  packageName: string;
+  samples: TimePoint[];
+  stats: {
+    interval: number;
+    samples: number;
+    skipped: number;
+    errors: number;
+  };
 }
 
 interface MonitoringState {
   isRunning: boolean;
-  intervalId: NodeJS.Timeout | null;
+  packageName: string | null;
+  skipped: number;
   setRunning: (running: boolean) => void;
-  setIntervalId: (id: NodeJS.Timeout | null) => void;
 }
 
 interface DataState {
@@ -47,55 +68,64 @@ export const usePerformanceStore = create<PerformanceStore>()(
   persist(
     (set, get) => ({
       isRunning: false,
-      intervalId: null,
+      packageName: null,
+      skipped: 0,
       setRunning: (running) => set({ isRunning: running }),
-      setIntervalId: (id) => set({ intervalId: id }),
       timePoints: [],
       addTimePoint: (timePoint) => set((state) => ({
         timePoints: [...state.timePoints, timePoint]
       })),
       clearData: () => set({ timePoints: [] }),
       updateInterval: 1000,
-      setUpdateInterval: (interval) => set({ updateInterval: interval }),
+      setUpdateInterval: (interval) => {
+        const { isRunning, packageName } = get();
+        if (isRunning && packageName) {
+          window.pywebview.api.set_sampling_interval(packageName, interval);
+        }
+        set({ updateInterval: interval });
+      },
 
       startMonitoring: async (packageName: string) => {
         const store = get();
         if (store.isRunning) return;
 
-        const updateData = async () => {
-          try {
-            const response = await window.pywebview.api.get_memory_info(packageName);
-            const now = new Date();
-            const timeString = `${now.getHours().toString().padStart(2, "0")}:${
-              now.getMinutes().toString().padStart(2, "0")}:${
-              now.getSeconds().toString().padStart(2, "0")}`;
-
-            store.addTimePoint({
-              time: timeString,
-              processes: response
-            });
-          } catch (error) {
-            console.error("Failed to fetch memory data:", error);
-          }
+        if (!window.pywebview.state) {
+          window.pywebview.state = {};
+        }
+        window.pywebview.state.addMemorySamples = (batch: MemorySampleBatch) => {
+          if (batch.packageName !== get().packageName) return;
+          set((state) => ({
+            timePoints: [
+              ...state.timePoints,
+              ...batch.samples.map(({ time, processes, events }) => ({
+                time,
+                processes,
+                events,
+              })),
+            ],
+            skipped: batch.stats.skipped,
+          }));
         };
 
-        await updateData();
-        const id = setInterval(updateData, store.updateInterval);
-        
-        set({ 
-          isRunning: true,
-          intervalId: id 
-        });
+        set({ packageName, skipped: 0 });
+        try {
+          const started = await window.pywebview.api.start_memory_sampling(
+            packageName,
+            store.updateInterval,
+          );
+          set(started ? { isRunning: true } : { packageName: null });
+        } catch (error) {
+          console.error("Failed to start memory sampling:", error);
+          set({ packageName: null });
+        }
       },
 
       stopMonitoring: () => {
-        const { intervalId } = get();
-        if (intervalId) {
-          clearInterval(intervalId);
-        }
-        set({ 
+        const { packageName } = get();
+        window.pywebview.api.stop_memory_sampling(packageName);
+        set({
           isRunning: false,
-          intervalId: null 
+          packageName: null,
         });
       },
     }),
@@ -25,5 +25,11 @@ declare namespace API {
   type Device = {
     serial: string;
     model: string;
+    name?: string;
+  };
+
+  type DeviceEvent = {
+    type: "connected" | "disconnected" | "state";
+    device: Device & { state: string };
   };
 }